@@ -0,0 +1,167 @@
+import json
+import math
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Priority classes, highest first. Paths are matched in order; unmatched
+# /ml/v1 paths are "standard" and everything else (health, docs) is exempt.
+PRIORITY_CLASSES = ('critical', 'standard', 'batch')
+ROUTE_CLASSES: List[Tuple[str, Optional[str]]] = [
+    (r'^/ml/v1/(admin/|models/status$)', None),
+    (r'^/ml/v1/predict/[^/]+/batch$', 'batch'),
+    (r'^/ml/v1/cluster/batch$', 'batch'),
+    (r'^/ml/v1/recommendations/content/batch$', 'batch'),
+    (r'^/ml/v1/clustering/discover-personas', 'batch'),
+    (r'^/ml/v1/llm/', 'batch'),
+    (r'^/ml/v1/(predict/|score/|fraud/)', 'critical'),
+    (r'^/ml/v1/', 'standard'),
+]
+
+
+class AIMDLimit:
+    """
+    Concurrency limit for one priority class, adapted AIMD-style: +1/limit
+    per request that finishes within ``target`` while the class is busy,
+    ×``backoff`` (at most once per ``target`` interval) when one overruns.
+    """
+
+    def __init__(self, name: str, target: float, max_limit: int, min_limit: int = 1, backoff: float = 0.9):
+        self.name = name
+        self.target = target
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.inflight = 0
+        self.latency_ewma = 0.0
+        self._last_decrease = 0.0
+        self.counters = {'admitted': 0, 'shed': 0, 'overruns': 0, 'decreases': 0}
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= max(int(self.limit), self.min_limit):
+            self.counters['shed'] += 1
+            return False
+        self.inflight += 1
+        self.counters['admitted'] += 1
+        return True
+
+    def release(self, latency: float) -> bool:
+        """Record a finished request; True when it overran the target"""
+        self.inflight -= 1
+        self.latency_ewma = latency if not self.latency_ewma else 0.9 * self.latency_ewma + 0.1 * latency
+        if latency > self.target:
+            self.counters['overruns'] += 1
+            self.decrease()
+            return True
+        # Only grow while the limit is actually being exercised
+        if self.inflight * 2 >= self.limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        return False
+
+    def decrease(self, interval: Optional[float] = None) -> None:
+        """Multiplicative back-off, at most once per ``interval`` (default: the target)"""
+        now = time.monotonic()
+        if now - self._last_decrease < (self.target if interval is None else interval):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.counters['decreases'] += 1
+
+    def retry_after(self) -> float:
+        """Seconds until a slot is likely free: about one request's latency"""
+        return min(max(self.latency_ewma or self.target, 0.001), 30.0)
+
+    def stats(self) -> Dict:
+        return {
+            'limit': round(self.limit, 2),
+            'maxLimit': self.max_limit,
+            'inflight': self.inflight,
+            'targetMs': round(self.target * 1000, 1),
+            'latencyEwmaMs': round(self.latency_ewma * 1000, 2),
+            **self.counters
+        }
+
+
+class AdmissionController:
+    """
+    Per-priority-class concurrency limits. An overrun in a class also backs
+    off every lower class, so a slowing checkout path sheds batch work
+    (clustering, LLM generation) before its own requests.
+    """
+
+    def __init__(self, enabled: bool = True, targets_ms: Optional[Dict[str, float]] = None,
+                 max_limits: Optional[Dict[str, int]] = None, min_limit: int = 1, backoff: float = 0.9):
+        targets_ms = targets_ms or {}
+        max_limits = max_limits or {}
+        self.enabled = enabled
+        self.limits = {
+            name: AIMDLimit(name, targets_ms.get(name, 1000) / 1000, max_limits.get(name, 64), min_limit, backoff)
+            for name in PRIORITY_CLASSES
+        }
+        self._routes = [(re.compile(pattern), cls) for pattern, cls in ROUTE_CLASSES]
+
+    def classify(self, path: str) -> Optional[AIMDLimit]:
+        """Limiter for a request path, or None when the path is exempt"""
+        for pattern, cls in self._routes:
+            if pattern.match(path):
+                return self.limits[cls] if cls else None
+        return None
+
+    def release(self, limiter: AIMDLimit, latency: float) -> None:
+        if limiter.release(latency):
+            for name in PRIORITY_CLASSES[PRIORITY_CLASSES.index(limiter.name) + 1:]:
+                # Paced by the overrunning class, not the slower lower one
+                self.limits[name].decrease(limiter.target)
+
+    def stats(self) -> Dict:
+        return {'enabled': self.enabled, 'classes': {name: limit.stats() for name, limit in self.limits.items()}}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController. Shed requests get 503
+    with ``Retry-After`` (whole seconds, per HTTP) and ``retryAfterUs`` in
+    the body for clients that can back off with finer granularity.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.controller.enabled:
+            await self.app(scope, receive, send)
+            return
+        limiter = self.controller.classify(scope['path'])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not limiter.try_acquire():
+            await self._shed(limiter, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(limiter, time.perf_counter() - start)
+
+    @staticmethod
+    async def _shed(limiter: AIMDLimit, send) -> None:
+        retry_after = limiter.retry_after()
+        body = json.dumps({
+            'detail': f"Overloaded: {limiter.name} requests are being shed",
+            'priority': limiter.name,
+            'retryAfterUs': int(retry_after * 1e6)
+        }).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(max(1, math.ceil(retry_after))).encode())
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
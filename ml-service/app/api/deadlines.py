@@ -0,0 +1,64 @@
+import json
+from typing import Optional
+
+from app.utils.deadline import (
+    DEADLINE_HEADER, DEGRADED_HEADER, TIMEOUT_HEADER, Deadline, current_deadline
+)
+
+_TIMEOUT_KEY = TIMEOUT_HEADER.encode()
+_DEADLINE_KEY = DEADLINE_HEADER.encode()
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that reads the caller's deadline headers into
+    ``current_deadline`` for the rest of the request. Requests that arrive
+    already expired get 504. Stages that degraded to meet the deadline are
+    listed in the ``X-Degraded-Stages`` response header.
+    """
+
+    def __init__(self, app, default_timeout_ms: float = 0):
+        self.app = app
+        self.default_timeout_ms = default_timeout_ms
+
+    def _deadline(self, scope) -> Optional[Deadline]:
+        timeout, deadline = '', ''
+        for key, value in scope['headers']:
+            if key == _TIMEOUT_KEY:
+                timeout = value.decode('latin-1')
+            elif key == _DEADLINE_KEY:
+                deadline = value.decode('latin-1')
+        if not timeout and not deadline and self.default_timeout_ms > 0:
+            timeout = str(self.default_timeout_ms)
+        return Deadline.from_headers(timeout, deadline)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        deadline = self._deadline(scope)
+        if deadline is None:
+            await self.app(scope, receive, send)
+            return
+        if deadline.remaining() <= 0:
+            body = json.dumps({'detail': 'Request deadline already passed'}).encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': 504,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        async def send_with_degraded(message):
+            if message['type'] == 'http.response.start' and deadline.degraded:
+                headers = list(message.get('headers', []))
+                headers.append((DEGRADED_HEADER.encode(), ','.join(deadline.degraded).encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        token = current_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send_with_degraded)
+        finally:
+            current_deadline.reset(token)
@@ -0,0 +1,98 @@
+import hashlib
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from app.api.negotiation import NegotiatedResponse, response_format
+from app.utils.bounded_cache import BoundedLRU
+from app.utils.deadline import current_deadline
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag: a hash of the exact bytes sent (so JSON and MessagePack differ)"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` check; weak comparison, as RFC 9110 requires for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Rendered responses of deterministic routes, keyed by route, validated
+    request and wire format, with ETag and Cache-Control handling.
+
+    Repeats of an identical request are served from a bounded LRU (by
+    entries and bytes, with a TTL) and conditional requests whose
+    ``If-None-Match`` matches get 304. Responses from a request that
+    degraded to meet its deadline are neither cached nor marked cacheable.
+    """
+
+    def __init__(self, enabled: bool = True, max_entries: int = 10000, max_mb: float = 64,
+                 ttl: float = 300, max_age: int = 60):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.entries = BoundedLRU(max_entries=max_entries, ttl=ttl, max_weight=int(max_mb * 1024 * 1024))
+        self.not_modified = 0
+
+    def _key(self, route: str, request_key: str) -> str:
+        digest = hashlib.sha256(request_key.encode('utf-8')).hexdigest()
+        return f"{route}:{response_format.get()}:{digest}"
+
+    async def respond(self, request: Request, route: str, request_key: str,
+                      compute: Callable[[], Any], shared: bool = True, threadpool: bool = False) -> Response:
+        """
+        Response for ``compute()`` (in the threadpool with ``threadpool=True``),
+        served from the cache when an identical request was answered
+        recently. ``shared=False`` marks per-visitor results: they still get
+        an ETag but are not stored here and only private caches may keep them.
+        """
+        key = self._key(route, request_key)
+        entry = self.entries.get(key) if self.enabled and shared else None
+        status = 'HIT'
+        if entry is None:
+            status = 'MISS'
+            rendered = NegotiatedResponse(await run_in_threadpool(compute) if threadpool else compute())
+            deadline = current_deadline.get()
+            cacheable = deadline is None or not deadline.degraded
+            entry = (rendered.body, rendered.media_type, etag_for(rendered.body), cacheable)
+            if self.enabled and shared and cacheable:
+                self.entries.put(key, entry, weight=len(rendered.body))
+        body, media_type, etag, cacheable = entry
+
+        headers = {'ETag': etag, 'Vary': 'Accept', 'X-Cache': status}
+        if not cacheable:
+            headers['Cache-Control'] = 'no-store'
+        elif shared:
+            headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        else:
+            headers['Cache-Control'] = 'private, no-cache'
+
+        if cacheable and etag_matches(request.headers.get('if-none-match'), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def stats(self) -> Dict:
+        stats = self.entries.stats()
+        return {
+            'enabled': self.enabled,
+            'max_age': self.max_age,
+            'not_modified': self.not_modified,
+            'bytes': stats.pop('weight'),
+            **stats
+        }
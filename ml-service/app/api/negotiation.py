@@ -0,0 +1,132 @@
+import json
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Optional
+
+import msgpack
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+
+from app.utils.packed_arrays import pack_array
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Wire format of the response being built: "json" (default) or "msgpack"
+response_format: ContextVar[str] = ContextVar('response_format', default='json')
+
+
+def _media_type(value: str) -> str:
+    return value.split(';', 1)[0].strip().lower()
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the Accept header prefers MessagePack over JSON"""
+    if not accept:
+        return False
+    msgpack_q, json_q = 0.0, 0.0
+    for entry in accept.split(','):
+        media_type, _, params = entry.partition(';')
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type == 'application/json':
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return pack_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+class NegotiatedResponse(Response):
+    """
+    Renders JSON or MessagePack according to ``response_format``. Numpy
+    arrays become nested lists in JSON and packed arrays in MessagePack.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(self, content: Any = None, *args, **kwargs):
+        self.format = response_format.get()
+        if self.format == 'msgpack':
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.format == 'msgpack':
+            return msgpack.packb(content, default=_msgpack_default)
+        return json.dumps(
+            content,
+            default=_json_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(',', ':'),
+        ).encode('utf-8')
+
+
+async def _as_json_request(request: Request) -> Request:
+    """Decode a MessagePack body and present it to FastAPI as parsed JSON"""
+    body = await request.body()
+    try:
+        payload = msgpack.unpackb(body, raw=False) if body else None
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid MessagePack body: {e!r}")
+
+    scope = dict(request.scope)
+    scope['headers'] = [
+        (key, value) for key, value in request.scope['headers'] if key != b'content-type'
+    ] + [(b'content-type', b'application/json')]
+    decoded = Request(scope, request.receive)
+    decoded._body = body
+    if body:
+        decoded._json = payload
+    return decoded
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route that accepts ``application/msgpack`` request bodies and renders
+    the response in the format the ``Accept`` header prefers. JSON stays
+    the default for both directions.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        if isinstance(kwargs.get('response_class'), (DefaultPlaceholder, type(None))):
+            kwargs['response_class'] = NegotiatedResponse
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if _media_type(request.headers.get('content-type', '')) in MSGPACK_MEDIA_TYPES:
+                request = await _as_json_request(request)
+            token = response_format.set('msgpack' if wants_msgpack(request.headers.get('accept')) else 'json')
+            try:
+                return await handler(request)
+            finally:
+                response_format.reset(token)
+
+        return negotiated_handler
@@ -1,36 +1,100 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from functools import partial
 from typing import List, Dict, Any, Optional
+import os
+import tempfile
+
+import numpy as np
 
 # Import schemas
 from app.schemas import (
     EmotionRequest, EmotionResponse,
     AbandonmentRequest, AbandonmentResponse,
-    PersonaRequest, PersonaResponse,
-    FraudRequest, FraudResponse,
-    ClusteringRequest, IntentPredictRequest, ContentRecommendationRequest,
+    PredictBatchRequest, EmotionBatchRequest, AbandonmentBatchRequest, FraudBatchRequest,
+    PersonaRequest, PersonaResponse, PersonaBatchRequest, PersonaBatchResponse,
+    FraudRequest, FraudResponse, FraudEventBatch, SessionScoreRequest, SessionScoreResponse,
+    ClusteringRequest, ClusteringFileRequest, IntentPredictRequest, ContentRecommendationRequest,
+    ContentRecommendationBatchRequest,
     ContentGenerationRequest, ContentGenerationResponse,
-    ConfusionDetectionRequest
+    ConfusionDetectionRequest, ModelReloadRequest, VisitorSessionBatch, MAX_CHUNK_SIZE
 )
 
 # Import models and services
+from app.api.admission import AdmissionController
+from app.api.http_cache import ResponseCache
+from app.api.negotiation import NegotiatedResponse, NegotiatedRoute
 from app.models.clustering import UserClustering
 from app.models.intent_scoring import IntentScorer
 from app.models.recommendation import ContentRecommender
-from app.models.emotion_model import EmotionPredictor
-from app.models.abandonment_model import AbandonmentPredictor
-from app.models.persona_clustering import PersonaClustering as PersonaClusterer
-from app.models.fraud_model import FraudDetector
+from app.models.emotion_model import FEATURE_EXTRACTOR as EMOTION_EXTRACTOR, EmotionPredictor
+from app.models.abandonment_model import FEATURE_EXTRACTOR as ABANDONMENT_EXTRACTOR, AbandonmentPredictor
+from app.models.persona_clustering import PersonaCentroidModel, PersonaClustering as PersonaClusterer
+from app.models.fraud_model import FEATURE_EXTRACTOR as FRAUD_EXTRACTOR, FraudDetector
 
 from app.services.content_service import ContentService
+from app.services.fraud_state import FraudStateStore
+from app.services.job_queue import create_job_manager
+from app.services.model_reloader import ModelReloader
+from app.services.persona_drift import PersonaDriftMonitor
+from app.services.session_reader import session_chunk_reader
+from app.services.session_scoring import SessionScorer
+from app.services.tenant_models import TenantModelCache
+from app.services.visitor_state import VisitorStateStore
+from app.utils.config import Config
+from app.utils.log_pipeline import truncate
 from app.utils.numpy_json_encoder import to_python_types
 
-router = APIRouter()
+# JSON by default; application/msgpack bodies and Accept are honoured on every route
+router = APIRouter(route_class=NegotiatedRoute)
 
 # Initialize models
 emotion_predictor = EmotionPredictor()
 abandonment_predictor = AbandonmentPredictor()
 persona_clusterer = PersonaClusterer()
 fraud_detector = FraudDetector()
+fraud_state = FraudStateStore(**Config.get_config()["fraud_state"])
+visitor_state = VisitorStateStore(**Config.get_config()["visitor_state"])
+intent_scorer = IntentScorer()
+content_recommender = ContentRecommender()
+
+# ETags and a bounded response cache for the deterministic routes
+response_cache = ResponseCache(**Config.get_config()["http_cache"])
+
+# Hot reload of new artifact versions into the predictors above
+model_reloader = ModelReloader(
+    {"emotion": emotion_predictor, "abandonment": abandonment_predictor, "fraud": fraud_detector},
+    **Config.get_config()["reload"]
+)
+
+# Background jobs for long-running work (persona discovery)
+job_manager = create_job_manager(**Config.get_config()["jobs"])
+
+# Per-website models, falling back to the global ones above
+tenant_models = TenantModelCache(
+    global_models={
+        "emotion": emotion_predictor,
+        "abandonment": abandonment_predictor,
+        "fraud": fraud_detector,
+        "persona": persona_clusterer
+    },
+    **Config.get_config()["tenants"]
+)
+
+# Per-website persona drift; refits go through the job queue when it crosses the threshold
+drift_monitor = PersonaDriftMonitor(
+    submit_refit=lambda website_id, rows, n_clusters: job_manager.submit(
+        "refit-personas", _refit_website_personas, website_id, rows, n_clusters
+    ),
+    **Config.get_config()["drift"]
+)
+
+# Emotion/abandonment/fraud/intent in one pass over a shared payload
+session_scorer = SessionScorer(tenant_models, fraud_state, visitor_state, intent_scorer)
+
+# Priority-class concurrency limits, applied by AdmissionMiddleware in app.main
+admission_controller = AdmissionController(**Config.get_config()["admission"])
 
 # ═══════════════════════════════════════════════════════════════════════════
 # New Endpoints
@@ -40,8 +104,7 @@ import logging
 
 # ... (other imports)
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured once in app.main (queued, sampled writer)
 logger = logging.getLogger(__name__)
 
 # ... (rest of the file)
@@ -53,8 +116,9 @@ async def predict_emotion(request: EmotionRequest):
     """
     try:
         if request.page_url:
-            logger.info(f"Received emotion prediction request for URL: {request.page_url}")
-        result = emotion_predictor.predict(request.features)
+            # One record per request: sampled and rate-limited by the log pipeline
+            logger.info("Received emotion prediction request", extra={"page_url": truncate(request.page_url, 256)})
+        result = tenant_models.get("emotion", request.websiteId).predict_validated([request.features])[0]
         return EmotionResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -65,88 +129,268 @@ async def predict_abandonment(request: AbandonmentRequest):
     Predict cart abandonment probability
     """
     try:
-        result = abandonment_predictor.predict(request.features)
+        result = tenant_models.get("abandonment", request.websiteId).predict_validated([request.features])[0]
         return AbandonmentResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Validated batch items -> feature matrix in each model's order
+BATCH_EXTRACTORS = {
+    "emotion": EMOTION_EXTRACTOR,
+    "abandonment": ABANDONMENT_EXTRACTOR,
+    "fraud": FRAUD_EXTRACTOR
+}
+
+def _batch_matrix(kind: str, request: PredictBatchRequest, predictor) -> np.ndarray:
+    """Feature matrix of a batch request, from validated feature items or a packed matrix"""
+    if (request.items is None) == (request.matrix is None):
+        raise ValueError("Send exactly one of 'items' or 'matrix'")
+    n_features = len(predictor.feature_names)
+    if request.items is not None:
+        return BATCH_EXTRACTORS[kind].matrix(request.items)
+    if request.matrix.shape[0] == 0 or request.matrix.shape[1] != n_features:
+        raise ValueError(f"'matrix' must have at least one row and {n_features} columns ({', '.join(predictor.feature_names)})")
+    return request.matrix
+
+async def _predict_batch(kind: str, request: PredictBatchRequest) -> NegotiatedResponse:
+    try:
+        predictor = tenant_models.get(kind, request.websiteId)
+        X = _batch_matrix(kind, request, predictor)
+        result = await run_in_threadpool(predictor.predict_matrix, X)
+        return NegotiatedResponse({"success": True, "count": len(X), **result})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/emotion/batch")
+async def predict_emotion_batch(request: EmotionBatchRequest):
+    """
+    Predict emotions for many rows; probabilities come back as a packed matrix
+    """
+    return await _predict_batch("emotion", request)
+
+@router.post("/predict/abandonment/batch")
+async def predict_abandonment_batch(request: AbandonmentBatchRequest):
+    """
+    Predict cart abandonment for many rows (matrix columns are the encoded features)
+    """
+    return await _predict_batch("abandonment", request)
+
+@router.post("/predict/fraud/batch")
+async def predict_fraud_batch(request: FraudBatchRequest):
+    """
+    Predict fraud probability for many rows
+    """
+    return await _predict_batch("fraud", request)
+
+def _drift_observer(website_id: Optional[str]):
+    # Refits are written under the tenant directory, so only valid ids are tracked
+    return partial(drift_monitor.observe, website_id) if tenant_models.is_valid_website_id(website_id) else None
+
 @router.post("/cluster", response_model=PersonaResponse)
 async def cluster_persona(request: PersonaRequest):
     """
     Perform dynamic persona clustering
     """
     try:
-        result = persona_clusterer.cluster(request.features, request.method)
+        # Rule-based traits treat unsent fields differently from defaults
+        features = request.features.model_dump(exclude_unset=True)
+        result = tenant_models.get("persona", request.websiteId).cluster(
+            features, request.method, on_assign=_drift_observer(request.websiteId)
+        )
         return PersonaResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/cluster/batch", response_model=PersonaBatchResponse)
+async def cluster_persona_batch(request: PersonaBatchRequest):
+    """
+    Assign personas to many feature sets in one call
+    """
+    try:
+        items = [item.model_dump(exclude_unset=True) for item in request.items]
+        results = tenant_models.get("persona", request.websiteId).cluster_batch(
+            items, request.method, on_assign=_drift_observer(request.websiteId)
+        )
+        return PersonaBatchResponse(results=[PersonaResponse(**result) for result in results])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _refit_website_personas(website_id: str, rows: np.ndarray, n_clusters: int, job=None) -> Dict[str, Any]:
+    """
+    Refit a website's persona centroids on its recent sessions and publish
+    them as its tenant model (the drift monitor's refit job). The replaced
+    centroids are kept; ``POST /drift/{website_id}/rollback`` restores them.
+    """
+    if len(rows) < n_clusters:
+        raise ValueError(f"Need at least {n_clusters} recent sessions to refit, got {len(rows)}")
+    model = PersonaCentroidModel.fit(
+        rows, persona_clusterer.feature_names, persona_clusterer.rule_based_persona, n_clusters=n_clusters
+    )
+    # The next request loads the new centroids, which starts a new drift baseline
+    tenant_models.publish("persona", website_id, model.save)
+
+    _, confidence, _ = model.assign(rows)
+    return {
+        "websiteId": website_id,
+        "rows": len(rows),
+        "personas": model.personas,
+        "centroidIds": model.centroid_ids,
+        "meanConfidence": round(float(confidence.mean()), 4)
+    }
+
+@router.get("/drift/{website_id}")
+async def get_persona_drift(website_id: str):
+    """
+    Drift of a website's live persona assignments from the centroids that made them
+    """
+    report = drift_monitor.report(website_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"No centroid assignments observed for website {website_id}")
+    return {"success": True, "websiteId": website_id, "drift": to_python_types(report)}
+
+@router.post("/drift/{website_id}/rollback")
+async def rollback_persona_refit(website_id: str):
+    """
+    Restore the persona centroids a website had before its last refit
+    """
+    if not tenant_models.is_valid_website_id(website_id):
+        raise HTTPException(status_code=422, detail=f"Invalid website id: {website_id}")
+    if not await run_in_threadpool(tenant_models.rollback, "persona", website_id):
+        raise HTTPException(status_code=404, detail=f"No previous persona centroids for website {website_id}")
+    return {"success": True, "websiteId": website_id}
+
 @router.post("/predict/fraud", response_model=FraudResponse)
 async def predict_fraud(request: FraudRequest):
     """
     Predict fraud probability
     """
     try:
-        result = fraud_detector.predict(request.features)
+        # Aggregates fill only the fields the caller did not send
+        features = fraud_state.enrich_features(request.userId, request.features)
+        result = tenant_models.get("fraud", request.websiteId).predict_validated([features])[0]
         return FraudResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/score/session", response_model=SessionScoreResponse, response_model_exclude_none=True)
+async def score_session(request: SessionScoreRequest):
+    """
+    Run the selected models over one behavior payload; emotion feeds abandonment
+    """
+    try:
+        return await session_scorer.score(
+            request.features, request.models, request.websiteId, request.userId, request.visitorId
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/fraud/events")
+async def ingest_fraud_events(request: FraudEventBatch):
+    """
+    Ingest checkout/payment events into the rolling per-user fraud aggregates
+    """
+    accepted = fraud_state.ingest([event.model_dump() for event in request.events])
+    return {
+        "success": True,
+        "accepted": accepted,
+        "rejected": len(request.events) - accepted
+    }
+
+@router.get("/fraud/users/{user_id}/aggregates")
+async def get_fraud_aggregates(user_id: str):
+    """
+    Current windowed fraud aggregates for a user
+    """
+    aggregates = fraud_state.aggregates(user_id)
+    if aggregates is None:
+        raise HTTPException(status_code=404, detail=f"No recent events for user {user_id}")
+    return {"success": True, "userId": user_id, "aggregates": aggregates}
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Existing Routes (from original routes.py)
 # ═══════════════════════════════════════════════════════════════════════════
 
+def _personas_response(clustering: UserClustering, clusters: Dict[int, Dict]) -> Dict[str, Any]:
+    """Build the persona discovery response from fitted clusters"""
+    # Generate persona descriptions
+    personas = []
+    for cluster_id, cluster_info in clusters.items():
+        # Create a consistent ID for the persona
+        sanitized_name = "".join(filter(str.isalnum, cluster_info["name"])).lower()
+        persona_id = f"persona_{cluster_id}_{sanitized_name}"
+
+        persona = {
+            "id": persona_id,
+            "name": cluster_info["name"],
+            "description": cluster_info["description"],
+            "clusterData": {
+                "clusterId": cluster_id,
+                "avgTimeSpent": float(cluster_info["metrics"]["avg_time_spent"]),
+                "avgScrollDepth": float(cluster_info["metrics"]["avg_scroll_depth"]),
+                "avgClickRate": float(cluster_info["metrics"]["avg_click_rate"]),
+                "avgPageViews": float(cluster_info["metrics"]["avg_page_views"]),
+                "commonPages": cluster_info["metrics"]["common_pages"],
+                "commonDevices": cluster_info["metrics"]["common_devices"],
+                "behaviorPattern": cluster_info["behavior_pattern"],
+                "characteristics": cluster_info["characteristics"]
+            },
+            "userCount": cluster_info["user_count"],
+            "sessionIds": cluster_info["session_ids"]
+        }
+        personas.append(persona)
+
+    final_response = {
+        "success": True,
+        "personas": personas,
+        "totalClusters": len(personas)
+    }
+    if clustering.quality_report:
+        final_response["qualityReport"] = clustering.quality_report
+    return to_python_types(final_response)
+
+
+def _run_persona_discovery(request: ClusteringRequest, job=None) -> Dict[str, Any]:
+    """
+    Cluster the request's sessions and build the persona response.
+    Raises ValueError for data quality issues.
+    """
+    # The UserClustering class now handles its own data processing.
+    clustering = UserClustering(
+        min_clusters=request.minClusters,
+        max_clusters=request.maxClusters,
+        progress_callback=job.report if job else None
+    )
+
+    # fit_predict now performs validation, preprocessing, and clustering.
+    # It can raise ValueError for specific data quality issues.
+    clusters = clustering.fit_predict([s.dict() for s in request.sessionData])
+    return _personas_response(clustering, clusters)
+
+
+def _run_streamed_persona_discovery(open_chunks, min_clusters: int, max_clusters: int) -> Dict[str, Any]:
+    """Persona discovery over chunked NDJSON/Parquet input"""
+    clustering = UserClustering(min_clusters=min_clusters, max_clusters=max_clusters)
+    clusters = clustering.fit_predict_stream(open_chunks)
+    return _personas_response(clustering, clusters)
+
+
 @router.post("/clustering/discover-personas")
-async def discover_personas(request: ClusteringRequest):
+async def discover_personas(request: ClusteringRequest, http_request: Request):
     """
     Discover user personas using a robust clustering algorithm.
     Handles data quality issues and provides clear error messages.
     """
     try:
-        # The UserClustering class now handles its own data processing.
-        clustering = UserClustering(
-            min_clusters=request.minClusters,
-            max_clusters=request.maxClusters
+        # Seeded clustering: identical session data gives identical personas
+        return await response_cache.respond(
+            http_request, "personas", request.model_dump_json(),
+            lambda: _run_persona_discovery(request), threadpool=True
         )
-        
-        # fit_predict now performs validation, preprocessing, and clustering.
-        # It can raise ValueError for specific data quality issues.
-        clusters = clustering.fit_predict([s.dict() for s in request.sessionData])
-
-        # Generate persona descriptions
-        personas = []
-        for cluster_id, cluster_info in clusters.items():
-            # Create a consistent ID for the persona
-            sanitized_name = "".join(filter(str.isalnum, cluster_info["name"])).lower()
-            persona_id = f"persona_{cluster_id}_{sanitized_name}"
-
-            persona = {
-                "id": persona_id,
-                "name": cluster_info["name"],
-                "description": cluster_info["description"],
-                "clusterData": {
-                    "clusterId": cluster_id,
-                    "avgTimeSpent": float(cluster_info["metrics"]["avg_time_spent"]),
-                    "avgScrollDepth": float(cluster_info["metrics"]["avg_scroll_depth"]),
-                    "avgClickRate": float(cluster_info["metrics"]["avg_click_rate"]),
-                    "avgPageViews": float(cluster_info["metrics"]["avg_page_views"]),
-                    "commonPages": cluster_info["metrics"]["common_pages"],
-                    "commonDevices": cluster_info["metrics"]["common_devices"],
-                    "behaviorPattern": cluster_info["behavior_pattern"],
-                    "characteristics": cluster_info["characteristics"]
-                },
-                "userCount": cluster_info["user_count"],
-                "sessionIds": cluster_info["session_ids"]
-            }
-            personas.append(persona)
-
-        final_response = {
-            "success": True,
-            "personas": personas,
-            "totalClusters": len(personas)
-        }
-        return to_python_types(final_response)
     
     except ValueError as e:
         # Catches specific data validation errors from the clustering model
@@ -157,52 +401,237 @@ async def discover_personas(request: ClusteringRequest):
         raise HTTPException(status_code=500, detail=f"An unexpected internal error occurred: {e}")
 
 
+@router.post("/clustering/discover-personas/file")
+async def discover_personas_from_file(request: ClusteringFileRequest):
+    """
+    Discover personas from an NDJSON or Parquet file under the configured
+    data directory, read in bounded-size chunks.
+    """
+    data_dir = os.path.realpath(Config.get_config()["ml"]["clustering_data_dir"])
+    path = os.path.realpath(os.path.join(data_dir, request.path))
+    if os.path.commonpath([data_dir, path]) != data_dir:
+        raise HTTPException(status_code=400, detail="Path must be inside the clustering data directory.")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Session file not found: {request.path}")
+
+    try:
+        open_chunks = session_chunk_reader(path, request.format, request.chunkSize)
+        return await run_in_threadpool(
+            _run_streamed_persona_discovery, open_chunks, request.minClusters, request.maxClusters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected internal error occurred: {e}")
+
+
+@router.post("/clustering/discover-personas/stream")
+async def discover_personas_from_stream(
+    request: Request,
+    format: Optional[str] = None,
+    chunkSize: int = Query(50000, gt=0, le=MAX_CHUNK_SIZE),
+    minClusters: int = 3,
+    maxClusters: int = 6
+):
+    """
+    Discover personas from a streamed NDJSON (application/x-ndjson) or
+    Parquet (application/vnd.apache.parquet) request body. The body is
+    spooled to a temporary file rather than held in memory.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "parquet" if "parquet" in content_type else "ndjson"
+
+    spool_bytes = Config.get_config()["ml"]["stream_spool_bytes"]
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as body:
+        async for block in request.stream():
+            body.write(block)
+
+        try:
+            open_chunks = session_chunk_reader(body, format, chunkSize)
+            return await run_in_threadpool(
+                _run_streamed_persona_discovery, open_chunks, minClusters, maxClusters
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An unexpected internal error occurred: {e}")
+
+
+@router.post("/clustering/jobs", status_code=202)
+async def submit_persona_discovery_job(request: ClusteringRequest):
+    """
+    Queue persona discovery and return a job id immediately
+    """
+    try:
+        job = job_manager.submit("discover-personas", _run_persona_discovery, request)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"success": True, **job.to_dict()}
+
+
+@router.get("/clustering/jobs/{job_id}")
+async def get_persona_discovery_job(job_id: str):
+    """
+    Status and progress of a persona discovery job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return {"success": True, **job.to_dict()}
+
+
+@router.get("/clustering/jobs/{job_id}/result")
+async def get_persona_discovery_result(job_id: str):
+    """
+    Result of a finished persona discovery job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    if job.status == "succeeded":
+        return job.result
+    if job.status == "failed":
+        raise HTTPException(status_code=422 if job.error_type == "validation" else 500, detail=job.error)
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} was cancelled")
+    return JSONResponse(status_code=202, content={"success": True, **job.to_dict()})
+
+
+@router.delete("/clustering/jobs/{job_id}")
+async def cancel_persona_discovery_job(job_id: str):
+    """
+    Cancel a queued or running persona discovery job
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+    return {"success": True, **job.to_dict()}
+
+
+def _intent_response(request: IntentPredictRequest) -> Dict[str, Any]:
+    history = visitor_state.summary(request.websiteId, request.visitorId)
+    result = intent_scorer.predict(
+        time_spent=request.timeSpent,
+        scroll_depth=request.scrollDepth,
+        click_rate=request.clickRate,
+        session_history=request.sessionHistory,
+        visitor_state=history
+    )
+
+    response = {
+        "success": True,
+        "intentScore": result["intent_score"],
+        "intent": result["intent_level"],
+        "confidence": result["confidence"],
+        "factors": result["factors"]
+    }
+    if history is not None:
+        response["history"] = history
+    return response
+
+
 @router.post("/intent/predict")
-async def predict_intent(request: IntentPredictRequest):
+async def predict_intent(request: IntentPredictRequest, http_request: Request):
     """
     Predict user purchase intent
     """
     try:
-        scorer = IntentScorer()
-        
-        result = scorer.predict(
-            time_spent=request.timeSpent,
-            scroll_depth=request.scrollDepth,
-            click_rate=request.clickRate,
-            session_history=request.sessionHistory
+        # Scores read from visitor state are per-visitor and change as sessions are recorded
+        return await response_cache.respond(
+            http_request, "intent", request.model_dump_json(),
+            lambda: _intent_response(request), shared=request.visitorId is None
         )
 
-        return {
-            "success": True,
-            "intentScore": result["intent_score"],
-            "intent": result["intent_level"],
-            "confidence": result["confidence"],
-            "factors": result["factors"]
-        }
-
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/intent/predict")
+async def predict_intent_query(http_request: Request, timeSpent: float, scrollDepth: float, clickRate: float,
+                               websiteId: Optional[str] = None, visitorId: Optional[str] = None):
+    """
+    Predict user purchase intent from query parameters (cacheable by CDNs)
+    """
+    request = IntentPredictRequest(
+        timeSpent=timeSpent, scrollDepth=scrollDepth, clickRate=clickRate,
+        websiteId=websiteId, visitorId=visitorId
+    )
+    return await predict_intent(request, http_request)
+
+
+@router.post("/visitors/sessions")
+async def record_visitor_sessions(request: VisitorSessionBatch):
+    """
+    Fold finished sessions into the per-visitor state read by intent scoring
+    """
+    recorded = visitor_state.record([session.model_dump() for session in request.sessions])
+    return {"success": True, "recorded": recorded}
+
+
+@router.get("/visitors/{website_id}/{visitor_id}/state")
+async def get_visitor_state(website_id: str, visitor_id: str):
+    """
+    Current session summary for a site's visitor
+    """
+    history = visitor_state.summary(website_id, visitor_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"No tracked sessions for visitor {visitor_id} of {website_id}")
+    return {"success": True, "websiteId": website_id, "visitorId": visitor_id, "state": history}
+
+
+def _recommendations_response(request: ContentRecommendationRequest) -> Dict[str, Any]:
+    recommendations = content_recommender.generate_recommendations(
+        persona_type=request.personaType,
+        current_page=request.currentPage,
+        user_history=request.userHistory
+    )
+
+    return {
+        "success": True,
+        "recommendations": recommendations
+    }
+
+
 @router.post("/recommendations/content")
-async def recommend_content(request: ContentRecommendationRequest):
+async def recommend_content(request: ContentRecommendationRequest, http_request: Request):
     """
     Generate personalized content recommendations
     """
     try:
-        recommender = ContentRecommender()
-        
-        recommendations = recommender.generate_recommendations(
-            persona_type=request.personaType,
-            current_page=request.currentPage,
-            user_history=request.userHistory
+        return await response_cache.respond(
+            http_request, "recommendations", request.model_dump_json(),
+            lambda: _recommendations_response(request)
         )
 
-        return {
-            "success": True,
-            "recommendations": recommendations
-        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/recommendations/content")
+async def recommend_content_query(http_request: Request, personaType: str, currentPage: str,
+                                  userHistory: List[str] = Query([])):
+    """
+    Content recommendations from query parameters (cacheable by CDNs)
+    """
+    request = ContentRecommendationRequest(personaType=personaType, currentPage=currentPage, userHistory=userHistory)
+    return await recommend_content(request, http_request)
+
+
+@router.post("/recommendations/content/batch")
+async def recommend_content_batch(request: ContentRecommendationBatchRequest, http_request: Request):
+    """
+    Content recommendations for many (persona, page, history) tuples, in order
+    """
+    def compute():
+        results = content_recommender.generate_batch([
+            {"persona_type": item.personaType, "current_page": item.currentPage, "user_history": item.userHistory}
+            for item in request.items
+        ])
+        return {"success": True, "results": results}
 
+    try:
+        return await response_cache.respond(http_request, "recommendations_batch", request.model_dump_json(), compute)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -254,6 +683,11 @@ async def detect_confusion(request: ConfusionDetectionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _cache_stats(predictor) -> Optional[Dict[str, Any]]:
+    """Hit rate and size of a predictor's prediction cache (None when disabled)"""
+    return predictor.cache.stats() if predictor.cache is not None else None
+
+
 @router.get("/models/status")
 async def get_models_status():
     """
@@ -264,11 +698,80 @@ async def get_models_status():
         "success": True,
         "models": {
             "clustering": {"status": "ready"},
-            "intent_prediction": {"status": "ready"},
+            "intent_prediction": {"status": "ready", "state": visitor_state.stats()},
             "llm": {"status": "ready"},
-            "emotion_prediction": {"status": "ready"},
-            "abandonment_prediction": {"status": "ready"},
-            "persona_clustering": {"status": "ready"},
-            "fraud_detection": {"status": "ready"}
-        }
-    }
\ No newline at end of file
+            "emotion_prediction": {
+                "status": "ready",
+                "version": emotion_predictor.model_version,
+                "backend": emotion_predictor.backend,
+                "cache": _cache_stats(emotion_predictor)
+            },
+            "abandonment_prediction": {
+                "status": "ready",
+                "version": abandonment_predictor.model_version,
+                "backend": abandonment_predictor.backend,
+                "cascade": abandonment_predictor.get_cascade_stats(),
+                "cache": _cache_stats(abandonment_predictor)
+            },
+            "persona_clustering": {
+                "status": "ready",
+                "centroid_model": persona_clusterer.centroid_model is not None,
+                "drift": drift_monitor.stats()
+            },
+            "fraud_detection": {
+                "status": "ready",
+                "version": fraud_detector.model_version,
+                "backend": fraud_detector.backend,
+                "state": fraud_state.stats(),
+                "cache": _cache_stats(fraud_detector)
+            }
+        },
+        "tenants": tenant_models.stats(),
+        "http_cache": response_cache.stats(),
+        "jobs": job_manager.stats()
+    }
+
+
+@router.get("/admin/models")
+async def list_model_versions():
+    """
+    Served version, rollback history and published artifacts per model
+    """
+    return {"success": True, **to_python_types(model_reloader.status())}
+
+
+@router.post("/admin/models/{model_name}/reload")
+async def reload_model(model_name: str, request: Optional[ModelReloadRequest] = None):
+    """
+    Load a model version in the background, warm it up and swap it in
+    """
+    request = request or ModelReloadRequest()
+    try:
+        result = await run_in_threadpool(model_reloader.reload, model_name, request.version, request.force)
+        return {"success": True, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/admin/models/{model_name}/rollback")
+async def rollback_model(model_name: str):
+    """
+    Swap back to the model version served before the last reload
+    """
+    try:
+        result = await run_in_threadpool(model_reloader.rollback, model_name)
+        return {"success": True, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/admission")
+async def get_admission_stats():
+    """
+    Concurrency limit, in-flight count and admitted/shed counters per priority class
+    """
+    return {"success": True, **admission_controller.stats()}
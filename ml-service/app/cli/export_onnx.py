@@ -0,0 +1,89 @@
+"""
+Export the pickled tree models to ONNX and verify parity with sklearn. Each
+graph is written next to the pickle of the registry version being served
+(``<artifact_dir>/<model>/<version>/model.onnx``), so the ONNX backend
+always matches that version.
+
+Usage:
+    python -m app.cli.export_onnx [--models emotion fraud abandonment]
+                                  [--samples 2000] [--atol 1e-4] [--benchmark]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from app.models.onnx_backend import OnnxClassifier, check_parity, export_to_onnx, onnx_model_path
+from app.services.model_registry import resolve_model_path, resolve_model_version
+
+# Feature defaults used by each predictor; parity samples are drawn around them
+DEFAULT_VECTORS = {
+    'emotion': [500, 120, 50, 800, 40000],
+    'fraud': [60, 50, 0, 0.3, 0.2],
+    'abandonment': [300, 50, 3, 2, 1, 0.5, 0.5, 0.5, 0.5]
+}
+
+
+def _sample_inputs(name: str, n_samples: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = np.array(DEFAULT_VECTORS[name], dtype=np.float64)
+    return (base * rng.uniform(0.0, 2.0, size=(n_samples, base.size))).astype(np.float32)
+
+
+def _time_backend(model, X: np.ndarray, repeats: int = 200) -> dict:
+    row = X[:1]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict_proba(row)
+    single_us = (time.perf_counter() - start) / repeats * 1e6
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_rows_per_sec = X.shape[0] / (time.perf_counter() - start)
+
+    return {'single_row_us': round(single_us, 1), 'batch_rows_per_sec': round(batch_rows_per_sec)}
+
+
+def export_model(name: str, n_samples: int, atol: float, benchmark: bool) -> bool:
+    version = resolve_model_version(name)
+    pickle_path = resolve_model_path(name)
+    if pickle_path is None:
+        print(f"[{name}] skipped: no trained artifact (run `python -m app.cli.train {name}`)")
+        return False
+
+    model = joblib.load(pickle_path)
+    path = export_to_onnx(model, onnx_model_path(name, version))
+    onnx_model = OnnxClassifier(path)
+
+    X = _sample_inputs(name, n_samples)
+    report = check_parity(model, onnx_model, X, atol=atol)
+    status = 'ok' if report['passed'] else 'PARITY FAILED'
+    print(f"[{name}] version {version} -> {path}: {status} "
+          f"(max_abs_diff={report['max_abs_diff']:.2e}, label_agreement={report['label_agreement']:.4f})")
+
+    if benchmark:
+        print(f"[{name}]   sklearn: {_time_backend(model, X)}")
+        print(f"[{name}]   onnx:    {_time_backend(onnx_model, X)}")
+
+    if not report['passed']:
+        os.remove(path)
+    return report['passed']
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export tree predictors to ONNX")
+    parser.add_argument('--models', nargs='+', default=list(DEFAULT_VECTORS), choices=list(DEFAULT_VECTORS))
+    parser.add_argument('--samples', type=int, default=2000, help="Random inputs used for the parity check")
+    parser.add_argument('--atol', type=float, default=1e-4, help="Max allowed probability difference")
+    parser.add_argument('--benchmark', action='store_true', help="Report single-row latency and batch throughput")
+    args = parser.parse_args(argv)
+
+    results = [export_model(name, args.samples, args.atol, args.benchmark) for name in args.models]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Fit the centroid persona model used by ``/cluster`` with ``method="centroid"``.
+
+Input is JSONL, one feature dict per line (the same shape as
+``PersonaRequest.features``).
+
+Usage:
+    python -m app.cli.fit_personas sessions.jsonl [--clusters 5]
+                                   [--output trained_models/persona_centroids.npz]
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from app.models.persona_clustering import PersonaCentroidModel, PersonaClustering
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fit persona centroids offline")
+    parser.add_argument('input', help="JSONL file of persona feature dicts")
+    parser.add_argument('--clusters', type=int, default=5)
+    parser.add_argument('--output', default='trained_models/persona_centroids.npz')
+    args = parser.parse_args(argv)
+
+    clustering = PersonaClustering(model_path=args.output)
+    with open(args.input) as f:
+        X = np.array([clustering._feature_vector(json.loads(line)) for line in f if line.strip()], dtype=np.float64)
+
+    if len(X) < args.clusters:
+        print(f"Need at least {args.clusters} rows, got {len(X)}")
+        return 1
+
+    model = PersonaCentroidModel.fit(
+        X, clustering.feature_names, clustering.rule_based_persona, n_clusters=args.clusters
+    )
+    model.save(args.output)
+
+    _, confidence, _ = model.assign(X)
+    print(f"Saved {args.clusters} centroids to {args.output} "
+          f"(centroids={model.centroid_ids}, mean confidence={confidence.mean():.3f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Re-score an archive of sessions with the emotion, abandonment, fraud and
+intent models without going through the HTTP API.
+
+Input is JSONL or Parquet, one session per record. A record holds the
+request features of every model flat (``mouse_speed_variance``,
+``time_in_cart``, ``checkout_speed``, ``timeSpent``, ...) plus an ``id``.
+When a record has no ``emotion`` field, the predicted emotion feeds the
+abandonment model, as the live pipeline does.
+
+Chunks are scored in a process pool; each worker loads the models from
+``trained_models/`` once. Output is JSONL (one file) or Parquet (a directory
+of part files, one per chunk). A checkpoint written after every chunk lets
+``--resume`` continue an interrupted run.
+
+Usage:
+    python -m app.cli.score_archive sessions.jsonl scores.jsonl
+                                    [--models emotion abandonment fraud intent]
+                                    [--chunk-size 10000] [--workers 0] [--resume]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from threadpoolctl import threadpool_limits
+
+from app.services.session_reader import detect_format, iter_record_chunks
+
+MODELS = ('emotion', 'abandonment', 'fraud', 'intent')
+
+_worker_scorer = None
+_worker_thread_limits = None
+
+
+class ArchiveScorer:
+    """Holds the loaded models and scores one chunk of records"""
+
+    def __init__(self, models: List[str]):
+        self.models = list(models)
+        self.emotion = self.abandonment = self.fraud = self.intent = None
+        if 'emotion' in self.models:
+            from app.models.emotion_model import EmotionPredictor
+            self.emotion = EmotionPredictor()
+        if 'abandonment' in self.models:
+            from app.models.abandonment_model import AbandonmentPredictor
+            self.abandonment = AbandonmentPredictor()
+        if 'fraud' in self.models:
+            from app.models.fraud_model import FraudDetector
+            self.fraud = FraudDetector()
+        if 'intent' in self.models:
+            from app.models.intent_scoring import IntentScorer
+            self.intent = IntentScorer()
+
+    def score(self, records: List[Dict]) -> List[Dict]:
+        rows = [{'id': r.get('id', r.get('_id'))} for r in records]
+
+        emotions = None
+        if self.emotion is not None:
+            emotions = self.emotion.predict_batch(records)
+            for row, result in zip(rows, emotions):
+                row['emotion'] = result['emotion']
+                row['emotionConfidence'] = result['confidence']
+
+        if self.abandonment is not None:
+            features = records
+            if emotions is not None:
+                features = [
+                    r if r.get('emotion') is not None else {**r, 'emotion': e['emotion']}
+                    for r, e in zip(records, emotions)
+                ]
+            for row, result in zip(rows, self.abandonment.predict_batch(features)):
+                row['abandonmentProbability'] = result['probability']
+                row['abandonmentRisk'] = result['risk_level']
+
+        if self.fraud is not None:
+            for row, result in zip(rows, self.fraud.predict_batch(records)):
+                row['fraudProbability'] = result['fraud_probability']
+                row['fraudRisk'] = result['risk_level']
+
+        if self.intent is not None:
+            intent_rows = [
+                {
+                    'time_spent': r.get('timeSpent', 0),
+                    'scroll_depth': r.get('scrollDepth', 0),
+                    'click_rate': r.get('clickRate', 0),
+                    'session_history': r.get('sessionHistory')
+                }
+                for r in records
+            ]
+            for row, result in zip(rows, self.intent.predict_batch(intent_rows)):
+                row['intentScore'] = result['intent_score']
+                row['intent'] = result['intent_level']
+
+        return rows
+
+
+def _init_worker(models: List[str], blas_threads: int) -> None:
+    """Load the models once per worker and cap its BLAS/OpenMP threads"""
+    global _worker_scorer, _worker_thread_limits
+    _worker_thread_limits = threadpool_limits(limits=blas_threads)
+    _worker_scorer = ArchiveScorer(models)
+
+
+def _score_chunk(records: List[Dict]) -> List[Dict]:
+    return _worker_scorer.score(records)
+
+
+def _scored_chunks(chunks: Iterator[List[Dict]], models: List[str],
+                   workers: int) -> Iterator[List[Dict]]:
+    """Score chunks in input order, keeping at most two per worker in flight"""
+    if workers <= 1:
+        scorer = ArchiveScorer(models)
+        for chunk in chunks:
+            yield scorer.score(chunk)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(models, 1)
+    ) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(_score_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+class JsonlSink:
+    """Append-only JSONL output; the byte offset is the resume point"""
+
+    def __init__(self, path: str, checkpoint: Optional[Dict] = None):
+        self.path = path
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            self.file = open(path, 'r+b')
+            self.file.truncate(checkpoint['output_bytes'])
+            self.file.seek(checkpoint['output_bytes'])
+        else:
+            self.file = open(path, 'wb')
+
+    def write(self, index: int, rows: List[Dict]) -> None:
+        self.file.write(''.join(json.dumps(row) + '\n' for row in rows).encode())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def position(self) -> int:
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetSink:
+    """One Parquet part file per chunk under an output directory"""
+
+    def __init__(self, path: str, checkpoint: Optional[Dict] = None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow to be installed.")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # Parts past the checkpoint (or all of them on a fresh run) are stale
+        done_chunks = checkpoint['chunks'] if checkpoint else 0
+        for name in os.listdir(path):
+            if name.startswith('part-') and name.endswith('.parquet'):
+                if int(name[len('part-'):-len('.parquet')]) >= done_chunks:
+                    os.remove(os.path.join(path, name))
+
+    def write(self, index: int, rows: List[Dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part = os.path.join(self.path, f'part-{index:05d}.parquet')
+        pq.write_table(pa.Table.from_pylist(rows), part + '.tmp')
+        os.replace(part + '.tmp', part)
+
+    def position(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+def _load_checkpoint(path: str, expected: Dict) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    for key, value in expected.items():
+        if checkpoint.get(key) != value:
+            raise ValueError(f"Checkpoint {path} was written with {key}={checkpoint.get(key)!r}, not {value!r}")
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: Dict) -> None:
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score a session archive offline")
+    parser.add_argument('input', help="JSONL or Parquet file of session records")
+    parser.add_argument('output', help="JSONL file or Parquet directory to write")
+    parser.add_argument('--input-format', choices=['jsonl', 'parquet'])
+    parser.add_argument('--output-format', choices=['jsonl', 'parquet'])
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS))
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes (0 = all cores)")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the checkpoint")
+    args = parser.parse_args(argv)
+
+    output_format = detect_format(args.output, args.output_format)
+    workers = args.workers or os.cpu_count() or 1
+    checkpoint_path = args.checkpoint or args.output.rstrip('/') + '.checkpoint.json'
+    run = {
+        'input': os.path.abspath(args.input),
+        'chunk_size': args.chunk_size,
+        'models': args.models,
+        'output_format': output_format
+    }
+
+    try:
+        checkpoint = _load_checkpoint(checkpoint_path, run) if args.resume else None
+    except ValueError as e:
+        print(e)
+        return 1
+    done_chunks = checkpoint['chunks'] if checkpoint else 0
+    done_rows = checkpoint['rows'] if checkpoint else 0
+    if checkpoint:
+        print(f"Resuming after {done_chunks} chunks ({done_rows} rows)", file=sys.stderr)
+
+    sink_cls = ParquetSink if output_format == 'parquet' else JsonlSink
+    sink = sink_cls(args.output, checkpoint)
+
+    def remaining_chunks() -> Iterator[List[Dict]]:
+        for index, chunk in enumerate(iter_record_chunks(args.input, args.input_format, args.chunk_size)):
+            if index >= done_chunks:
+                yield chunk
+
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for index, scored in enumerate(_scored_chunks(remaining_chunks(), args.models, workers), start=done_chunks):
+            sink.write(index, scored)
+            rows += len(scored)
+            _save_checkpoint(checkpoint_path, {
+                **run,
+                'chunks': index + 1,
+                'rows': done_rows + rows,
+                'output_bytes': sink.position()
+            })
+            elapsed = time.perf_counter() - start
+            print(f"chunk {index + 1}: {done_rows + rows} rows, "
+                  f"{rows / elapsed if elapsed else 0:.0f} rows/s", file=sys.stderr)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} rows in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:.0f} rows/s) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
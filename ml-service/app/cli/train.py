@@ -0,0 +1,92 @@
+"""
+Train the emotion, abandonment and fraud models offline and publish them as
+versioned artifacts under ``trained_models/artifacts/<model>/<version>/``.
+
+Input is a labelled JSONL or Parquet file of request-shaped records (the
+same features the predict endpoints accept) plus a label column: emotion
+names or indices for ``emotion``, 0/1 for ``abandonment`` and ``fraud``.
+A model whose data and parameters are unchanged is not retrained.
+
+``--seed`` publishes the bootstrap models built from the built-in sample
+rows, so a fresh checkout can serve before real data exists.
+
+Usage:
+    python -m app.cli.train emotion --data labelled.jsonl [--label label]
+                            [--estimator hgb|rf|gbm] [--param max_iter=300]
+                            [--holdout 0.1] [--force] [--no-activate]
+    python -m app.cli.train --seed
+"""
+import argparse
+import json
+import sys
+
+from app.services.model_registry import REGISTRY_MODELS, ModelRegistry
+from app.services.training import DEFAULT_PARAMS, ESTIMATORS, train_from_file, train_seed
+
+
+def _parse_params(pairs):
+    params = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+    return params
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train and publish model artifacts")
+    parser.add_argument('models', nargs='*', metavar='model',
+                        help=f"Models to train: {', '.join(REGISTRY_MODELS)} (default: all)")
+    parser.add_argument('--data', help="Labelled JSONL or Parquet file")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'])
+    parser.add_argument('--label', default='label', help="Label column")
+    parser.add_argument('--estimator', choices=list(ESTIMATORS), default='hgb')
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="Estimator parameter overriding the defaults")
+    parser.add_argument('--holdout', type=float, default=0.1, help="Fraction held out for metrics")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--seed', action='store_true', help="Publish the bootstrap seed models")
+    parser.add_argument('--force', action='store_true', help="Retrain even if the data is unchanged")
+    parser.add_argument('--no-activate', action='store_true', help="Publish without making it current")
+    parser.add_argument('--artifact-dir', help="Registry root (default: MODEL_ARTIFACT_DIR)")
+    args = parser.parse_args(argv)
+
+    if not args.seed and not args.data:
+        parser.error("either --data or --seed is required")
+    unknown = [name for name in args.models if name not in REGISTRY_MODELS]
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    registry = ModelRegistry(args.artifact_dir)
+    options = {'registry': registry, 'force': args.force, 'activate': not args.no_activate}
+    params = {**DEFAULT_PARAMS[args.estimator], **_parse_params(args.param)}
+
+    for name in args.models or REGISTRY_MODELS:
+        try:
+            if args.seed:
+                result = train_seed(name, **options)
+            else:
+                result = train_from_file(
+                    name, args.data, label_column=args.label, fmt=args.format,
+                    chunk_size=args.chunk_size, estimator=args.estimator, params=params,
+                    holdout=args.holdout, **options
+                )
+        except ValueError as e:
+            print(f"[{name}] failed: {e}")
+            return 1
+
+        if result['skipped']:
+            print(f"[{name}] unchanged data and parameters; reusing version {result['version']}")
+            continue
+        manifest = registry.manifest(name, result['version'])
+        print(f"[{name}] published version {result['version']} "
+              f"({manifest['data']['rows']} rows, metrics={manifest['metrics']})")
+        if 'onnx' in result:
+            print(f"[{name}]   onnx export: {result['onnx'] or 'failed'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,29 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 import logging
+import math
 
-from app.api.routes import router
+# Load environment variables first: every setting below, and the routes'
+# singletons, read them through Config
+load_dotenv()
+
+from app.utils.config import Config  # noqa: E402
+from app.utils.log_pipeline import logging_stats, payload_digest, setup_logging, truncate  # noqa: E402
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging before the routes load models: records go through a queue to a writer thread
+setup_logging(**Config.get_config()["logging"])
 logger = logging.getLogger(__name__)
 
+from app.api.admission import AdmissionMiddleware  # noqa: E402
+from app.api.deadlines import DeadlineMiddleware  # noqa: E402
+from app.api.routes import admission_controller, router  # noqa: E402
 
-# Load environment variables
-load_dotenv()
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,20 +32,29 @@ app = FastAPI(
     version="1.0.0"
 )
 
+async def _log_validation_error(request: Request, errors: list) -> None:
+    """Rate-limited warning with a bounded digest of the errors and request body"""
+    try:
+        body = payload_digest(await request.body())
+    except Exception as e:
+        body = f"unavailable: {e!r}"
+    logger.warning(
+        "Validation error for request to %s", request.url.path,
+        extra={
+            "error_count": len(errors),
+            "errors": truncate([{k: e.get(k) for k in ("type", "loc", "msg")} for e in errors[:5]]),
+            "body": body
+        }
+    )
+
+
 @app.exception_handler(ValidationError)
 async def validation_exception_handler(request: Request, exc: ValidationError):
     """
     Custom exception handler for Pydantic ValidationErrors to log details.
     """
     error_details = exc.errors()
-    logger.error(f"Validation error for request to {request.url}:")
-    logger.error(error_details)
-    # Also log the request body if available
-    try:
-        body = await request.json()
-        logger.error(f"Request body: {body}")
-    except Exception as e:
-        logger.error(f"Could not log request body: {e}")
+    await _log_validation_error(request, error_details)
 
     return JSONResponse(
         status_code=422,
@@ -44,6 +62,27 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
     )
 
 
+@app.exception_handler(RequestValidationError)
+async def request_validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    422 for invalid request bodies. Rejected NaN/inf inputs are echoed as
+    strings, since strict JSON cannot carry them.
+    """
+    await _log_validation_error(request, exc.errors())
+    errors = jsonable_encoder(exc.errors())
+    for error in errors:
+        value = error.get('input')
+        if isinstance(value, float) and not math.isfinite(value):
+            error['input'] = str(value)
+    return JSONResponse(status_code=422, content={"detail": errors})
+
+
+# Caller deadlines for the request's call stack; inside admission so shed requests skip it
+app.add_middleware(DeadlineMiddleware, default_timeout_ms=Config.get_config()["deadline"]["default_timeout_ms"])
+
+# Load shedding by priority class; inside CORS so 503s carry CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -76,7 +115,8 @@ async def health():
             "abandonment_prediction": "ready",
             "persona_clustering": "ready",
             "fraud_detection": "ready"
-        }
+        },
+        "logging": logging_stats()
     }
 
 if __name__ == "__main__":
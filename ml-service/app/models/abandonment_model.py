@@ -1,13 +1,68 @@
 # ml-service/models/abandonment_model.py
 import numpy as np
-from sklearn.ensemble import GradientBoostingClassifier
-from typing import Dict
+from typing import Dict, List, Optional
 import joblib
-import os
+import logging
+import random
+
+from app.models.onnx_backend import load_onnx_classifier
+from app.schemas import AbandonmentFeatures
+from app.services.model_registry import resolve_model_path, resolve_model_version
+from app.services.prediction_cache import create_prediction_cache
+from app.utils.config import Config
+from app.utils.deadline import has_time, mark_degraded
+from app.utils.feature_vectors import FeatureExtractor
+
+logger = logging.getLogger(__name__)
+
+# Sampling ranges used to distil the cascade's first stage from the GBM
+FEATURE_RANGES = [
+    (0, 1200),    # time_in_cart
+    (0, 100),     # scroll_percentage
+    (0, 10),      # price_checks
+    (0, 6),       # comparisons
+    (0, 5),       # previous_abandons
+    (0.1, 0.9),   # emotion_score
+    (0.3, 0.8),   # device_score
+    (0.5, 1.0),   # time_of_day_score
+    (0, 1)        # cart_value_score
+]
+
+# Encoded risk of the visitor's current emotion and device
+EMOTION_SCORES = {
+    'frustrated': 0.9,
+    'confused': 0.7,
+    'considering': 0.5,
+    'neutral': 0.3,
+    'excited': 0.1
+}
+DEVICE_SCORES = {'mobile': 0.3, 'tablet': 0.5, 'desktop': 0.8}
+
+def time_of_day_score(hours: np.ndarray) -> np.ndarray:
+    """Higher at night = higher risk"""
+    return np.where((hours >= 22) | (hours <= 6), 1.0, 0.5)
+
+def cart_value_score(values: np.ndarray) -> np.ndarray:
+    """Higher value = lower risk"""
+    return np.minimum(values / 5000, 1.0)
+
+# Prediction cache quantization per encoded feature (0 = exact)
+CACHE_STEPS = {
+    'time_in_cart': 5,
+    'scroll_percentage': 1,
+    'cart_value_score': 0.01
+}
+
+# AbandonmentFeatures fields in model order; raw values are encoded per column
+FEATURE_EXTRACTOR = FeatureExtractor(
+    ['time_in_cart', 'scroll_percentage', 'price_checks', 'comparisons', 'previous_abandons',
+     'emotion', 'device', 'time_of_day', 'cart_value'],
+    categories={'emotion': EMOTION_SCORES, 'device': DEVICE_SCORES},
+    transforms={'time_of_day': time_of_day_score, 'cart_value': cart_value_score}
+)
 
 class AbandonmentPredictor:
-    def __init__(self):
-        self.model = None
+    def __init__(self, model_path: Optional[str] = None):
         self.feature_names = [
             'time_in_cart',
             'scroll_percentage',
@@ -20,97 +75,173 @@ class AbandonmentPredictor:
             'cart_value_score'
         ]
         
-        model_path = 'trained_models/abandonment_model.pkl'
-        if os.path.exists(model_path):
-            self.model = joblib.load(model_path)
+        explicit_model = model_path is not None
+        # Runtime serving the model, reported next to its registry version
+        self.backend = 'sklearn'
+        if explicit_model:
+            # Explicit artifact (e.g. a per-tenant model); never trained here
+            model = joblib.load(model_path)
+            self.model_version = None
         else:
-            self.model = self._create_model()
-    
-    def _create_model(self):
-        """Create Gradient Boosting model"""
-        model = GradientBoostingClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
-        
-        # Sample training data
-        X_train = np.array([
-            [300, 45, 5, 3, 2, 0.7, 0.5, 0.8, 0.6],  # High risk
-            [120, 80, 2, 1, 0, 0.3, 0.8, 0.5, 0.9],  # Low risk
-            [600, 30, 8, 5, 3, 0.9, 0.3, 0.9, 0.4],  # High risk
-            [180, 70, 3, 2, 1, 0.4, 0.7, 0.6, 0.8],  # Medium risk
-            [450, 40, 6, 4, 2, 0.8, 0.4, 0.7, 0.5]   # High risk
-        ])
-        y_train = np.array([1, 0, 1, 0, 1])  # 1=abandon, 0=convert
-        
-        model.fit(X_train, y_train)
-        
-        os.makedirs('trained_models', exist_ok=True)
-        joblib.dump(model, 'trained_models/abandonment_model.pkl')
-        
-        return model
-    
-    def predict(self, features: Dict) -> Dict:
-        """Predict cart abandonment probability"""
-        # Encode emotion
-        emotion_map = {
-            'frustrated': 0.9,
-            'confused': 0.7,
-            'considering': 0.5,
-            'neutral': 0.3,
-            'excited': 0.1
+            self.model_version = resolve_model_version('abandonment')
+            model = load_onnx_classifier('abandonment', self.model_version)
+            if model is not None:
+                self.backend = 'onnx'
+        if model is None:
+            model_path = resolve_model_path('abandonment')
+            if model_path is None:
+                raise FileNotFoundError("No abandonment model artifact; run `python -m app.cli.train abandonment`")
+            model = joblib.load(model_path)
+
+        # Cascade: a linear first stage answers confident carts, the GBM the rest
+        self.cascade = Config.get_config()['cascade']
+        stage1 = None
+        # The distilled stage approximates the global GBM only
+        if self.cascade['enabled'] and not explicit_model:
+            stage1_path = resolve_model_path('abandonment', 'stage1.pkl')
+            if stage1_path is not None:
+                stage1 = joblib.load(stage1_path)
+            else:
+                logger.warning("Abandonment cascade enabled but no stage1 artifact; "
+                               "run `python -m app.cli.train abandonment`")
+        # The GBM and the stage distilled from it are swapped as one pair
+        self._active = (model, stage1)
+        # Optional LRU of probabilities by quantized feature vector
+        self.cache = create_prediction_cache('abandonment', self.feature_names, CACHE_STEPS)
+        self.cascade_stats = {
+            'requests': 0,
+            'shortcuts': 0,
+            'shadow_checks': 0,
+            'shadow_agreements': 0
         }
-        emotion_score = emotion_map.get(features.get('emotion', 'neutral'), 0.3)
-        
-        # Encode device
-        device_map = {'mobile': 0.3, 'tablet': 0.5, 'desktop': 0.8}
-        device_score = device_map.get(features.get('device', 'desktop'), 0.5)
-        
-        # Time of day score (higher at night = higher risk)
-        time_of_day = features.get('time_of_day', 12)
-        time_score = 1.0 if time_of_day >= 22 or time_of_day <= 6 else 0.5
-        
-        # Cart value score (higher value = lower risk)
-        cart_value = features.get('cart_value', 1000)
-        cart_score = min(cart_value / 5000, 1.0)
-        
-        feature_values = [
-            features.get('time_in_cart', 0),
-            features.get('scroll_percentage', 50),
-            features.get('price_checks', 0),
-            features.get('comparisons', 0),
-            features.get('previous_abandons', 0),
-            emotion_score,
-            device_score,
-            time_score,
-            cart_score
-        ]
-        
-        X = np.array([feature_values])
-        
-        probability = float(self.model.predict_proba(X)[0][1])
-        
-        # Determine risk level
+    
+    @property
+    def model(self):
+        return self._active[0]
+
+    @property
+    def stage1(self) -> Optional[Dict]:
+        return self._active[1]
+
+    def swap_model(self, model, version: Optional[str], stage1: Optional[Dict] = None,
+                   backend: str = 'sklearn') -> None:
+        """Replace the served model and first stage; running calls finish on the old pair"""
+        if not self.cascade['enabled']:
+            stage1 = None
+        self._active = (model, stage1)
+        self.model_version = version
+        self.backend = backend
+        if self.cache is not None:
+            self.cache.clear()
+
+    @staticmethod
+    def build_features(features: Dict) -> List[float]:
+        """Validate a request-shaped dict as ``AbandonmentFeatures`` and encode it in model order"""
+        return FEATURE_EXTRACTOR.vector(AbandonmentFeatures.model_validate(features))[0].tolist()
+
+    def _cascade_probability(self, X: np.ndarray, model, stage1: Dict) -> np.ndarray:
+        """First-stage probabilities where confident, NaN where the GBM must answer"""
+        self.cascade_stats['requests'] += len(X)
+        log_odds = np.clip(X @ stage1['coef'] + stage1['intercept'], -50, 50)
+        probabilities = 1 / (1 + np.exp(-log_odds))
+        confident = (probabilities <= self.cascade['low']) | (probabilities >= self.cascade['high'])
+        probabilities[~confident] = np.nan
+
+        shortcuts = np.flatnonzero(confident)
+        self.cascade_stats['shortcuts'] += len(shortcuts)
+        # Shadow-score a sample of shortcuts to track agreement with the GBM
+        shadow = [i for i in shortcuts if random.random() < self.cascade['shadow_rate']]
+        if shadow:
+            full = model.predict_proba(X[shadow])[:, 1]
+            self.cascade_stats['shadow_checks'] += len(shadow)
+            self.cascade_stats['shadow_agreements'] += sum(
+                self._risk_level(float(f)) == self._risk_level(float(probabilities[i]))
+                for i, f in zip(shadow, full)
+            )
+        return probabilities
+
+    def _risk_level(self, probability: float) -> str:
         if probability > 0.7:
-            risk_level = 'high'
+            return 'high'
         elif probability > 0.4:
-            risk_level = 'medium'
+            return 'medium'
         else:
-            risk_level = 'low'
-        
-        # Feature importance (simplified)
-        factors = {
-            'time_factor': feature_values[0] / 600,  # Normalize
-            'engagement_factor': 1 - (feature_values[1] / 100),
-            'comparison_factor': min(feature_values[3] / 5, 1),
-            'emotion_factor': emotion_score,
-            'history_factor': min(feature_values[4] / 5, 1)
+            return 'low'
+
+    def get_cascade_stats(self) -> Dict:
+        """Shortcut rate and first-stage/GBM agreement"""
+        stats = self.cascade_stats
+        return {
+            'enabled': self.stage1 is not None,
+            'low_threshold': self.cascade['low'],
+            'high_threshold': self.cascade['high'],
+            **stats,
+            'shortcut_rate': stats['shortcuts'] / stats['requests'] if stats['requests'] else 0.0,
+            'agreement_rate': stats['shadow_agreements'] / stats['shadow_checks'] if stats['shadow_checks'] else None
         }
-        
+    
+    def predict(self, features: Dict) -> Dict:
+        """Predict cart abandonment probability"""
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, features_list: List[Dict]) -> List[Dict]:
+        """Predict abandonment for many carts; only ambiguous rows reach the GBM"""
+        if not features_list:
+            return []
+        return self.predict_validated([AbandonmentFeatures.model_validate(f) for f in features_list])
+
+    def predict_validated(self, items: List) -> List[Dict]:
+        """Predict for validated ``AbandonmentFeatures`` without going through dicts"""
+        return self.predict_encoded(FEATURE_EXTRACTOR.matrix(items))
+
+    def predict_encoded(self, X: np.ndarray) -> List[Dict]:
+        """Per-row responses for an encoded matrix in ``feature_names`` order"""
+        scored = self.predict_matrix(X)
+        # The factors are optional; dropped once the request deadline has passed
+        explain = has_time()
+        if not explain:
+            mark_degraded("abandonment.factors")
+
+        results = []
+        for feature_values, probability, risk_level in zip(X.tolist(), scored['probability'], scored['risk_level']):
+            # Feature importance (simplified)
+            factors = {
+                'time_factor': feature_values[0] / 600,  # Normalize
+                'engagement_factor': 1 - (feature_values[1] / 100),
+                'comparison_factor': min(feature_values[3] / 5, 1),
+                'emotion_factor': feature_values[5],
+                'history_factor': min(feature_values[4] / 5, 1)
+            } if explain else {}
+
+            results.append({
+                'probability': float(probability),
+                'risk_level': risk_level,
+                'factors': factors
+            })
+        return results
+
+    def predict_matrix(self, X: np.ndarray) -> Dict:
+        """Columnar predictions for an encoded matrix in ``feature_names`` order"""
+        # A hot reload may swap the models; this call keeps the pair it started with
+        model, stage1 = self._active
+        if self.cache is not None:
+            probabilities = self.cache.scores(X, model, lambda rows: self._probabilities(rows, model, stage1))
+        else:
+            probabilities = self._probabilities(X, model, stage1)
+
         return {
-            'probability': probability,
-            'risk_level': risk_level,
-            'factors': factors
+            'probability': probabilities,
+            'risk_level': [self._risk_level(p) for p in probabilities.tolist()]
         }
+
+    def _probabilities(self, X: np.ndarray, model, stage1: Optional[Dict]) -> np.ndarray:
+        """Cascade first where enabled; only ambiguous rows reach the GBM"""
+        if stage1 is not None:
+            probabilities = self._cascade_probability(X, model, stage1)
+            pending = np.flatnonzero(np.isnan(probabilities))
+        else:
+            probabilities = np.empty(len(X))
+            pending = np.arange(len(X))
+        if len(pending):
+            probabilities[pending] = model.predict_proba(X[pending])[:, 1]
+        return probabilities
@@ -1,10 +1,121 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+
 import numpy as np
 import pandas as pd
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
 from sklearn.feature_selection import VarianceThreshold
-from typing import List, Dict, Any
+from threadpoolctl import threadpool_limits
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+from app.models.coreset import assign_nearest, build_lightweight_coreset, uniform_sample
+from app.models.sharded_kmeans import ShardedKMeans, ShardedKMeansPool
+from app.utils.config import Config
+from app.utils.deadline import has_time, mark_degraded, time_remaining
+from app.utils.interning import EncodedSessions, Vocabulary, most_common
+
+# Share of the caller's remaining time a parallel k-search may use; the rest
+# is left for the final fit and cluster analysis
+K_SEARCH_DEADLINE_SHARE = 0.8
+
+# Session columns kept in the DataFrame; pages and devices are encoded separately
+SESSION_COLUMNS = ['id', 'intentScore', 'avgScrollDepth', 'totalClicks', 'pageViews', 'totalTimeSpent']
+
+# Per-process state for parallel k-search workers
+_worker_X = None
+_worker_thread_limits = None
+
+
+def _init_k_search_worker(X: np.ndarray, blas_threads: int) -> None:
+    """Receive the matrix once per worker and cap its BLAS/OpenMP threads"""
+    global _worker_X, _worker_thread_limits
+    _worker_X = X
+    _worker_thread_limits = threadpool_limits(limits=blas_threads)
+
+
+def _evaluate_k(k: int, X: Optional[np.ndarray] = None) -> Tuple[int, Optional[float]]:
+    """Fit KMeans for one k and return its silhouette score (None if unusable)"""
+    X = _worker_X if X is None else X
+    try:
+        kmeans = KMeans(n_clusters=k, random_state=42, n_init='auto')
+        labels = kmeans.fit_predict(X)
+
+        # Silhouette score requires at least 2 clusters and samples
+        if len(np.unique(labels)) > 1:
+            return k, float(silhouette_score(X, labels))
+    except ValueError:
+        # This can happen in edge cases, e.g., with degenerate data.
+        pass
+    return k, None
+
+def _add_counts(total: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Add a count matrix whose vocabulary may have grown since ``total`` was sized"""
+    if counts.shape[1] > total.shape[1]:
+        total = np.pad(total, ((0, 0), (0, counts.shape[1] - total.shape[1])))
+    total[:, :counts.shape[1]] += counts
+    return total
+
+
+class ClusterStatsAccumulator:
+    """
+    Running per-cluster sums, page and device histograms (over interned ids)
+    and session ids, fed one chunk of sessions at a time. Chunks are encoded
+    against the accumulator's vocabularies unless passed already encoded
+    with them.
+    """
+
+    def __init__(self, n_clusters: int, pages: Optional[Vocabulary] = None,
+                 devices: Optional[Vocabulary] = None):
+        self.counts = np.zeros(n_clusters, dtype=np.int64)
+        self.sums = np.zeros((n_clusters, 4))  # time spent, scroll depth, click rate, page views
+        self.pages = pages if pages is not None else Vocabulary()
+        self.devices = devices if devices is not None else Vocabulary()
+        self.page_counts = np.zeros((n_clusters, 0), dtype=np.int64)
+        self.device_counts = np.zeros((n_clusters, 0), dtype=np.int64)
+        self.session_ids: List[List[str]] = [[] for _ in range(n_clusters)]
+
+    def add(self, df: pd.DataFrame, labels: np.ndarray, encoded: Optional[EncodedSessions] = None) -> None:
+        values = np.column_stack([
+            df['totalTimeSpent'].to_numpy(dtype=np.float64),
+            df['avgScrollDepth'].to_numpy(dtype=np.float64),
+            (df['totalClicks'] / df['pageViews'].replace(0, 1)).to_numpy(dtype=np.float64),
+            df['pageViews'].to_numpy(dtype=np.float64)
+        ])
+        n_clusters = len(self.counts)
+        labels = np.asarray(labels, dtype=np.int64)
+        chunk_counts = np.bincount(labels, minlength=n_clusters)
+        self.counts += chunk_counts
+        for column in range(values.shape[1]):
+            self.sums[:, column] += np.bincount(labels, weights=values[:, column], minlength=n_clusters)
+
+        if encoded is None:
+            encoded = EncodedSessions.encode(df['pagesVisited'], df['device'], self.pages, self.devices)
+        self.page_counts = _add_counts(self.page_counts, encoded.page_histograms(labels, n_clusters))
+        self.device_counts = _add_counts(self.device_counts, encoded.device_histograms(labels, n_clusters))
+
+        # Group ids by cluster in one stable sort, keeping input order within each
+        ids = df.index.to_numpy()[np.argsort(labels, kind='stable')]
+        for cluster_id, group in enumerate(np.split(ids, np.cumsum(chunk_counts)[:-1])):
+            self.session_ids[cluster_id].extend(group.tolist())
+
+    def metrics(self, cluster_id: int) -> Optional[Dict[str, Any]]:
+        count = self.counts[cluster_id]
+        if count == 0:
+            return None
+        means = self.sums[cluster_id] / count
+        return {
+            "avg_time_spent": means[0],
+            "avg_scroll_depth": means[1],
+            "avg_click_rate": means[2],
+            "avg_page_views": means[3],
+            "common_pages": self.pages.values(most_common(self.page_counts[cluster_id], 5)),
+            "common_devices": self.devices.values(most_common(self.device_counts[cluster_id], 3))
+        }
+
 
 class UserClustering:
     """
@@ -12,7 +123,10 @@ class UserClustering:
     Handles data quality issues and prevents crashes.
     """
     
-    def __init__(self, min_clusters=3, max_clusters=6):
+    def __init__(self, min_clusters=3, max_clusters=6,
+                 progress_callback: Optional[Callable[[float, str], None]] = None,
+                 n_jobs: Optional[int] = None,
+                 mode: Optional[str] = None):
         if not isinstance(min_clusters, int) or not isinstance(max_clusters, int) or min_clusters <= 0 or max_clusters < min_clusters:
             raise ValueError("min_clusters and max_clusters must be positive integers, and max_clusters must be >= min_clusters.")
         self.min_clusters = min_clusters
@@ -20,6 +134,22 @@ class UserClustering:
         self.scaler = StandardScaler()
         self.model = None
         self.optimal_k = None
+        # Called as progress_callback(fraction, stage); may raise to abort the run
+        self.progress_callback = progress_callback
+        settings = Config.get_config()["ml"]
+        # Worker processes for the k-search; 0 means one per CPU core
+        self.n_jobs = settings["clustering_n_jobs"] if n_jobs is None else n_jobs
+        self.blas_threads = settings["clustering_blas_threads"]
+        self.parallel_min_samples = settings["clustering_parallel_min_samples"]
+        # "full", "coreset", "sharded", or "auto" (coreset once the input reaches the threshold)
+        self.mode = mode or settings["clustering_mode"]
+        self.sharded_workers = settings["sharded_workers"]
+        self.coreset_threshold = settings["coreset_threshold"]
+        self.coreset_size = settings["coreset_size"]
+        self.coreset_eval_size = settings["coreset_eval_size"]
+        self.coreset_reference_fit = settings["coreset_reference_fit"]
+        # Populated by coreset fits: how the summary compares to the full data
+        self.quality_report: Optional[Dict[str, Any]] = None
         # Define feature names for clarity and consistency
         self.feature_names = [
             'intentScore', 'avgScrollDepth', 'clickRate', 
@@ -33,30 +163,99 @@ class UserClustering:
         if not data:
             raise ValueError("Input data cannot be empty.")
 
-        df = pd.DataFrame(data).set_index('id')
+        # Pages and device types become integer ids once, outside the DataFrame
+        encoded = EncodedSessions.encode((s.get('pagesVisited') for s in data), (s.get('device') for s in data))
+        df = pd.DataFrame.from_records(data, columns=SESSION_COLUMNS).set_index('id')
         
         # 1. Feature Engineering
-        features_df = self._extract_features(df)
+        features_df = self._extract_features(df, encoded.page_counts())
+        self._report(0.1, "features extracted")
         
         # 2. Filter out sessions with no meaningful behavioral data
-        behavioral_cols = ['avgScrollDepth', 'totalClicks', 'totalTimeSpent', 'pageViews']
-        original_indices = features_df.index
-        # Keep rows where at least one behavioral column is non-zero
-        active_features_df = features_df[features_df[behavioral_cols].any(axis=1)]
+        active = self._active_mask(features_df).to_numpy()
+        active_features_df = features_df[active]
 
         if active_features_df.empty:
             raise ValueError("No active user sessions found. All sessions have zero engagement.")
 
         # Map back to original session data for analysis later
-        active_df = df.loc[active_features_df.index]
+        active_df = df[active]
         X_raw = active_features_df[self.feature_names].values
 
+        labels = self._cluster_matrix(X_raw)
+        
+        # 7. Analyze clusters
+        self._report(0.9, "analyzing clusters")
+        return self._analyze_clusters(active_df, labels, encoded.take(active))
+
+    def fit_predict_stream(self, open_chunks: Callable[[], Iterator[pd.DataFrame]]) -> Dict[int, Dict]:
+        """
+        Out-of-core variant of ``fit_predict``.
+
+        ``open_chunks`` returns a fresh iterator of session DataFrames (indexed
+        by session id) on every call. The input is read twice: once to build
+        the feature matrix and once to accumulate per-cluster statistics, so
+        only one chunk of raw sessions is in memory at a time.
+        """
+        X_parts = []
+        n_sessions = 0
+        for chunk in open_chunks():
+            n_sessions += len(chunk)
+            features_df = self._extract_features(chunk, self._page_counts(chunk))
+            X_parts.append(features_df[self._active_mask(features_df)][self.feature_names].to_numpy(dtype=np.float64))
+
+        if n_sessions == 0:
+            raise ValueError("Input data cannot be empty.")
+        X_raw = np.vstack(X_parts)
+        del X_parts
+        if X_raw.shape[0] == 0:
+            raise ValueError("No active user sessions found. All sessions have zero engagement.")
+        self._report(0.1, "features extracted")
+
+        labels = self._cluster_matrix(X_raw)
+        del X_raw
+
+        self._report(0.9, "analyzing clusters")
+        # One vocabulary across chunks, so page and device ids stay comparable
+        accumulator = ClusterStatsAccumulator(self.optimal_k)
+        offset = 0
+        for chunk in open_chunks():
+            active = chunk[self._active_mask(self._extract_features(chunk, self._page_counts(chunk))).to_numpy()]
+            accumulator.add(active, labels[offset:offset + len(active)])
+            offset += len(active)
+        return self._clusters_from(accumulator)
+
+    @staticmethod
+    def _page_counts(chunk: pd.DataFrame) -> np.ndarray:
+        """Pages visited per session of a reader chunk (its ``pagesVisited`` are lists)"""
+        return np.fromiter((len(pages) for pages in chunk['pagesVisited']), dtype=np.int64, count=len(chunk))
+
+    def _clusters_from(self, accumulator: ClusterStatsAccumulator) -> Dict[int, Dict]:
+        """Persona information for every non-empty cluster"""
+        clusters = {}
+        for cluster_id in range(self.optimal_k):
+            metrics = accumulator.metrics(cluster_id)
+            if metrics is not None:
+                clusters[cluster_id] = self._build_cluster(
+                    metrics, accumulator.counts[cluster_id], accumulator.session_ids[cluster_id]
+                )
+        return clusters
+
+    def _active_mask(self, features_df: pd.DataFrame) -> pd.Series:
+        """Sessions where at least one behavioral column is non-zero"""
+        behavioral_cols = ['avgScrollDepth', 'totalClicks', 'totalTimeSpent', 'pageViews']
+        return features_df[behavioral_cols].fillna(0).any(axis=1)
+
+    def _cluster_matrix(self, X_raw: np.ndarray) -> np.ndarray:
+        """
+        Preprocess the raw feature matrix, pick k and return one label per row.
+        Sets ``optimal_k``.
+        """
         # 3. Validate data quantity for clustering
         if X_raw.shape[0] < self.min_clusters:
             # Not enough data for meaningful clustering, fallback to a single cluster
-            labels = np.zeros(X_raw.shape[0], dtype=int)
             self.optimal_k = 1
-            return self._analyze_clusters(active_df, labels)
+            return np.zeros(X_raw.shape[0], dtype=int)
 
         # 4. Preprocessing Pipeline
         # Remove features with zero variance (e.g., if all users have 0 page views)
@@ -69,32 +268,40 @@ class UserClustering:
 
         if X_high_variance.shape[1] == 0:
             # All features had zero variance, treat as a single cluster
-            labels = np.zeros(X_raw.shape[0], dtype=int)
             self.optimal_k = 1
-            return self._analyze_clusters(active_df, labels)
+            return np.zeros(X_raw.shape[0], dtype=int)
             
         # Scale features
         X_scaled = self.scaler.fit_transform(X_high_variance)
         
         # Final check: if all scaled data points are identical, clustering is pointless
         if np.all(X_scaled == X_scaled[0, :]):
-            labels = np.zeros(X_raw.shape[0], dtype=int)
             self.optimal_k = 1
-            return self._analyze_clusters(active_df, labels)
+            return np.zeros(X_raw.shape[0], dtype=int)
+
+        # 5-6. Large inputs: select and fit on a weighted coreset instead
+        if self.mode == "coreset" or (self.mode == "auto" and X_scaled.shape[0] >= self.coreset_threshold):
+            return self._fit_coreset(X_scaled)
+        if self.mode == "sharded":
+            return self._fit_sharded(X_scaled)
 
         # 5. Find optimal number of clusters
+        self._report(0.2, "searching for optimal cluster count")
         self.optimal_k = self._find_optimal_clusters(X_scaled)
         
         # 6. Fit final model
+        self._report(0.8, f"fitting final model with k={self.optimal_k}")
         self.model = KMeans(n_clusters=self.optimal_k, random_state=42, n_init='auto')
-        labels = self.model.fit_predict(X_scaled)
-        
-        # 7. Analyze clusters
-        return self._analyze_clusters(active_df, labels)
+        return self.model.fit_predict(X_scaled)
+
+    def _report(self, progress: float, stage: str) -> None:
+        if self.progress_callback:
+            self.progress_callback(progress, stage)
 
-    def _extract_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _extract_features(self, df: pd.DataFrame, page_counts: np.ndarray) -> pd.DataFrame:
         """
-        Extract relevant features and return a new DataFrame.
+        Extract relevant features and return a new DataFrame. ``page_counts``
+        is the number of pages each session visited.
         """
         features_df = pd.DataFrame(index=df.index)
         features_df['intentScore'] = df['intentScore'].fillna(0)
@@ -103,7 +310,7 @@ class UserClustering:
         features_df['clickRate'] = (df['totalClicks'].fillna(0) / df['pageViews'].replace(0, 1).fillna(1))
         features_df['totalTimeSpent_minutes'] = df['totalTimeSpent'].fillna(0) / 60
         features_df['pageViews'] = df['pageViews'].fillna(0)
-        features_df['pagesVisited_count'] = df['pagesVisited'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+        features_df['pagesVisited_count'] = page_counts
         
         # Also copy over original columns needed for filtering and analysis
         features_df['totalClicks'] = df['totalClicks']
@@ -114,101 +321,235 @@ class UserClustering:
     def _find_optimal_clusters(self, X: np.ndarray) -> int:
         """
         Find optimal number of clusters using silhouette score, with safeguards.
+        Under a request deadline the search stops early and returns the best k
+        so far (the smallest candidate if none was evaluated).
         """
-        # The number of clusters cannot exceed the number of samples
         n_samples = X.shape[0]
+        k_range = self._candidate_k_range(n_samples)
+
+        if not k_range:
+            return 1
+
+        n_workers = min(self.n_jobs or os.cpu_count() or 1, len(k_range))
+        if n_workers > 1 and n_samples >= self.parallel_min_samples:
+            scores = self._score_k_range_parallel(X, k_range, n_workers)
+        else:
+            scores = {}
+            last_fit = None
+            for i, k in enumerate(k_range):
+                if not self._k_search_has_time(last_fit):
+                    break
+                self._report(0.2 + 0.6 * i / len(k_range), f"evaluating k={k}")
+                start = time.perf_counter()
+                scores[k] = _evaluate_k(k, X)[1]
+                last_fit = time.perf_counter() - start
+
+        # Select in k order so the result does not depend on completion order
+        best_score = -1
+        best_k = k_range.start
+        for k in k_range:
+            score = scores.get(k)
+            if score is not None and score > best_score:
+                best_score = score
+                best_k = k
+        
+        return best_k
+
+    def _k_search_has_time(self, last_fit: Optional[float]) -> bool:
+        """
+        Whether the request deadline leaves room for another candidate: about
+        twice the last one (it plus the final fit). Records the degradation
+        when it does not.
+        """
+        if has_time(0.0 if last_fit is None else 2 * last_fit):
+            return True
+        mark_degraded("clustering.k_search")
+        return False
+
+    def _candidate_k_range(self, n_samples: int) -> range:
+        """Candidate cluster counts for the silhouette search"""
         # At least 2 clusters are needed for silhouette score
         if n_samples < 2:
-            return 1
+            return range(0)
 
+        # The number of clusters cannot exceed the number of samples
         max_k = min(self.max_clusters + 1, n_samples)
         min_k = min(self.min_clusters, max_k -1)
         
         if min_k < 2:
              min_k = 2
         
-        k_range = range(min_k, max_k)
+        return range(min_k, max_k)
 
-        if not k_range:
-            return 1
+    def _fit_coreset(self, X: np.ndarray) -> np.ndarray:
+        """
+        Run model selection and fitting on a lightweight coreset of ``X``, then
+        label every row with one chunked nearest-centroid pass.
+        """
+        self._report(0.2, "building coreset")
+        C, weights = build_lightweight_coreset(X, self.coreset_size)
 
+        # Silhouette is quadratic, so candidates are compared on a uniform sample
+        eval_idx = uniform_sample(X.shape[0], self.coreset_eval_size)
+        X_eval = X if eval_idx is None else X[eval_idx]
+
+        k_range = self._candidate_k_range(C.shape[0])
         best_score = -1
-        best_k = min_k
-        
-        for k in k_range:
+        best_model = None
+        last_fit = None
+        for i, k in enumerate(k_range):
+            if not self._k_search_has_time(last_fit):
+                break
+            self._report(0.2 + 0.6 * i / len(k_range), f"evaluating k={k} on coreset")
+            start = time.perf_counter()
             try:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init='auto')
-                labels = kmeans.fit_predict(X)
-                
-                # Silhouette score requires at least 2 clusters and samples
-                if len(np.unique(labels)) > 1:
-                    score = silhouette_score(X, labels)
+                model = KMeans(n_clusters=k, random_state=42, n_init='auto').fit(C, sample_weight=weights)
+                eval_labels = model.predict(X_eval)
+                if len(np.unique(eval_labels)) > 1:
+                    score = silhouette_score(X_eval, eval_labels)
                     if score > best_score:
-                        best_score = score
-                        best_k = k
+                        best_score, best_model = score, model
             except ValueError:
-                # This can happen in edge cases, e.g., with degenerate data.
                 continue
-        
-        return best_k
+            finally:
+                last_fit = time.perf_counter() - start
+
+        if best_model is None:
+            best_model = KMeans(n_clusters=max(k_range.start, 1), random_state=42, n_init='auto').fit(C, sample_weight=weights)
+
+        self.model = best_model
+        self.optimal_k = best_model.n_clusters
+        self._report(0.8, f"labelling sessions with k={self.optimal_k}")
+        labels, full_inertia = assign_nearest(X, best_model.cluster_centers_)
 
-    def _analyze_clusters(self, df: pd.DataFrame, labels: np.ndarray) -> Dict[int, Dict]:
+        # The weighted coreset cost is an unbiased estimate of the full-data cost
+        estimated_inertia = float(best_model.inertia_)
+        self.quality_report = {
+            "mode": "coreset",
+            "sessions": int(X.shape[0]),
+            "coresetSize": int(C.shape[0]),
+            "k": int(self.optimal_k),
+            "silhouetteSample": float(best_score),
+            "estimatedInertia": estimated_inertia,
+            "fullInertia": full_inertia,
+            "inertiaEstimateError": abs(estimated_inertia - full_inertia) / full_inertia if full_inertia else 0.0
+        }
+
+        if self.coreset_reference_fit:
+            # Opt-in validation: the full fit this mode avoids, for comparison
+            reference = KMeans(n_clusters=self.optimal_k, random_state=42, n_init='auto').fit(X)
+            reference_score = silhouette_score(X_eval, reference.predict(X_eval)) \
+                if len(np.unique(reference.labels_)) > 1 else -1
+            self.quality_report.update({
+                "referenceInertia": float(reference.inertia_),
+                "inertiaGap": (full_inertia - reference.inertia_) / reference.inertia_ if reference.inertia_ else 0.0,
+                "referenceSilhouetteSample": float(reference_score),
+                "silhouetteGap": float(reference_score - best_score)
+            })
+
+        return labels
+
+    def _fit_sharded(self, X: np.ndarray) -> np.ndarray:
         """
-        Analyze each cluster and generate persona information.
+        Data-parallel fit: every candidate k runs sharded Lloyd iterations over
+        one shared-memory copy of ``X``; candidates are compared by silhouette
+        on a uniform sample.
+        """
+        eval_idx = uniform_sample(X.shape[0], self.coreset_eval_size)
+        k_range = self._candidate_k_range(X.shape[0])
+        best_score = -1
+        best_model = None
+
+        with ShardedKMeansPool(X, self.sharded_workers or None) as pool:
+            last_fit = None
+            for i, k in enumerate(k_range):
+                if not self._k_search_has_time(last_fit):
+                    break
+                self._report(0.2 + 0.7 * i / len(k_range), f"fitting k={k} across {pool.n_workers} workers")
+                start = time.perf_counter()
+                model = ShardedKMeans(n_clusters=k).fit(X, pool)
+                last_fit = time.perf_counter() - start
+                eval_labels = model.labels_ if eval_idx is None else model.labels_[eval_idx]
+                if len(np.unique(eval_labels)) > 1:
+                    score = silhouette_score(X if eval_idx is None else X[eval_idx], eval_labels)
+                    if score > best_score:
+                        best_score, best_model = score, model
+
+            if best_model is None:
+                best_model = ShardedKMeans(n_clusters=max(k_range.start, 1)).fit(X, pool)
+
+        self.model = best_model
+        self.optimal_k = best_model.n_clusters
+        return best_model.labels_
+
+    def _score_k_range_parallel(self, X: np.ndarray, k_range: range, n_workers: int) -> Dict[int, Optional[float]]:
+        """Evaluate candidate k values across a process pool"""
+        # Split the cores between workers so BLAS/OpenMP threads do not oversubscribe
+        blas_threads = self.blas_threads or max(1, (os.cpu_count() or 1) // n_workers)
+        context = multiprocessing.get_context("spawn")
+
+        remaining = time_remaining()
+        timeout = None if remaining is None else max(remaining * K_SEARCH_DEADLINE_SHARE, 0.0)
+
+        scores = {}
+        timed_out = False
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=context,
+            initializer=_init_k_search_worker,
+            initargs=(X, blas_threads)
+        )
+        try:
+            # Largest k first: they take longest, which balances the pool
+            futures = [executor.submit(_evaluate_k, k) for k in sorted(k_range, reverse=True)]
+            try:
+                for done, future in enumerate(as_completed(futures, timeout=timeout), start=1):
+                    k, score = future.result()
+                    scores[k] = score
+                    self._report(0.2 + 0.6 * done / len(k_range), f"evaluated k={k}")
+            except FuturesTimeout:
+                # Deadline: keep the candidates scored so far
+                timed_out = True
+                mark_degraded("clustering.k_search")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        finally:
+            # After a timeout, do not wait for fits still running in the workers
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
+        return scores
+
+    def _analyze_clusters(self, df: pd.DataFrame, labels: np.ndarray, encoded: EncodedSessions) -> Dict[int, Dict]:
+        """
+        Analyze each cluster and generate persona information. ``encoded``
+        holds the pages and devices of the rows of ``df``.
         """
-        df['cluster'] = labels
-        clusters = {}
-        
         # Handle the case of a single cluster fallback
         if self.optimal_k is None:
              self.optimal_k = len(np.unique(labels))
-        
-        for cluster_id in range(self.optimal_k):
-            cluster_data = df[df['cluster'] == cluster_id]
-            
-            if cluster_data.empty:
-                continue
-            
-            # Calculate metrics
-            metrics = {
-                "avg_time_spent": cluster_data['totalTimeSpent'].mean(),
-                "avg_scroll_depth": cluster_data['avgScrollDepth'].mean(),
-                "avg_click_rate": (cluster_data['totalClicks'] / cluster_data['pageViews'].replace(0, 1)).mean(),
-                "avg_page_views": cluster_data['pageViews'].mean(),
-                "common_pages": self._get_common_pages(cluster_data),
-                "common_devices": self._get_common_devices(cluster_data)
-            }
-            
-            # Determine behavior pattern
-            behavior_pattern = self._determine_behavior(metrics)
-            
-            # Generate persona name and description
-            name, description = self._generate_persona_info(metrics, behavior_pattern, is_single_cluster=self.optimal_k == 1)
-            
-            clusters[cluster_id] = {
-                "name": name,
-                "description": description,
-                "metrics": metrics,
-                "behavior_pattern": behavior_pattern,
-                "characteristics": self._extract_characteristics(metrics, behavior_pattern),
-                "user_count": len(cluster_data),
-                "session_ids": cluster_data.index.tolist()
-            }
-        
-        return clusters
 
-    def _get_common_pages(self, cluster_data: pd.DataFrame) -> List[str]:
-        """Get most common pages visited"""
-        all_pages = [page for pages in cluster_data['pagesVisited'] if pages for page in pages]
-        if not all_pages:
-            return []
-        
-        return pd.Series(all_pages).value_counts().head(5).index.tolist()
+        accumulator = ClusterStatsAccumulator(self.optimal_k, encoded.pages, encoded.devices)
+        accumulator.add(df, labels, encoded)
+        return self._clusters_from(accumulator)
 
-    def _get_common_devices(self, cluster_data: pd.DataFrame) -> List[str]:
-        """Get most common devices"""
-        devices = cluster_data['device'].apply(lambda x: x.get('type', 'unknown') if isinstance(x, dict) else 'unknown')
-        return devices.value_counts().head(3).index.tolist()
+    def _build_cluster(self, metrics: Dict, user_count: int, session_ids: List[str]) -> Dict:
+        """Persona information for one cluster from its metrics"""
+        # Determine behavior pattern
+        behavior_pattern = self._determine_behavior(metrics)
+        
+        # Generate persona name and description
+        name, description = self._generate_persona_info(metrics, behavior_pattern, is_single_cluster=self.optimal_k == 1)
+        
+        return {
+            "name": name,
+            "description": description,
+            "metrics": metrics,
+            "behavior_pattern": behavior_pattern,
+            "characteristics": self._extract_characteristics(metrics, behavior_pattern),
+            "user_count": user_count,
+            "session_ids": session_ids
+        }
 
     def _determine_behavior(self, metrics: Dict) -> Dict[str, bool]:
         """Determine behavior patterns"""
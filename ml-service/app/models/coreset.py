@@ -0,0 +1,85 @@
+import numpy as np
+from typing import Iterator, Optional, Tuple
+
+
+def _chunks(n_rows: int, chunk_size: int) -> Iterator[slice]:
+    for start in range(0, n_rows, chunk_size):
+        yield slice(start, min(start + chunk_size, n_rows))
+
+
+def build_lightweight_coreset(
+    X: np.ndarray,
+    size: int,
+    random_state: int = 42,
+    chunk_size: int = 100000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lightweight coreset for k-means (Bachem et al., 2018).
+
+    Rows are sampled with probability q(x) = 1/(2n) + d(x, mean)^2 / (2 * sum d^2)
+    and weighted 1 / (size * q(x)), so weighted costs on the coreset are unbiased
+    estimates of costs on ``X``. Works in fixed-size chunks; apart from the
+    output only per-chunk totals are kept.
+    """
+    n_rows = X.shape[0]
+    if n_rows <= size:
+        return X.copy(), np.ones(n_rows)
+
+    rng = np.random.default_rng(random_state)
+    chunks = list(_chunks(n_rows, chunk_size))
+
+    mean = np.zeros(X.shape[1])
+    for rows in chunks:
+        mean += X[rows].sum(axis=0)
+    mean /= n_rows
+
+    chunk_dist = np.array([np.sum((X[rows] - mean) ** 2) for rows in chunks])
+    total_dist = chunk_dist.sum()
+    if total_dist == 0:
+        # Every row is identical; any uniform sample is exact
+        idx = rng.choice(n_rows, size=size, replace=False)
+        return X[idx].copy(), np.full(size, n_rows / size)
+
+    # Allocate draws to chunks by their probability mass, then sample inside each
+    chunk_mass = np.array([0.5 * (rows.stop - rows.start) / n_rows for rows in chunks]) + 0.5 * chunk_dist / total_dist
+    draws_per_chunk = rng.multinomial(size, chunk_mass / chunk_mass.sum())
+
+    points, weights = [], []
+    for rows, draws in zip(chunks, draws_per_chunk):
+        if draws == 0:
+            continue
+        block = X[rows]
+        q = 0.5 / n_rows + 0.5 * np.sum((block - mean) ** 2, axis=1) / total_dist
+        idx = rng.choice(len(block), size=draws, replace=True, p=q / q.sum())
+        points.append(block[idx])
+        weights.append(1.0 / (size * q[idx]))
+
+    return np.vstack(points), np.concatenate(weights)
+
+
+def assign_nearest(
+    X: np.ndarray,
+    centers: np.ndarray,
+    chunk_size: int = 100000
+) -> Tuple[np.ndarray, float]:
+    """Label every row with its nearest center in one chunked pass; returns labels and inertia"""
+    labels = np.empty(X.shape[0], dtype=np.int32)
+    inertia = 0.0
+    center_norms = np.einsum('ij,ij->i', centers, centers)
+
+    for rows in _chunks(X.shape[0], chunk_size):
+        block = X[rows]
+        sq_dist = np.einsum('ij,ij->i', block, block)[:, None] - 2 * block @ centers.T + center_norms[None, :]
+        nearest = np.argmin(sq_dist, axis=1)
+        labels[rows] = nearest
+        inertia += float(np.maximum(sq_dist[np.arange(len(block)), nearest], 0).sum())
+
+    return labels, inertia
+
+
+def uniform_sample(n_rows: int, size: int, random_state: int = 42) -> Optional[np.ndarray]:
+    """Sorted indices of a uniform sample, or None when every row fits"""
+    if n_rows <= size:
+        return None
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_rows, size=size, replace=False))
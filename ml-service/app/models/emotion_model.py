@@ -1,14 +1,35 @@
 # ml-service/models/emotion_model.py
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from typing import Dict
+from typing import Dict, List, Optional
 import joblib
-import os
+
+from app.models.onnx_backend import load_onnx_classifier
+from app.schemas import EmotionFeatures
+from app.services.model_registry import resolve_model_path, resolve_model_version
+from app.services.prediction_cache import create_prediction_cache
+from app.utils.feature_vectors import FeatureExtractor
+
+# Class index -> emotion label
+EMOTIONS = ['frustrated', 'confused', 'excited', 'neutral', 'considering']
+
+# Prediction cache quantization per feature (ms and px/ms units)
+CACHE_STEPS = {
+    'mouse_speed_variance': 5,
+    'avg_mouse_speed': 1,
+    'scroll_depth_changes': 1,
+    'click_hesitation_time': 10,
+    'time_on_page': 500
+}
+
+# EmotionFeatures fields in model order
+FEATURE_EXTRACTOR = FeatureExtractor([
+    'mouse_speed_variance', 'avg_mouse_speed', 'scroll_depth_changes', 'click_hesitation_time', 'time_on_page'
+])
 
 class EmotionPredictor:
-    def __init__(self):
+    def __init__(self, model_path: Optional[str] = None):
         self.model = None
-        self.emotions = ['frustrated', 'confused', 'excited', 'neutral', 'considering']
+        self.emotions = list(EMOTIONS)
         self.feature_names = [
             'mouse_speed_variance',
             'avg_mouse_speed',
@@ -17,66 +38,86 @@ class EmotionPredictor:
             'time_on_page'
         ]
         
-        # Load pre-trained model or create new
-        model_path = 'trained_models/emotion_model.pkl'
-        if os.path.exists(model_path):
+        # Load the trained artifact; models are built by app.cli.train
+        # Runtime serving the model, reported next to its registry version
+        self.backend = 'sklearn'
+        if model_path is not None:
+            # Explicit artifact (e.g. a per-tenant model); never trained here
             self.model = joblib.load(model_path)
+            self.model_version = None
         else:
-            self.model = self._create_model()
-    
-    def _create_model(self):
-        """Create and train initial model with sample data"""
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
-        
-        # Sample training data (replace with real data)
-        X_train = np.array([
-            [1200, 250, 80, 500, 45000],   # frustrated
-            [400, 80, 20, 2000, 60000],    # confused
-            [600, 180, 90, 200, 30000],    # excited
-            [500, 120, 50, 800, 40000],    # neutral
-            [300, 100, 30, 1500, 80000]    # considering
-        ])
-        y_train = np.array([0, 1, 2, 3, 4])  # emotion indices
-        
-        model.fit(X_train, y_train)
-        
-        # Save model
-        os.makedirs('trained_models', exist_ok=True)
-        joblib.dump(model, 'trained_models/emotion_model.pkl')
-        
-        return model
+            self.model_version = resolve_model_version('emotion')
+            self.model = load_onnx_classifier('emotion', self.model_version)
+            if self.model is not None:
+                self.backend = 'onnx'
+        if self.model is None:
+            model_path = resolve_model_path('emotion')
+            if model_path is None:
+                raise FileNotFoundError("No emotion model artifact; run `python -m app.cli.train emotion`")
+            self.model = joblib.load(model_path)
+
+        # Optional LRU of probabilities by quantized feature vector
+        self.cache = create_prediction_cache('emotion', self.feature_names, CACHE_STEPS)
     
+    def swap_model(self, model, version: Optional[str], backend: str = 'sklearn') -> None:
+        """Replace the served model; calls already running finish on the old one"""
+        self.model = model
+        self.model_version = version
+        self.backend = backend
+        if self.cache is not None:
+            self.cache.clear()
+
+    @staticmethod
+    def build_features(features: Dict) -> List[float]:
+        """Validate a request-shaped dict as ``EmotionFeatures`` and encode it in model order"""
+        return FEATURE_EXTRACTOR.vector(EmotionFeatures.model_validate(features))[0].tolist()
+
     def predict(self, features: Dict) -> Dict:
         """Predict emotion from features"""
-        # Extract features in correct order
-        feature_values = [
-            features.get('mouse_speed_variance', 500),
-            features.get('avg_mouse_speed', 120),
-            features.get('scroll_depth_changes', 50),
-            features.get('click_hesitation_time', 800),
-            features.get('time_on_page', 40000)
-        ]
-        
-        X = np.array([feature_values])
-        
-        # Get prediction
-        prediction = self.model.predict(X)[0]
-        probabilities = self.model.predict_proba(X)[0]
-        
-        emotion = self.emotions[prediction]
-        confidence = float(probabilities[prediction])
-        
-        prob_dict = {
-            self.emotions[i]: float(prob) 
-            for i, prob in enumerate(probabilities)
-        }
-        
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, features_list: List[Dict]) -> List[Dict]:
+        """Predict emotions for many feature dicts with one model call"""
+        if not features_list:
+            return []
+        return self.predict_validated([EmotionFeatures.model_validate(f) for f in features_list])
+
+    def predict_validated(self, items: List) -> List[Dict]:
+        """Predict for validated ``EmotionFeatures`` without going through dicts"""
+        return self.predict_encoded(FEATURE_EXTRACTOR.matrix(items))
+
+    def predict_encoded(self, X: np.ndarray) -> List[Dict]:
+        """Per-row responses for a feature matrix in ``feature_names`` order"""
+        scored = self.predict_matrix(X)
+
+        results = []
+        for emotion, confidence, row in zip(scored['emotion'], scored['confidence'], scored['probabilities']):
+            results.append({
+                'emotion': emotion,
+                'confidence': float(confidence),
+                'probabilities': {
+                    label: float(prob)
+                    for label, prob in zip(scored['labels'], row)
+                }
+            })
+        return results
+
+    def predict_matrix(self, X: np.ndarray) -> Dict:
+        """Columnar predictions for a feature matrix in ``feature_names`` order"""
+        # A hot reload may swap self.model; this call keeps the version it started with
+        model = self.model
+
+        # One predict_proba call (cache misses only); the label is the argmax class
+        if self.cache is not None:
+            probabilities = self.cache.scores(X, model, model.predict_proba)
+        else:
+            probabilities = model.predict_proba(X)
+        classes = np.asarray(model.classes_)
+        best = probabilities.argmax(axis=1)
+
         return {
-            'emotion': emotion,
-            'confidence': confidence,
-            'probabilities': prob_dict
+            'emotion': [self.emotions[label] for label in classes[best]],
+            'confidence': probabilities[np.arange(len(X)), best],
+            'probabilities': probabilities,
+            'labels': [self.emotions[label] for label in classes]
         }
@@ -1,12 +1,31 @@
 # ml-service/models/fraud_model.py
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from typing import Dict
+from typing import Dict, List, Optional
 import joblib
-import os
+
+from app.models.onnx_backend import load_onnx_classifier
+from app.schemas import FraudFeatures
+from app.services.model_registry import resolve_model_path, resolve_model_version
+from app.services.prediction_cache import create_prediction_cache
+from app.utils.deadline import has_time, mark_degraded
+from app.utils.feature_vectors import FeatureExtractor
+
+# Prediction cache quantization per feature (0 = exact)
+CACHE_STEPS = {
+    'checkout_speed': 1,
+    'mouse_movements': 1,
+    'failed_payments': 0,
+    'email_pattern_score': 0.01,
+    'location_anomaly': 0.01
+}
+
+# FraudFeatures fields in model order
+FEATURE_EXTRACTOR = FeatureExtractor([
+    'checkout_speed', 'mouse_movements', 'failed_payments', 'email_pattern_score', 'location_anomaly'
+])
 
 class FraudDetector:
-    def __init__(self):
+    def __init__(self, model_path: Optional[str] = None):
         self.model = None
         self.feature_names = [
             'checkout_speed',
@@ -16,64 +35,88 @@ class FraudDetector:
             'location_anomaly'
         ]
         
-        model_path = 'trained_models/fraud_model.pkl'
-        if os.path.exists(model_path):
+        # Runtime serving the model, reported next to its registry version
+        self.backend = 'sklearn'
+        if model_path is not None:
+            # Explicit artifact (e.g. a per-tenant model); never trained here
             self.model = joblib.load(model_path)
+            self.model_version = None
         else:
-            self.model = self._create_model()
-    
-    def _create_model(self):
-        """Create fraud detection model"""
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=8,
-            random_state=42
-        )
-        
-        # Sample training data
-        X_train = np.array([
-            [5, 0, 3, 0.9, 0.8],    # High fraud
-            [120, 50, 0, 0.1, 0.2], # Low fraud
-            [8, 2, 2, 0.7, 0.6],    # Medium fraud
-            [180, 80, 0, 0.2, 0.1], # Low fraud
-            [3, 0, 4, 0.95, 0.9]    # High fraud
-        ])
-        y_train = np.array([1, 0, 1, 0, 1])
-        
-        model.fit(X_train, y_train)
-        
-        os.makedirs('trained_models', exist_ok=True)
-        joblib.dump(model, 'trained_models/fraud_model.pkl')
-        
-        return model
+            self.model_version = resolve_model_version('fraud')
+            self.model = load_onnx_classifier('fraud', self.model_version)
+            if self.model is not None:
+                self.backend = 'onnx'
+        if self.model is None:
+            model_path = resolve_model_path('fraud')
+            if model_path is None:
+                raise FileNotFoundError("No fraud model artifact; run `python -m app.cli.train fraud`")
+            self.model = joblib.load(model_path)
+
+        # Optional LRU of probabilities by quantized feature vector
+        self.cache = create_prediction_cache('fraud', self.feature_names, CACHE_STEPS)
     
+    def swap_model(self, model, version: Optional[str], backend: str = 'sklearn') -> None:
+        """Replace the served model; calls already running finish on the old one"""
+        self.model = model
+        self.model_version = version
+        self.backend = backend
+        if self.cache is not None:
+            self.cache.clear()
+
+    @staticmethod
+    def build_features(features: Dict) -> List[float]:
+        """Validate a request-shaped dict as ``FraudFeatures`` and encode it in model order"""
+        return FEATURE_EXTRACTOR.vector(FraudFeatures.model_validate(features))[0].tolist()
+
     def predict(self, features: Dict) -> Dict:
         """Predict fraud probability"""
-        feature_values = [
-            features.get('checkout_speed', 60),
-            features.get('mouse_movements', 50),
-            features.get('failed_payments', 0),
-            features.get('email_pattern_score', 0.3),
-            features.get('location_anomaly', 0.2)
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, features_list: List[Dict]) -> List[Dict]:
+        """Predict fraud probabilities for many feature dicts with one model call"""
+        if not features_list:
+            return []
+        return self.predict_validated([FraudFeatures.model_validate(f) for f in features_list])
+
+    def predict_validated(self, items: List) -> List[Dict]:
+        """Predict for validated ``FraudFeatures`` without going through dicts"""
+        return self.predict_encoded(FEATURE_EXTRACTOR.matrix(items))
+
+    def predict_encoded(self, X: np.ndarray) -> List[Dict]:
+        """Per-row responses for a feature matrix in ``feature_names`` order"""
+        scored = self.predict_matrix(X)
+        # The signals are optional; dropped once the request deadline has passed
+        explain = has_time()
+        if not explain:
+            mark_degraded("fraud.signals")
+
+        results = []
+        for feature_values, probability, risk_level in zip(X.tolist(), scored['fraud_probability'], scored['risk_level']):
+            signals = {
+                'too_fast': feature_values[0] < 15,
+                'no_mouse': feature_values[1] < 5,
+                'payment_issues': feature_values[2] > 1,
+                'suspicious_email': feature_values[3] > 0.6,
+                'location_mismatch': feature_values[4] > 0.5
+            } if explain else {}
+
+            results.append({
+                'fraud_probability': float(probability),
+                'risk_level': risk_level,
+                'signals': signals
+            })
+        return results
+
+    def predict_matrix(self, X: np.ndarray) -> Dict:
+        """Columnar predictions for a feature matrix in ``feature_names`` order"""
+        # A hot reload may swap self.model; this call keeps the version it started with
+        model = self.model
+        if self.cache is not None:
+            probabilities = self.cache.scores(X, model, lambda rows: model.predict_proba(rows)[:, 1])
+        else:
+            probabilities = model.predict_proba(X)[:, 1]
+        risk_levels = [
+            'high' if p > 0.7 else 'medium' if p > 0.4 else 'low'
+            for p in probabilities.tolist()
         ]
-        
-        X = np.array([feature_values])
-        
-        probability = float(self.model.predict_proba(X)[0][1])
-        
-        risk_level = 'high' if probability > 0.7 else \
-                    'medium' if probability > 0.4 else 'low'
-        
-        signals = {
-            'too_fast': feature_values[0] < 15,
-            'no_mouse': feature_values[1] < 5,
-            'payment_issues': feature_values[2] > 1,
-            'suspicious_email': feature_values[3] > 0.6,
-            'location_mismatch': feature_values[4] > 0.5
-        }
-        
-        return {
-            'fraud_probability': probability,
-            'risk_level': risk_level,
-            'signals': signals
-        }
+        return {'fraud_probability': probabilities, 'risk_level': risk_levels}
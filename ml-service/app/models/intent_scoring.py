@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 class IntentScorer:
     """
@@ -19,62 +19,72 @@ class IntentScorer:
         time_spent: float,
         scroll_depth: float,
         click_rate: float,
-        session_history: List[Dict] = []
+        session_history: List[Dict] = [],
+        visitor_state: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """
-        Predict intent score and level
+        Predict intent score and level. Past sessions come from
+        ``visitor_state`` (a VisitorStateStore summary) when given, otherwise
+        from the client-sent ``session_history``.
         """
+        return self.predict_batch([{
+            'time_spent': time_spent,
+            'scroll_depth': scroll_depth,
+            'click_rate': click_rate,
+            'session_history': session_history,
+            'visitor_state': visitor_state
+        }])[0]
+
+    def predict_batch(self, rows: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Score many sessions at once. Each row carries ``time_spent``,
+        ``scroll_depth``, ``click_rate`` and optionally ``visitor_state`` or
+        ``session_history``.
+        """
+        if not rows:
+            return []
+        time_spent = np.array([r.get('time_spent', 0) for r in rows], dtype=np.float64)
+        scroll = np.array([r.get('scroll_depth', 0) for r in rows], dtype=np.float64)
+        click = np.array([r.get('click_rate', 0) for r in rows], dtype=np.float64)
+        session_counts = np.array([
+            r['visitor_state']['sessions'] if r.get('visitor_state') else len(r.get('session_history') or [])
+            for r in rows
+        ], dtype=np.float64)
+
         # Normalize inputs
-        normalized_time = min(time_spent / 300, 1.0)  # Max 5 minutes
-        normalized_scroll = scroll_depth
-        normalized_click = min(click_rate, 1.0)
-        
+        normalized_time = np.minimum(time_spent / 300, 1.0)  # Max 5 minutes
+        normalized_click = np.minimum(click, 1.0)
+
         # Calculate base intent score
-        intent_score = (
+        intent_scores = (
             normalized_time * self.weights['time'] +
-            normalized_scroll * self.weights['scroll'] +
+            scroll * self.weights['scroll'] +
             normalized_click * self.weights['click']
         )
-        
+
         # Apply history boost
-        if session_history:
-            history_boost = self._calculate_history_boost(session_history)
-            intent_score = min(intent_score + history_boost, 1.0)
-        
-        # Determine intent level
-        intent_level = self._get_intent_level(intent_score)
-        
-        # Calculate confidence
-        confidence = self._calculate_confidence(
-            normalized_time,
-            normalized_scroll,
-            normalized_click
-        )
-        
-        # Identify key factors
-        factors = self._identify_factors(
-            normalized_time,
-            normalized_scroll,
-            normalized_click
+        boosted = session_counts > 0
+        intent_scores[boosted] = np.minimum(
+            intent_scores[boosted] + self._calculate_history_boost(session_counts[boosted]), 1.0
         )
-        
-        return {
-            "intent_score": round(intent_score, 2),
-            "intent_level": intent_level,
-            "confidence": round(confidence, 2),
-            "factors": factors
-        }
 
-    def _calculate_history_boost(self, session_history: List[Dict]) -> float:
-        """Calculate boost based on session history"""
-        if not session_history:
-            return 0.0
-        
+        values = np.stack([normalized_time, scroll, normalized_click], axis=1)
+        confidences = self._calculate_confidence(values)
+
+        return [
+            {
+                "intent_score": round(float(score), 2),
+                "intent_level": self._get_intent_level(float(score)),
+                "confidence": round(float(confidence), 2),
+                "factors": self._identify_factors(float(t), float(sc), float(c))
+            }
+            for score, confidence, (t, sc, c) in zip(intent_scores, confidences, values)
+        ]
+
+    def _calculate_history_boost(self, session_counts: np.ndarray) -> np.ndarray:
+        """Calculate boost based on the number of past sessions"""
         # More sessions = higher boost
-        session_count = len(session_history)
-        boost = min(session_count * 0.05, 0.15)  # Max 15% boost
-        
-        return boost
+        return np.minimum(session_counts * 0.05, 0.15)  # Max 15% boost
 
     def _get_intent_level(self, score: float) -> str:
         """Determine intent level from score"""
@@ -85,21 +95,15 @@ class IntentScorer:
         else:
             return "low-intent"
 
-    def _calculate_confidence(
-        self,
-        time: float,
-        scroll: float,
-        click: float
-    ) -> float:
-        """Calculate prediction confidence"""
+    def _calculate_confidence(self, values: np.ndarray) -> np.ndarray:
+        """Calculate prediction confidence per row of normalized (time, scroll, click)"""
         # Higher variance = lower confidence
-        values = [time, scroll, click]
-        variance = np.var(values)
+        variance = values.var(axis=1)
         
         # Inverse relationship: low variance = high confidence
-        confidence = 1.0 - min(variance, 1.0)
+        confidence = 1.0 - np.minimum(variance, 1.0)
         
-        return max(confidence, 0.5)  # Minimum 50% confidence
+        return np.maximum(confidence, 0.5)  # Minimum 50% confidence
 
     def _identify_factors(
         self,
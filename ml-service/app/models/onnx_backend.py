@@ -0,0 +1,129 @@
+# ml-service/models/onnx_backend.py
+import json
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from app.services.model_registry import LEGACY_MODEL_DIR, ModelRegistry, resolve_model_version
+from app.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILE = 'model.onnx'
+
+
+def onnx_model_path(name: str, version: Optional[str] = None,
+                    registry: Optional[ModelRegistry] = None) -> str:
+    """
+    Path of the ONNX graph exported from ``version`` of a predictor (default:
+    the version being served), next to that version's pickle
+    """
+    registry = registry or ModelRegistry()
+    version = version or resolve_model_version(name, registry)
+    if version == 'legacy':
+        return os.path.join(LEGACY_MODEL_DIR, f'{name}_model.onnx')
+    return registry.artifact_path(name, version, ONNX_FILE)
+
+
+def onnx_backend_enabled(name: str) -> bool:
+    return Config.get_config()['inference']['backends'].get(name) == 'onnx'
+
+
+class OnnxClassifier:
+    """
+    Serve an exported sklearn classifier through onnxruntime.
+
+    Exposes the subset of the sklearn classifier API the predictors use
+    (``predict``, ``predict_proba``, ``classes_``, ``n_features_in_``) so it
+    can stand in for the unpickled estimator.
+    """
+
+    def __init__(self, path: str, intra_op_threads: int = 1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.n_features_in_ = self.session.get_inputs()[0].shape[1]
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.classes_ = np.array(json.loads(metadata.get('classes', '[0, 1]')))
+
+    def _run(self, X: np.ndarray):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        labels, probabilities = self.session.run(None, {self.input_name: X})
+        return labels, probabilities
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self._run(X)[0]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._run(X)[1]
+
+
+def export_to_onnx(model, path: str) -> str:
+    """Convert a fitted sklearn classifier to an ONNX graph on disk"""
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import FloatTensorType
+
+    onx = to_onnx(
+        model,
+        initial_types=[('X', FloatTensorType([None, model.n_features_in_]))],
+        options={id(model): {'zipmap': False}},
+        target_opset={'': 15, 'ai.onnx.ml': 3},
+    )
+    entry = onx.metadata_props.add()
+    entry.key = 'classes'
+    entry.value = json.dumps(np.asarray(model.classes_).tolist())
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(onx.SerializeToString())
+    return path
+
+
+def check_parity(model, onnx_model: OnnxClassifier, X: np.ndarray, atol: float = 1e-4) -> dict:
+    """Compare sklearn and onnxruntime outputs on the same inputs"""
+    expected = model.predict_proba(X)
+    actual = onnx_model.predict_proba(X)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    label_agreement = float(np.mean(model.predict(X) == onnx_model.predict(X)))
+
+    return {
+        'samples': int(X.shape[0]),
+        'max_abs_diff': max_abs_diff,
+        'label_agreement': label_agreement,
+        'passed': max_abs_diff <= atol and label_agreement == 1.0
+    }
+
+
+def load_onnx_classifier(name: str, version: Optional[str] = None,
+                         registry: Optional[ModelRegistry] = None) -> Optional[OnnxClassifier]:
+    """
+    Return the ONNX-backed classifier exported from ``version`` of ``name``
+    when its backend is set to ``onnx``, or None to keep the sklearn pickle.
+    """
+    if not onnx_backend_enabled(name):
+        return None
+    settings = Config.get_config()['inference']
+
+    path = onnx_model_path(name, version, registry)
+    if not os.path.exists(path):
+        logger.warning(f"ONNX backend requested for {name} but {path} is missing")
+        return None
+
+    try:
+        return OnnxClassifier(path, intra_op_threads=settings['onnx_intra_op_threads'])
+    except ImportError:
+        logger.warning(f"onnxruntime is not installed; cannot serve {name} through ONNX")
+        return None
@@ -1,21 +1,114 @@
 # ml-service/models/persona_clustering.py
 import numpy as np
 from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from typing import Dict, List
-import joblib
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+
+FEATURE_DEFAULTS = {
+    'avg_session_duration': 300,
+    'pages_per_session': 5,
+    'cart_adds': 1,
+    'purchases': 0,
+    'price_sensitivity': 0.5,
+    'research_depth': 0.5
+}
+
+class PersonaCentroidModel:
+    """
+    Offline-fitted persona model: scaler statistics plus one centroid per
+    persona, so real-time assignment is a nearest-centroid lookup.
+
+    Several centroids may share a persona label; ``centroid_ids`` tells
+    them apart (``<persona>_<index>``, stable for a fitted artifact).
+    """
+
+    def __init__(self, feature_names: List[str], mean: np.ndarray, scale: np.ndarray,
+                 centroids: np.ndarray, personas: List[str]):
+        self.feature_names = feature_names
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.centroids_ = np.asarray(centroids, dtype=np.float64)
+        self.personas = list(personas)
+        self.centroid_ids = [f"{persona}_{i}" for i, persona in enumerate(self.personas)]
+        self._centroid_norms = np.einsum('ij,ij->i', self.centroids_, self.centroids_)
+
+    @classmethod
+    def fit(cls, X: np.ndarray, feature_names: List[str], label_fn,
+            n_clusters: int = 5, random_state: int = 42) -> 'PersonaCentroidModel':
+        """
+        Fit scaler statistics and KMeans centroids on historical feature rows.
+        ``label_fn`` names each centroid from its feature dict in raw units;
+        the labels need not be distinct.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init='auto')
+        kmeans.fit((X - mean) / scale)
+
+        raw_centroids = kmeans.cluster_centers_ * scale + mean
+        personas = [label_fn(dict(zip(feature_names, row))) for row in raw_centroids]
+        return cls(feature_names, mean, scale, kmeans.cluster_centers_, personas)
+
+    @classmethod
+    def load(cls, path: str) -> 'PersonaCentroidModel':
+        data = np.load(path, allow_pickle=False)
+        return cls(
+            feature_names=data['feature_names'].tolist(),
+            mean=data['mean'],
+            scale=data['scale'],
+            centroids=data['centroids'],
+            personas=data['personas'].tolist()
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(
+            path,
+            feature_names=np.array(self.feature_names),
+            mean=self.mean_,
+            scale=self.scale_,
+            centroids=self.centroids_,
+            personas=np.array(self.personas)
+        )
+
+    def assign(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Nearest centroid for each row of ``X`` (raw units).
+
+        Returns centroid indices, distance-based confidence (0.5 when the two
+        nearest centroids are equidistant, 1.0 on top of a centroid) and the
+        distance to the assigned centroid in scaled units.
+        """
+        Z = (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+        sq_dist = (np.einsum('ij,ij->i', Z, Z)[:, None]
+                   - 2 * Z @ self.centroids_.T
+                   + self._centroid_norms[None, :])
+        dist = np.sqrt(np.maximum(sq_dist, 0))
+
+        if dist.shape[1] == 1:
+            nearest = np.zeros(len(Z), dtype=int)
+            return nearest, np.ones(len(Z)), dist[:, 0]
+
+        order = np.argpartition(dist, 1, axis=1)[:, :2]
+        rows = np.arange(len(Z))
+        d1 = dist[rows, order[:, 0]]
+        d2 = dist[rows, order[:, 1]]
+        swap = d1 > d2
+        nearest = np.where(swap, order[:, 1], order[:, 0])
+        d_best = np.minimum(d1, d2)
+        d_second = np.maximum(d1, d2)
+
+        total = d_best + d_second
+        confidence = np.where(total > 0, d_second / np.where(total > 0, total, 1), 0.5)
+        return nearest, confidence, d_best
+
 
 class PersonaClustering:
-    def __init__(self):
-        self.scaler = StandardScaler()
-        self.feature_names = [
-            'avg_session_duration',
-            'pages_per_session',
-            'cart_adds',
-            'purchases',
-            'price_sensitivity',
-            'research_depth'
-        ]
+    def __init__(self, model_path: str = 'trained_models/persona_centroids.npz'):
+        self.feature_names = list(FEATURE_DEFAULTS)
         
         self.persona_map = {
             0: 'budget_buyer',
@@ -24,34 +117,58 @@ class PersonaClustering:
             3: 'impulse_buyer',
             4: 'casual_visitor'
         }
+
+        # Precomputed centroids for real-time assignment (fitted offline)
+        self.centroid_model: Optional[PersonaCentroidModel] = None
+        if os.path.exists(model_path):
+            self.centroid_model = PersonaCentroidModel.load(model_path)
+
+    def _feature_vector(self, features: Dict) -> List[float]:
+        return [features.get(name, default) for name, default in FEATURE_DEFAULTS.items()]
     
-    def cluster(self, features: Dict, method: str = "kmeans_dynamic") -> Dict:
+    def cluster(self, features: Dict, method: str = "kmeans_dynamic",
+                on_assign: Optional[Callable] = None) -> Dict:
         """Perform persona clustering"""
-        feature_values = [
-            features.get('avg_session_duration', 300),
-            features.get('pages_per_session', 5),
-            features.get('cart_adds', 1),
-            features.get('purchases', 0),
-            features.get('price_sensitivity', 0.5),
-            features.get('research_depth', 0.5)
-        ]
-        
-        X = np.array([feature_values])
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Simple rule-based clustering for now
-        primary_cluster = self._rule_based_clustering(features)
-        secondary_traits = self._identify_secondary_traits(features)
-        confidence = self._calculate_confidence(features, primary_cluster)
-        
-        return {
-            'primary_cluster': primary_cluster,
-            'secondary_traits': secondary_traits,
-            'confidence': confidence
-        }
+        return self.cluster_batch([features], method, on_assign)[0]
+
+    def cluster_batch(self, features_list: List[Dict], method: str = "kmeans_dynamic",
+                      on_assign: Optional[Callable] = None) -> List[Dict]:
+        """
+        Assign personas to many feature dicts at once. Centroid assignments
+        are also reported as ``on_assign(model, X, nearest, distance)``.
+        ``method="centroid"`` falls back to the rules when no centroid model
+        is loaded; each result's ``method`` says which one answered.
+        """
+        if method == "centroid" and self.centroid_model is not None:
+            X = np.array([self._feature_vector(features) for features in features_list], dtype=np.float64)
+            nearest, confidence, distance = self.centroid_model.assign(X)
+            if on_assign is not None:
+                on_assign(self.centroid_model, X, nearest, distance)
+            return [
+                {
+                    'primary_cluster': self.centroid_model.personas[idx],
+                    'secondary_traits': self._identify_secondary_traits(features),
+                    'confidence': float(conf),
+                    'method': 'centroid',
+                    'centroid_id': self.centroid_model.centroid_ids[idx]
+                }
+                for features, idx, conf in zip(features_list, nearest, confidence)
+            ]
+
+        results = []
+        for features in features_list:
+            # Simple rule-based clustering for now
+            primary_cluster = self.rule_based_persona(features)
+            results.append({
+                'primary_cluster': primary_cluster,
+                'secondary_traits': self._identify_secondary_traits(features),
+                'confidence': self._calculate_confidence(features, primary_cluster),
+                'method': 'rule_based'
+            })
+        return results
     
-    def _rule_based_clustering(self, features: Dict) -> str:
-        """Rule-based persona identification"""
+    def rule_based_persona(self, features: Dict) -> str:
+        """Rule-based persona identification; also names fitted centroids"""
         price_sensitivity = features.get('price_sensitivity', 0.5)
         research_depth = features.get('research_depth', 0.5)
         purchases = features.get('purchases', 0)
@@ -1,39 +1,139 @@
-from typing import List, Dict, Any
+from itertools import product
+from typing import List, Dict, Any, FrozenSet, Tuple
+
+from app.utils.pattern_matcher import PatternMatcher
+
+# Persona-specific content strategies
+STRATEGIES = {
+    "Budget Buyer": {
+        "headlines": ["Best Value", "Save More", "Special Offer"],
+        "cta": ["Get Deal Now", "See Pricing", "Compare Plans"],
+        "focus": "price"
+    },
+    "Feature Explorer": {
+        "headlines": ["Advanced Features", "Full Capabilities", "Technical Specs"],
+        "cta": ["Learn More", "See Features", "View Demo"],
+        "focus": "features"
+    },
+    "Careful Researcher": {
+        "headlines": ["Complete Guide", "Detailed Analysis", "Expert Review"],
+        "cta": ["Read Full Review", "Download Guide", "Schedule Demo"],
+        "focus": "information"
+    },
+    "Impulse Buyer": {
+        "headlines": ["Limited Time Offer", "Act Now", "Don't Miss Out"],
+        "cta": ["Buy Now", "Get Started", "Claim Offer"],
+        "focus": "urgency"
+    },
+    "Casual Visitor": {
+        "headlines": ["Welcome", "Discover", "Explore"],
+        "cta": ["Learn More", "Browse", "See Options"],
+        "focus": "exploration"
+    }
+}
+DEFAULT_PERSONA = "Casual Visitor"
+
+# Hero headline per strategy focus
+HEADLINES = {
+    "price": "Get More, Pay Less",
+    "features": "Powerful Features, Unmatched Performance",
+    "urgency": "Limited Time Offer - Act Now!",
+    "information": "Everything You Need to Know"
+}
+DEFAULT_HEADLINE = "Welcome to Your Solution"
+
+# A page belongs to every category with a pattern occurring in its
+# lower-cased URL (so nearly every URL is also "home", via "/")
+PAGE_CATEGORIES = {
+    "home": ("/", "home"),
+    "pricing": ("pricing",),
+    "product": ("product", "features")
+}
+
+# Applied in order. A rule fires when the page is in its category and, if it
+# names one, the persona's strategy has its focus. ``content`` and ``reason``
+# are formatted with the persona name, headline and first CTA.
+CONTENT_RULES = [
+    {"category": "home", "element": ".hero-title", "content": "{headline}",
+     "reason": "Optimized for {persona}", "priority": 1},
+    {"category": "home", "element": ".cta-button", "content": "{cta}",
+     "reason": "CTA tailored for {persona}", "priority": 1},
+    {"category": "pricing", "focus": "price", "element": ".pricing-highlight",
+     "content": "💰 Best Value for Your Money", "reason": "Price-conscious visitor", "priority": 1},
+    {"category": "pricing", "focus": "features", "element": ".pricing-highlight",
+     "content": "⚡ All Premium Features Included", "reason": "Feature-focused visitor", "priority": 1},
+    {"category": "product", "focus": "features", "element": ".product-description",
+     "content": "Explore our advanced capabilities and technical specifications",
+     "reason": "Technical detail seeker", "priority": 1},
+    {"category": "product", "focus": "urgency", "element": ".product-cta",
+     "content": "⏰ Limited Time: Get 20% Off Today!", "reason": "Urgency-driven buyer", "priority": 2}
+]
+
+# Appended for visitors with more than ``min_history`` pages in their history
+HISTORY_RULE = {
+    "min_history": 3,
+    "recommendation": {
+        "element": ".recommendation-banner",
+        "content": "Based on your interest, we recommend...",
+        "reason": "Returning visitor pattern detected",
+        "priority": 2
+    }
+}
+
 
 class ContentRecommender:
     """
-    Generate personalized content recommendations
+    Generate personalized content recommendations.
+
+    The rules are compiled once: page categories into a single multi-pattern
+    matcher, and the recommendations of every (persona, category set) pair
+    into a table, so a lookup is one pass over the URL and a dict hit.
     """
-    
+
     def __init__(self):
-        # Persona-specific content strategies
-        self.strategies = {
-            "Budget Buyer": {
-                "headlines": ["Best Value", "Save More", "Special Offer"],
-                "cta": ["Get Deal Now", "See Pricing", "Compare Plans"],
-                "focus": "price"
-            },
-            "Feature Explorer": {
-                "headlines": ["Advanced Features", "Full Capabilities", "Technical Specs"],
-                "cta": ["Learn More", "See Features", "View Demo"],
-                "focus": "features"
-            },
-            "Careful Researcher": {
-                "headlines": ["Complete Guide", "Detailed Analysis", "Expert Review"],
-                "cta": ["Read Full Review", "Download Guide", "Schedule Demo"],
-                "focus": "information"
-            },
-            "Impulse Buyer": {
-                "headlines": ["Limited Time Offer", "Act Now", "Don't Miss Out"],
-                "cta": ["Buy Now", "Get Started", "Claim Offer"],
-                "focus": "urgency"
-            },
-            "Casual Visitor": {
-                "headlines": ["Welcome", "Discover", "Explore"],
-                "cta": ["Learn More", "Browse", "See Options"],
-                "focus": "exploration"
-            }
+        self.strategies = STRATEGIES
+        self.matcher = PatternMatcher(PAGE_CATEGORIES)
+        self._table: Dict[Tuple[str, FrozenSet[str]], List[Dict[str, Any]]] = {}
+        category_sets = [
+            frozenset(c for c, present in zip(PAGE_CATEGORIES, flags) if present)
+            for flags in product((False, True), repeat=len(PAGE_CATEGORIES))
+        ]
+        for persona_type in self.strategies:
+            for categories in category_sets:
+                self._table[(persona_type, categories)] = self._compile(persona_type, categories)
+
+    def _compile(self, persona_type: str, categories: FrozenSet[str]) -> List[Dict[str, Any]]:
+        strategy = self.strategies.get(persona_type, self.strategies[DEFAULT_PERSONA])
+        values = {
+            "persona": persona_type,
+            "headline": HEADLINES.get(strategy["focus"], DEFAULT_HEADLINE),
+            "cta": strategy["cta"][0]
         }
+        return [
+            {
+                "element": rule["element"],
+                "content": rule["content"].format(**values),
+                "reason": rule["reason"].format(**values),
+                "priority": rule["priority"]
+            }
+            for rule in CONTENT_RULES
+            if rule["category"] in categories and rule.get("focus", strategy["focus"]) == strategy["focus"]
+        ]
+
+    def page_categories(self, current_page: str) -> FrozenSet[str]:
+        return frozenset(self.matcher.labels(current_page.lower()))
+
+    def _resolve(self, persona_type: str, categories: FrozenSet[str],
+                 user_history: List[str]) -> List[Dict[str, Any]]:
+        compiled = self._table.get((persona_type, categories))
+        if compiled is None:
+            # Unknown personas use the default strategy but keep their own name
+            compiled = self._compile(persona_type, categories)
+        # Copies, so callers cannot alter the compiled table
+        recommendations = [dict(recommendation) for recommendation in compiled]
+        if len(user_history or []) > HISTORY_RULE["min_history"]:
+            recommendations.append(dict(HISTORY_RULE["recommendation"]))
+        return recommendations
 
     def generate_recommendations(
         self,
@@ -44,81 +144,19 @@ class ContentRecommender:
         """
         Generate personalized recommendations
         """
-        strategy = self.strategies.get(persona_type, self.strategies["Casual Visitor"])
-        
-        recommendations = []
-        
-        # Homepage headline
-        if "/" in current_page or "home" in current_page.lower():
-            recommendations.append({
-                "element": ".hero-title",
-                "content": self._generate_headline(strategy, "home"),
-                "reason": f"Optimized for {persona_type}",
-                "priority": 1
-            })
-            
-            recommendations.append({
-                "element": ".cta-button",
-                "content": strategy["cta"][0],
-                "reason": f"CTA tailored for {persona_type}",
-                "priority": 1
-            })
-        
-        # Pricing page
-        if "pricing" in current_page.lower():
-            if strategy["focus"] == "price":
-                recommendations.append({
-                    "element": ".pricing-highlight",
-                    "content": "💰 Best Value for Your Money",
-                    "reason": "Price-conscious visitor",
-                    "priority": 1
-                })
-            elif strategy["focus"] == "features":
-                recommendations.append({
-                    "element": ".pricing-highlight",
-                    "content": "⚡ All Premium Features Included",
-                    "reason": "Feature-focused visitor",
-                    "priority": 1
-                })
-        
-        # Product page
-        if "product" in current_page.lower() or "features" in current_page.lower():
-            if strategy["focus"] == "features":
-                recommendations.append({
-                    "element": ".product-description",
-                    "content": "Explore our advanced capabilities and technical specifications",
-                    "reason": "Technical detail seeker",
-                    "priority": 1
-                })
-            elif strategy["focus"] == "urgency":
-                recommendations.append({
-                    "element": ".product-cta",
-                    "content": "⏰ Limited Time: Get 20% Off Today!",
-                    "reason": "Urgency-driven buyer",
-                    "priority": 2
-                })
-        
-        # History-based recommendations
-        if len(user_history) > 3:
-            recommendations.append({
-                "element": ".recommendation-banner",
-                "content": "Based on your interest, we recommend...",
-                "reason": "Returning visitor pattern detected",
-                "priority": 2
-            })
-        
-        return recommendations
-
-    def _generate_headline(self, strategy: Dict, page_type: str) -> str:
-        """Generate contextual headline"""
-        if strategy["focus"] == "price":
-            return "Get More, Pay Less"
-        elif strategy["focus"] == "features":
-            return "Powerful Features, Unmatched Performance"
-        elif strategy["focus"] == "urgency":
-            return "Limited Time Offer - Act Now!"
-        elif strategy["focus"] == "information":
-            return "Everything You Need to Know"
-        else:
-            return "Welcome to Your Solution"
+        return self._resolve(persona_type, self.page_categories(current_page), user_history)
 
+    def generate_batch(self, requests: List[Dict]) -> List[List[Dict[str, Any]]]:
+        """
+        ``generate_recommendations`` for many ``persona_type``/``current_page``/
+        ``user_history`` dicts; each distinct page is matched once
+        """
+        categories = {}
+        for request in requests:
+            page = request["current_page"]
+            if page not in categories:
+                categories[page] = self.page_categories(page)
+        return [
+            self._resolve(request["persona_type"], categories[request["current_page"]], request.get("user_history"))
+            for request in requests
+        ]
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sklearn.cluster import kmeans_plusplus
+from threadpoolctl import threadpool_limits
+
+# Per-process view of the shared session matrix
+_shard_shm = None
+_shard_X = None
+_shard_thread_limits = None
+
+
+def _attach_shared_matrix(shm_name: str, shape: tuple, dtype: str, blas_threads: int) -> None:
+    """Worker initializer: map the coordinator's matrix without copying it"""
+    global _shard_shm, _shard_X, _shard_thread_limits
+    _shard_shm = SharedMemory(name=shm_name)
+    _shard_X = np.ndarray(shape, dtype=dtype, buffer=_shard_shm.buf)
+    _shard_thread_limits = threadpool_limits(limits=blas_threads)
+
+
+def _squared_distances(block: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    return np.maximum(
+        np.einsum('ij,ij->i', block, block)[:, None]
+        - 2 * block @ centers.T
+        + np.einsum('ij,ij->i', centers, centers)[None, :],
+        0
+    )
+
+
+def _partial_lloyd_step(bounds: Tuple[int, int], centers: np.ndarray,
+                        X: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Per-centroid sums, counts and inertia for one shard"""
+    X = _shard_X if X is None else X
+    block = X[bounds[0]:bounds[1]]
+    sq_dist = _squared_distances(block, centers)
+    nearest = np.argmin(sq_dist, axis=1)
+
+    k = centers.shape[0]
+    counts = np.bincount(nearest, minlength=k).astype(np.float64)
+    sums = np.zeros_like(centers)
+    np.add.at(sums, nearest, block)
+    inertia = float(sq_dist[np.arange(len(block)), nearest].sum())
+    return sums, counts, inertia
+
+
+def _label_shard(bounds: Tuple[int, int], centers: np.ndarray,
+                 X: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+    X = _shard_X if X is None else X
+    block = X[bounds[0]:bounds[1]]
+    sq_dist = _squared_distances(block, centers)
+    nearest = np.argmin(sq_dist, axis=1)
+    return nearest.astype(np.int32), float(sq_dist[np.arange(len(block)), nearest].sum())
+
+
+class ShardedKMeansPool:
+    """
+    Process pool whose workers share one session matrix.
+
+    The matrix is copied once into shared memory; each Lloyd iteration ships
+    only the current centroids to the workers, which reply with per-centroid
+    sums and counts for their shard. Use as a context manager.
+    """
+
+    def __init__(self, X: np.ndarray, n_workers: Optional[int] = None, shards_per_worker: int = 2):
+        self.n_workers = max(1, n_workers or os.cpu_count() or 1)
+        self.shape = X.shape
+        self.dtype = np.dtype(np.float64)
+        n_shards = min(self.n_workers * shards_per_worker, max(1, X.shape[0]))
+        edges = np.linspace(0, X.shape[0], n_shards + 1, dtype=int)
+        self.shards: List[Tuple[int, int]] = [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+        self._local_X = None
+        self._shm = None
+        self._executor = None
+        if self.n_workers == 1:
+            self._local_X = np.ascontiguousarray(X, dtype=self.dtype)
+            return
+
+        self._shm = SharedMemory(create=True, size=max(1, X.size * self.dtype.itemsize))
+        try:
+            # No named view of the segment outlives this line, so close() can release it
+            np.ndarray(X.shape, dtype=self.dtype, buffer=self._shm.buf)[:] = X
+            blas_threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_shared_matrix,
+                initargs=(self._shm.name, X.shape, self.dtype.str, blas_threads)
+            )
+            # Start and attach every worker up front so iterations are not charged for it
+            self.map(_label_shard, np.zeros((1, X.shape[1])))
+        except BaseException:
+            # __exit__ never runs for a failed constructor; don't leak the segment
+            self.close()
+            raise
+
+    def __enter__(self) -> 'ShardedKMeansPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def map(self, fn, centers: np.ndarray) -> list:
+        if self._executor is None:
+            return [fn(bounds, centers, self._local_X) for bounds in self.shards]
+        return list(self._executor.map(fn, self.shards, repeat(centers)))
+
+    def sample(self, size: int, random_state: int) -> np.ndarray:
+        """Uniform sample of rows, read from the coordinator's copy"""
+        X = self._local_X if self._local_X is not None else np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+        if X.shape[0] <= size:
+            return np.array(X)
+        rng = np.random.default_rng(random_state)
+        return X[np.sort(rng.choice(X.shape[0], size=size, replace=False))]
+
+
+class ShardedKMeans:
+    """
+    Data-parallel Lloyd's k-means.
+
+    Workers compute per-centroid sums and counts on their shard and the
+    coordinator reduces them into new centroids. Initialisation is k-means++
+    on a uniform sample. Exposes ``cluster_centers_``, ``labels_``,
+    ``inertia_`` and ``n_iter_`` like sklearn's KMeans.
+    """
+
+    def __init__(self, n_clusters: int, n_workers: Optional[int] = None, max_iter: int = 300,
+                 tol: float = 1e-4, random_state: int = 42, init_sample_size: int = 20000):
+        self.n_clusters = n_clusters
+        self.n_workers = n_workers
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+        self.init_sample_size = init_sample_size
+
+    def fit(self, X: np.ndarray, pool: Optional[ShardedKMeansPool] = None) -> 'ShardedKMeans':
+        if pool is None:
+            with ShardedKMeansPool(X, self.n_workers) as own_pool:
+                return self.fit(X, own_pool)
+
+        sample = pool.sample(self.init_sample_size, self.random_state)
+        centers, _ = kmeans_plusplus(sample, self.n_clusters, random_state=self.random_state)
+        # Same convergence criterion as sklearn: tol relative to the mean feature variance
+        tol = self.tol * float(np.mean(np.var(sample, axis=0)))
+
+        for iteration in range(1, self.max_iter + 1):
+            partials = pool.map(_partial_lloyd_step, centers)
+            sums = sum(p[0] for p in partials)
+            counts = sum(p[1] for p in partials)
+
+            new_centers = centers.copy()
+            non_empty = counts > 0
+            # Empty clusters keep their previous centroid
+            new_centers[non_empty] = sums[non_empty] / counts[non_empty, None]
+            shift = float(np.sum((new_centers - centers) ** 2))
+            centers = new_centers
+            if shift <= tol:
+                break
+
+        labelled = pool.map(_label_shard, centers)
+        self.labels_ = np.concatenate([labels for labels, _ in labelled])
+        self.inertia_ = float(sum(inertia for _, inertia in labelled))
+        self.cluster_centers_ = centers
+        self.n_iter_ = iteration
+        return self
+
+    def fit_predict(self, X: np.ndarray, pool: Optional[ShardedKMeansPool] = None) -> np.ndarray:
+        return self.fit(X, pool).labels_
@@ -1,10 +1,56 @@
 # ml-service/app/schemas.py
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Dict, List, Literal, Optional, Any
+
+from app.utils.packed_arrays import unpack_array
+
+# 2-d float matrix: nested lists in JSON, a packed array in MessagePack
+PackedMatrix = Annotated[Any, BeforeValidator(unpack_array)]
+
+EmotionLabel = Literal['frustrated', 'confused', 'considering', 'neutral', 'excited']
+
+class FeatureModel(BaseModel):
+    # Unknown keys are dropped; NaN/inf and non-numeric values are rejected
+    model_config = ConfigDict(extra='ignore', allow_inf_nan=False)
+
+# Model defaults in each predictor's feature_names order; build_features validates through these
+class EmotionFeatures(FeatureModel):
+    mouse_speed_variance: float = 500
+    avg_mouse_speed: float = 120
+    scroll_depth_changes: float = 50
+    click_hesitation_time: float = 800
+    time_on_page: float = 40000
+
+class AbandonmentFeatures(FeatureModel):
+    time_in_cart: float = 0
+    scroll_percentage: float = 50
+    price_checks: float = 0
+    comparisons: float = 0
+    previous_abandons: float = 0
+    emotion: EmotionLabel = 'neutral'
+    device: Literal['mobile', 'tablet', 'desktop'] = 'desktop'
+    time_of_day: float = 12
+    cart_value: float = 1000
+
+class FraudFeatures(FeatureModel):
+    checkout_speed: float = 60
+    mouse_movements: float = 50
+    failed_payments: float = 0
+    email_pattern_score: float = 0.3
+    location_anomaly: float = 0.2
+
+class PersonaFeatures(FeatureModel):
+    avg_session_duration: float = 300
+    pages_per_session: float = 5
+    cart_adds: float = 1
+    purchases: float = 0
+    price_sensitivity: float = 0.5
+    research_depth: float = 0.5
 
 class EmotionRequest(BaseModel):
-    features: Dict
+    features: EmotionFeatures
     page_url: Optional[str] = None
+    websiteId: Optional[str] = None
 
 class EmotionResponse(BaseModel):
     emotion: str
@@ -12,30 +58,97 @@ class EmotionResponse(BaseModel):
     probabilities: Dict[str, float]
 
 class AbandonmentRequest(BaseModel):
-    features: Dict
+    features: AbandonmentFeatures
+    websiteId: Optional[str] = None
 
 class AbandonmentResponse(BaseModel):
     probability: float
     risk_level: str
     factors: Dict[str, float]
 
+class PredictBatchRequest(BaseModel):
+    # Either typed feature items (see the subclasses) or a matrix in the model's feature order
+    matrix: Optional[PackedMatrix] = None
+    websiteId: Optional[str] = None
+
+class EmotionBatchRequest(PredictBatchRequest):
+    items: Optional[List[EmotionFeatures]] = Field(None, min_length=1)
+
+class AbandonmentBatchRequest(PredictBatchRequest):
+    items: Optional[List[AbandonmentFeatures]] = Field(None, min_length=1)
+
+class FraudBatchRequest(PredictBatchRequest):
+    items: Optional[List[FraudFeatures]] = Field(None, min_length=1)
+
 class PersonaRequest(BaseModel):
-    features: Dict
+    features: PersonaFeatures
     method: str = "kmeans_dynamic"
+    websiteId: Optional[str] = None
 
 class PersonaResponse(BaseModel):
     primary_cluster: str
     secondary_traits: List[str]
     confidence: float
+    # Assignment that answered: "centroid", or "rule_based" (also the fallback without a centroid model)
+    method: str
+    # Fitted centroid that answered; centroids can share a persona label
+    centroid_id: Optional[str] = None
+
+class PersonaBatchRequest(BaseModel):
+    items: List[PersonaFeatures]
+    method: str = "kmeans_dynamic"
+    websiteId: Optional[str] = None
+
+class PersonaBatchResponse(BaseModel):
+    results: List[PersonaResponse]
 
 class FraudRequest(BaseModel):
-    features: Dict
+    features: FraudFeatures = Field(default_factory=FraudFeatures)
+    userId: Optional[str] = None
+    websiteId: Optional[str] = None
 
 class FraudResponse(BaseModel):
     fraud_probability: float
     risk_level: str
     signals: Dict[str, bool]
 
+class FraudEvent(BaseModel):
+    userId: str
+    type: str
+    timestamp: Optional[float] = None
+    location: Optional[str] = None
+
+class FraudEventBatch(BaseModel):
+    events: List[FraudEvent]
+
+class SessionFeatures(EmotionFeatures, AbandonmentFeatures, FraudFeatures):
+    # Without an emotion, abandonment uses the emotion model's prediction
+    emotion: Optional[EmotionLabel] = None
+    timeSpent: float = 0
+    scrollDepth: float = 0
+    clickRate: float = 0
+    sessionHistory: Optional[List[Dict]] = []
+
+class SessionScoreRequest(BaseModel):
+    # One flat behavior payload read by every model
+    features: SessionFeatures = Field(default_factory=SessionFeatures)
+    models: List[Literal['emotion', 'abandonment', 'fraud', 'intent']] = ['emotion', 'abandonment', 'fraud', 'intent']
+    userId: Optional[str] = None
+    websiteId: Optional[str] = None
+    visitorId: Optional[str] = None
+
+class IntentScore(BaseModel):
+    intentScore: float
+    intent: str
+    confidence: float
+    factors: List[str]
+
+class SessionScoreResponse(BaseModel):
+    emotion: Optional[EmotionResponse] = None
+    abandonment: Optional[AbandonmentResponse] = None
+    fraud: Optional[FraudResponse] = None
+    intent: Optional[IntentScore] = None
+
 class SessionData(BaseModel):
     id: str = Field(..., alias='_id')
     intentScore: float = 0.0
@@ -52,17 +165,44 @@ class ClusteringRequest(BaseModel):
     minClusters: Optional[int] = 3
     maxClusters: Optional[int] = 6
 
+# Sessions per chunk of the out-of-core clustering paths; bounds one chunk's memory
+MAX_CHUNK_SIZE = 500000
+
+class ClusteringFileRequest(BaseModel):
+    websiteId: str
+    path: str
+    format: Optional[str] = None
+    chunkSize: int = Field(50000, gt=0, le=MAX_CHUNK_SIZE)
+    minClusters: Optional[int] = 3
+    maxClusters: Optional[int] = 6
+
 class IntentPredictRequest(BaseModel):
     timeSpent: float
     scrollDepth: float
     clickRate: float
     sessionHistory: Optional[List[Dict]] = []
+    # Past sessions come from the server-side visitor state of this site's visitor when tracked
+    websiteId: Optional[str] = None
+    visitorId: Optional[str] = None
+
+class VisitorSession(BaseModel):
+    websiteId: str
+    visitorId: str
+    intentScore: float = Field(..., ge=0, le=1)
+    # Epoch seconds between 2000 and 2100; rejects millisecond epochs and 0
+    timestamp: Optional[float] = Field(None, ge=946684800, le=4102444800)
+
+class VisitorSessionBatch(BaseModel):
+    sessions: List[VisitorSession]
 
 class ContentRecommendationRequest(BaseModel):
     personaType: str
     currentPage: str
     userHistory: Optional[List[str]] = []
 
+class ContentRecommendationBatchRequest(BaseModel):
+    items: List[ContentRecommendationRequest]
+
 class ConfusionDetectionRequest(BaseModel):
     mousePath: List[Dict[str, float]]
     timeOnElements: Dict[str, float]
@@ -73,3 +213,7 @@ class ContentGenerationRequest(BaseModel):
 
 class ContentGenerationResponse(BaseModel):
     generated_content: str
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = None
+    force: bool = False
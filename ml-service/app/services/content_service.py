@@ -1,5 +1,7 @@
+import logging
 import os
 import re # Added for regex matching in error handling
+from typing import Optional
 from openai import OpenAI
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -7,8 +9,15 @@ from google.api_core.exceptions import ResourceExhausted
 # Import new types for safety settings
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+from app.utils.bounded_cache import BoundedLRU
+from app.utils.config import Config
+from app.utils.deadline import has_time, mark_degraded, time_remaining
+from app.utils.log_pipeline import truncate
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Define safety settings to be less restrictive than defaults
 # This helps prevent blocks for reasons other than RECITATION
 SAFETY_SETTINGS = {
@@ -18,9 +27,23 @@ SAFETY_SETTINGS = {
     HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
 }
 
+# Last generated copy per (persona, content type), served when a request deadline is too close
+_recent_content = BoundedLRU(max_entries=1000)
+
+# Generic copy when nothing was generated for the persona yet
+FALLBACK_TEMPLATES = {
+    "headline": "Discover what's new for {persona}",
+    "product_description": "Built for {persona}: everything you need, nothing you don't.",
+    "email_subject": "Picked for you, {persona}",
+    "cta_text": "Explore now",
+    "social_media_post": "Made for {persona}. Take a look.",
+}
+
 class ContentService:
     def __init__(self):
         self.llm_provider = os.getenv("LLM_PROVIDER", "openai").lower()
+        # Below this many seconds left on the request deadline, skip the LLM call
+        self.min_llm_seconds = Config.get_config()["deadline"]["llm_min_seconds"]
 
         if self.llm_provider == "openai":
             self.api_key = os.getenv("OPENAI_API_KEY")
@@ -28,7 +51,7 @@ class ContentService:
                 raise ValueError("OPENAI_API_KEY environment variable not set.")
             self.client = OpenAI(api_key=self.api_key)
             self.model_name = "gpt-4"
-            print("Initialized OpenAI client.")
+            logger.info("Initialized OpenAI client.")
         elif self.llm_provider == "gemini":
             self.api_key = os.getenv("GEMINI_API_KEY")
             if not self.api_key:
@@ -43,13 +66,37 @@ class ContentService:
     def list_gemini_models(self):
         """Lists available Gemini models and their capabilities."""
         if self.llm_provider == "gemini" and self.client:
-            print("\n--- Listing available Gemini models ---")
             for m in self.client.list_models():
                 if "generateContent" in m.supported_generation_methods:
-                    print(f"Model: {m.name}, Supported methods: {m.supported_generation_methods}")
-            print("--- End of Gemini models list ---\n")
+                    logger.info("Gemini model %s supports %s", m.name, m.supported_generation_methods)
 
     def generate_persona_content(self, persona: str, content_type: str):
+        """
+        Generates content using the selected LLM. When the request deadline
+        leaves too little time, or the call overruns it, returns the last copy
+        generated for the persona or a template instead.
+        """
+        remaining = time_remaining()
+        if remaining is not None and remaining < self.min_llm_seconds:
+            return self._fallback_content(persona, content_type)
+        try:
+            content = self._generate(persona, content_type, timeout=remaining)
+        except Exception:
+            if has_time():
+                raise
+            return self._fallback_content(persona, content_type)
+        _recent_content.put((persona, content_type), content)
+        return content
+
+    def _fallback_content(self, persona: str, content_type: str) -> str:
+        mark_degraded("llm.content_generation")
+        cached = _recent_content.get((persona, content_type))
+        if cached is not None:
+            return cached
+        template = FALLBACK_TEMPLATES.get(content_type, "Discover solutions made for {persona}.")
+        return template.format(persona=persona)
+
+    def _generate(self, persona: str, content_type: str, timeout: Optional[float] = None):
         """Generates content using the selected LLM with improved error handling."""
         prompt = self._build_prompt(persona, content_type)
         try:
@@ -62,6 +109,7 @@ class ContentService:
                     ],
                     max_tokens=10000000000000000000,
                     temperature=0.7,
+                    timeout=timeout,
                 )
                 return response.choices[0].message.content.strip()
             elif self.llm_provider == "gemini":
@@ -78,11 +126,13 @@ class ContentService:
                         "max_output_tokens": max_tokens,
                         "temperature": 0.75,
                     },
-                    safety_settings=SAFETY_SETTINGS
+                    safety_settings=SAFETY_SETTINGS,
+                    request_options={"timeout": timeout} if timeout is not None else None
                 )
 
                 if not response.candidates:
-                    print(f"Gemini generation failed: No candidates returned. Prompt: '{prompt}'")
+                    logger.warning("Gemini generation failed: no candidates returned",
+                                   extra={"content_type": content_type, "prompt": truncate(prompt, 200)})
                     raise ValueError("Content generation failed: No candidates returned from the model, possibly due to severe safety filters.")
 
                 try:
@@ -90,15 +140,16 @@ class ContentService:
                 except ValueError:
                     finish_reason_name = response.candidates[0].finish_reason.name if response.candidates[0].finish_reason else "UNKNOWN"
                     error_detail = f"Content generation blocked by the model. Finish Reason: {finish_reason_name}."
-                    print(error_detail)
+                    logger.warning(error_detail, extra={"content_type": content_type})
                     raise ValueError(error_detail)
 
         except ResourceExhausted:
             error_message = "Gemini API quota exceeded. Please check your plan and billing details."
-            print(error_message)
+            logger.warning(error_message)
             raise ValueError(error_message)
         except Exception as e:
-            print(f"An unexpected error occurred during content generation: {e}")
+            logger.error("Unexpected error during content generation: %s", truncate(str(e), 500),
+                         extra={"provider": self.llm_provider, "content_type": content_type})
             raise e
 
     def _build_prompt(self, persona_description: str, content_type: str) -> str:
@@ -0,0 +1,176 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.utils.bounded_cache import BoundedLRU
+
+# Compact integer codes for the event types tracked per user
+EVENT_TYPES = {
+    'checkout': 0,
+    'payment_attempt': 1,
+    'payment_failed': 2,
+    'payment_succeeded': 3,
+    'login': 4
+}
+
+
+class UserEventBuffer:
+    """
+    Fixed-size ring buffer of one user's recent events with running
+    per-type counts over the aggregation window. Events are kept in
+    timestamp order, so expiry only ever looks at the oldest one.
+    """
+
+    __slots__ = ('events', 'counts', 'locations')
+
+    def __init__(self, capacity: int):
+        # (timestamp, type_code, location)
+        self.events = deque(maxlen=capacity)
+        self.counts = [0] * len(EVENT_TYPES)
+        self.locations: Dict[str, int] = {}
+
+    def add(self, timestamp: float, type_code: int, location: Optional[str]) -> bool:
+        """
+        Insert an event in timestamp order. Returns False, keeping nothing,
+        for an event older than everything in a full buffer.
+        """
+        events = self.events
+        if len(events) == events.maxlen:
+            if timestamp < events[0][0]:
+                return False
+            self._forget(events.popleft())
+        # Late events are rare and land near the end; scan back from there
+        position = len(events)
+        while position and events[position - 1][0] > timestamp:
+            position -= 1
+        events.insert(position, (timestamp, type_code, location))
+        self.counts[type_code] += 1
+        if location:
+            self.locations[location] = self.locations.get(location, 0) + 1
+        return True
+
+    def expire(self, cutoff: float) -> None:
+        """Drop events older than ``cutoff`` (amortized O(1) per event)"""
+        while self.events and self.events[0][0] < cutoff:
+            self._forget(self.events.popleft())
+
+    def _forget(self, event: tuple) -> None:
+        _, type_code, location = event
+        self.counts[type_code] -= 1
+        if location:
+            remaining = self.locations[location] - 1
+            if remaining:
+                self.locations[location] = remaining
+            else:
+                del self.locations[location]
+
+
+class FraudStateStore:
+    """
+    In-memory rolling per-user aggregates for fraud scoring.
+
+    Each user owns a bounded ring buffer, users idle for longer than ``ttl``
+    are evicted and at most ``max_users`` buffers are kept, so memory is
+    capped at roughly ``max_users * buffer_size`` events. Timestamps are
+    epoch seconds; events more than ``allowed_skew`` seconds in the future
+    (including millisecond epochs) are rejected, since they would never
+    leave the window.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        ttl: float = 86400,
+        max_users: int = 100000,
+        buffer_size: int = 64,
+        allowed_skew: float = 300
+    ):
+        self.window_seconds = window_seconds
+        self.allowed_skew = allowed_skew
+        self.buffer_size = buffer_size
+        self.users = BoundedLRU(max_entries=max_users, ttl=ttl, clock=time.time)
+        self.ingested = 0
+        self.rejected = 0
+
+    def ingest(self, events: List[Dict]) -> int:
+        """Record a batch of events; returns how many were accepted"""
+        now = time.time()
+        cutoff = now - self.window_seconds
+        latest = now + self.allowed_skew
+        accepted = 0
+
+        for event in events:
+            type_code = EVENT_TYPES.get(event.get('type'))
+            timestamp = event.get('timestamp')
+            if timestamp is None:
+                timestamp = now
+            # Millisecond epochs are far past ``latest`` and fail here too
+            if type_code is None or not cutoff <= timestamp <= latest:
+                self.rejected += 1
+                continue
+
+            user_id = event['userId']
+            buffer = self.users.get(user_id)
+            if buffer is None:
+                buffer = UserEventBuffer(self.buffer_size)
+            buffer.expire(cutoff)
+            if not buffer.add(timestamp, type_code, event.get('location')):
+                self.rejected += 1
+                continue
+            # Re-inserting refreshes the user's TTL
+            self.users.put(user_id, buffer)
+            accepted += 1
+
+        self.ingested += accepted
+        return accepted
+
+    def aggregates(self, user_id: str) -> Optional[Dict[str, int]]:
+        """Windowed aggregates for a user, or None if nothing is tracked"""
+        buffer = self.users.get(user_id)
+        if buffer is None:
+            return None
+        buffer.expire(time.time() - self.window_seconds)
+
+        counts = buffer.counts
+        return {
+            'checkouts': counts[EVENT_TYPES['checkout']],
+            'payment_attempts': counts[EVENT_TYPES['payment_attempt']],
+            'failed_payments': counts[EVENT_TYPES['payment_failed']],
+            'successful_payments': counts[EVENT_TYPES['payment_succeeded']],
+            'logins': counts[EVENT_TYPES['login']],
+            'distinct_locations': len(buffer.locations),
+            'events_in_window': len(buffer.events)
+        }
+
+    def derived_features(self, user_id: Optional[str]) -> Dict:
+        """Fraud features derived from the user's rolling aggregates (empty if untracked)"""
+        if not user_id:
+            return {}
+        stats = self.aggregates(user_id)
+        if stats is None:
+            return {}
+
+        return {
+            'failed_payments': stats['failed_payments'],
+            # Each extra location seen inside the window raises the anomaly score
+            'location_anomaly': min(max(stats['distinct_locations'] - 1, 0) / 2, 1.0)
+        }
+
+    def enrich_features(self, user_id: Optional[str], features):
+        """
+        Fill fraud features the caller did not send from the user's rolling
+        aggregates. ``features`` is a validated feature model; fields set
+        explicitly on it always win.
+        """
+        derived = self.derived_features(user_id)
+        update = {k: v for k, v in derived.items() if k not in features.model_fields_set}
+        return features.model_copy(update=update) if update else features
+
+    def stats(self) -> Dict:
+        return {
+            'tracked_users': len(self.users),
+            'max_events': (self.users.max_entries or 0) * self.buffer_size,
+            'ingested': self.ingested,
+            'rejected': self.rejected,
+            **{f'users_{k}': v for k, v in self.users.stats().items() if k in ('evictions', 'expirations')}
+        }
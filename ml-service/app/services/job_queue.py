@@ -0,0 +1,175 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested"""
+
+
+class Job:
+    """State of one submitted job"""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_type: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        """
+        Progress callback for the job's work. Doubles as the cancellation
+        point: raises JobCancelled once a cancel was requested.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = max(self.progress, min(float(progress), 1.0))
+        if message:
+            self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'jobId': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'error': self.error,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at
+        }
+
+
+class JobBackend(ABC):
+    """Executes job callables off the request path"""
+
+    @abstractmethod
+    def submit(self, fn: Callable[[], None]) -> None:
+        """Run ``fn`` eventually, without blocking the caller"""
+
+    @abstractmethod
+    def shutdown(self) -> None:
+        """Stop accepting work and drop what has not started"""
+
+
+class LocalJobBackend(JobBackend):
+    """In-process worker pool"""
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ml-job')
+
+    def submit(self, fn: Callable[[], None]) -> None:
+        self.executor.submit(fn)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+JOB_BACKENDS = {
+    'local': LocalJobBackend
+}
+
+
+class JobManager:
+    """
+    Tracks jobs submitted to a backend. Finished jobs are kept for
+    ``result_ttl`` seconds so callers can fetch their result.
+    """
+
+    def __init__(self, backend: JobBackend, result_ttl: float = 3600, max_jobs: int = 1000):
+        self.backend = backend
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue ``fn(*args, job=job, **kwargs)``; ``fn`` should call
+        ``job.report`` periodically to publish progress and honour cancels.
+        """
+        self._purge()
+        with self._lock:
+            if sum(1 for job in self._jobs.values() if not job.done) >= self.max_jobs:
+                raise RuntimeError("Too many pending jobs, try again later.")
+            job = Job(kind)
+            self._jobs[job.id] = job
+
+        self.backend.submit(lambda: self._run(job, fn, args, kwargs))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job._cancel.set()
+        if job.status == 'queued':
+            self._finish(job, 'cancelled')
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        if job._cancel.is_set():
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, job=job, **kwargs)
+            job.progress = 1.0
+            self._finish(job, 'succeeded')
+        except JobCancelled:
+            self._finish(job, 'cancelled')
+        except ValueError as e:
+            job.error, job.error_type = str(e), 'validation'
+            self._finish(job, 'failed')
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+            job.error, job.error_type = str(e), 'internal'
+            self._finish(job, 'failed')
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in list(self._jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+
+def create_job_manager(backend: str = 'local', workers: int = 2,
+                       result_ttl: float = 3600, max_jobs: int = 1000) -> JobManager:
+    if backend not in JOB_BACKENDS:
+        raise ValueError(f"Unsupported job backend: {backend}. Use one of {list(JOB_BACKENDS)}.")
+    return JobManager(JOB_BACKENDS[backend](max_workers=workers), result_ttl=result_ttl, max_jobs=max_jobs)
@@ -1,7 +1,10 @@
+import logging
 import os
 from typing import Dict, Any, List
 from openai import OpenAI
 
+logger = logging.getLogger(__name__)
+
 class LLMService:
     """
     LLM service for content generation using OpenAI
@@ -51,7 +54,7 @@ class LLMService:
             }
             
         except Exception as e:
-            print(f"LLM generation error: {e}")
+            logger.warning("LLM generation error: %s", e)
             return {
                 "content": self._fallback_content(persona_context),
                 "alternatives": []
@@ -98,7 +101,7 @@ Write compelling, concise copy (max 50 words) that resonates with this persona."
             return alternatives[:2]
             
         except Exception as e:
-            print(f"Alternative generation error: {e}")
+            logger.warning("Alternative generation error: %s", e)
             return []
 
     def _fallback_content(self, persona_context: Dict) -> str:
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import joblib
+
+from app.utils.config import Config
+
+# Models produced by the offline training pipeline
+REGISTRY_MODELS = ('emotion', 'abandonment', 'fraud')
+
+MODEL_FILE = 'model.pkl'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+LEGACY_MODEL_DIR = 'trained_models'
+
+
+class ModelRegistry:
+    """
+    Content-addressed model artifacts under ``<root>/<model>/<version>/``.
+
+    A version is the SHA-256 prefix of the pickled files, so republishing an
+    identical model reuses its directory. Each version holds a
+    ``manifest.json`` (features, classes, data hash, metrics) and the
+    ``CURRENT`` file of a model names the version serving loads.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or Config.get_config()['inference']['artifact_dir']
+
+    def _model_dir(self, name: str) -> str:
+        if name not in REGISTRY_MODELS:
+            raise ValueError(f"Unknown model: {name}. Use one of {REGISTRY_MODELS}.")
+        return os.path.join(self.root, name)
+
+    def artifact_path(self, name: str, version: str, filename: str = MODEL_FILE) -> str:
+        return os.path.join(self._model_dir(name), version, filename)
+
+    def manifest(self, name: str, version: str) -> Optional[Dict]:
+        path = self.artifact_path(name, version, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def versions(self, name: str) -> List[Dict]:
+        """Manifests of every published version, oldest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        manifests = [self.manifest(name, version) for version in os.listdir(model_dir)]
+        return sorted((m for m in manifests if m), key=lambda m: m['created_at'])
+
+    def current(self, name: str) -> Optional[str]:
+        path = os.path.join(self._model_dir(name), CURRENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            version = f.read().strip()
+        return version if os.path.exists(self.artifact_path(name, version)) else None
+
+    def set_current(self, name: str, version: str) -> None:
+        if self.manifest(name, version) is None:
+            raise ValueError(f"No {name} artifact with version {version}")
+        path = os.path.join(self._model_dir(name), CURRENT_FILE)
+        with open(path + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(path + '.tmp', path)
+
+    def find(self, name: str, training_key: str) -> Optional[str]:
+        """Version already trained from the same data and parameters, if any"""
+        for manifest in reversed(self.versions(name)):
+            if manifest.get('training_key') == training_key:
+                return manifest['version']
+        return None
+
+    def publish(self, name: str, artifacts: Dict[str, object], manifest: Dict,
+                activate: bool = True) -> str:
+        """Pickle ``artifacts`` (filename -> object), write the manifest and return the version"""
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=model_dir)
+        try:
+            digest = hashlib.sha256()
+            for filename in sorted(artifacts):
+                path = os.path.join(staging, filename)
+                joblib.dump(artifacts[filename], path)
+                digest.update(filename.encode())
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            version = digest.hexdigest()[:16]
+
+            target = os.path.join(model_dir, version)
+            if not os.path.exists(target):
+                manifest = {
+                    **manifest,
+                    'model': name,
+                    'version': version,
+                    'files': sorted(artifacts),
+                    'created_at': time.time()
+                }
+                with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        if activate:
+            self.set_current(name, version)
+        return version
+
+
+def resolve_model_path(name: str, filename: str = MODEL_FILE,
+                       registry: Optional[ModelRegistry] = None) -> Optional[str]:
+    """
+    Path of the serving artifact for ``name``: the registry's current
+    version, else the legacy ``trained_models/<name>_model.pkl`` layout.
+    """
+    registry = registry or ModelRegistry()
+    version = registry.current(name)
+    if version is not None:
+        path = registry.artifact_path(name, version, filename)
+        return path if os.path.exists(path) else None
+
+    stem = 'model' if filename == MODEL_FILE else os.path.splitext(filename)[0]
+    legacy = os.path.join(LEGACY_MODEL_DIR, f'{name}_{stem}.pkl')
+    return legacy if os.path.exists(legacy) else None
+
+
+def resolve_model_version(name: str, registry: Optional[ModelRegistry] = None) -> str:
+    """Version label of what ``resolve_model_path`` serves"""
+    return (registry or ModelRegistry()).current(name) or 'legacy'
@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from app.models.onnx_backend import load_onnx_classifier, onnx_backend_enabled, onnx_model_path
+from app.services.model_registry import LEGACY_MODEL_DIR, REGISTRY_MODELS, ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ModelReloader:
+    """
+    Hot-swap new artifact versions into the serving predictors.
+
+    A reload loads the artifact off the request path, runs a few warm-up
+    inferences to validate it, then replaces the predictor's model in a
+    single assignment; requests already running keep the model they
+    started with. A model whose backend is ``onnx`` is reloaded from the
+    version's ONNX export, never silently from its pickle. The replaced
+    models stay in memory so a rollback is instant. An optional watcher
+    polls the registry's ``CURRENT`` pointers (and the legacy pickles, and
+    ONNX exports) and reloads on change.
+    """
+
+    def __init__(self, predictors: Dict[str, Any], registry: Optional[ModelRegistry] = None,
+                 watch: bool = False, watch_interval: float = 5.0,
+                 warmup_rows: int = 32, history_size: int = 3):
+        self.predictors = predictors
+        self.registry = registry or ModelRegistry()
+        self.watch_interval = watch_interval
+        self.warmup_rows = warmup_rows
+        self._locks = {name: threading.Lock() for name in predictors}
+        self.history = {name: deque(maxlen=history_size) for name in predictors}
+        self.last_reload: Dict[str, Dict] = {}
+
+        self._stop = threading.Event()
+        self._watcher = None
+        self._seen = {}
+        if watch:
+            self.start_watcher()
+
+    def _check_name(self, name: str) -> None:
+        if name not in self.predictors:
+            raise ValueError(f"Unknown model: {name}. Use one of {tuple(self.predictors)}.")
+
+    def _paths(self, name: str, version: str) -> Tuple[str, str]:
+        if version == 'legacy':
+            return (os.path.join(LEGACY_MODEL_DIR, f'{name}_model.pkl'),
+                    os.path.join(LEGACY_MODEL_DIR, f'{name}_stage1.pkl'))
+        return (self.registry.artifact_path(name, version),
+                self.registry.artifact_path(name, version, 'stage1.pkl'))
+
+    def _warm_up(self, name: str, model) -> float:
+        """Run single-row and batch inferences; raise ValueError if the model is unusable"""
+        predictor = self.predictors[name]
+        base = np.array(predictor.build_features({}), dtype=np.float64)
+        rng = np.random.default_rng(0)
+        X = base * rng.uniform(0.5, 1.5, size=(self.warmup_rows, base.size))
+
+        start = time.perf_counter()
+        for row in X[:8]:
+            model.predict_proba(row[None, :])
+        probabilities = model.predict_proba(X)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        classes = np.asarray(model.classes_)
+        if probabilities.shape != (len(X), len(classes)):
+            raise ValueError(f"{name} model returned probabilities of shape {probabilities.shape}")
+        if not np.all(np.isfinite(probabilities)) or not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3):
+            raise ValueError(f"{name} model returned invalid probabilities")
+        if name == 'emotion':
+            if not set(classes.tolist()) <= set(range(len(predictor.emotions))):
+                raise ValueError(f"emotion model has unknown classes {classes.tolist()}")
+        elif len(classes) != 2:
+            raise ValueError(f"{name} model must be binary, got classes {classes.tolist()}")
+        return elapsed_ms
+
+    def _load_model(self, name: str, version: str, model_path: str) -> Tuple[Any, str]:
+        """The version's model in the configured backend, and that backend"""
+        if not onnx_backend_enabled(name):
+            return joblib.load(model_path), 'sklearn'
+        model = load_onnx_classifier(name, version, self.registry)
+        if model is None:
+            raise ValueError(f"No usable ONNX export of {name} version {version}; "
+                             f"run `python -m app.cli.export_onnx --models {name}`")
+        return model, 'onnx'
+
+    def _swap(self, name: str, model, stage1: Optional[Dict], version: str, backend: str) -> None:
+        predictor = self.predictors[name]
+        if name == 'abandonment':
+            predictor.swap_model(model, version, stage1=stage1, backend=backend)
+        else:
+            predictor.swap_model(model, version, backend=backend)
+
+    def reload(self, name: str, version: Optional[str] = None, force: bool = False) -> Dict:
+        """
+        Load ``version`` (default: the registry's current one, else the
+        legacy pickle), warm it up and swap it in. An explicit version is
+        also made the registry's current one.
+        """
+        self._check_name(name)
+        with self._locks[name]:
+            predictor = self.predictors[name]
+            target = version or self.registry.current(name) or 'legacy'
+            previous = predictor.model_version
+            # A predictor that fell back to sklearn for want of an export is not up to date
+            backend_matches = predictor.backend == ('onnx' if onnx_backend_enabled(name) else 'sklearn')
+            if target == previous and backend_matches and not force:
+                return {'model': name, 'version': target, 'previousVersion': previous, 'changed': False}
+
+            # Only published versions are loadable; the id never reaches the path unchecked
+            published = {m['version'] for m in self.registry.versions(name)}
+            model_path, stage1_path = self._paths(name, target) if target in published | {'legacy'} else (None, None)
+            if model_path is None or not os.path.exists(model_path):
+                raise ValueError(f"No {name} artifact for version {target}")
+
+            start = time.perf_counter()
+            model, backend = self._load_model(name, target, model_path)
+            stage1 = joblib.load(stage1_path) if name == 'abandonment' and os.path.exists(stage1_path) else None
+            warmup_ms = self._warm_up(name, model)
+
+            self.history[name].append(
+                (predictor.model, getattr(predictor, 'stage1', None), previous, predictor.backend)
+            )
+            self._swap(name, model, stage1, target, backend)
+            if version is not None and version != 'legacy':
+                self.registry.set_current(name, version)
+
+            result = {
+                'model': name,
+                'version': target,
+                'previousVersion': previous,
+                'backend': backend,
+                'changed': True,
+                'warmupMs': round(warmup_ms, 2),
+                'loadMs': round((time.perf_counter() - start) * 1000, 2),
+                'reloadedAt': time.time()
+            }
+            self.last_reload[name] = result
+            logger.info(f"Reloaded {name} model {previous} -> {target} on {backend} (warm-up {warmup_ms:.1f}ms)")
+            return result
+
+    def rollback(self, name: str) -> Dict:
+        """Swap back to the version served before the last reload"""
+        self._check_name(name)
+        with self._locks[name]:
+            if not self.history[name]:
+                raise ValueError(f"No previous {name} model to roll back to")
+            predictor = self.predictors[name]
+            previous = predictor.model_version
+            model, stage1, version, backend = self.history[name].pop()
+            self._swap(name, model, stage1, version, backend)
+            if version in {m['version'] for m in self.registry.versions(name)}:
+                self.registry.set_current(name, version)
+
+            result = {
+                'model': name,
+                'version': version,
+                'previousVersion': previous,
+                'backend': backend,
+                'changed': True,
+                'rolledBack': True,
+                'reloadedAt': time.time()
+            }
+            self.last_reload[name] = result
+            logger.info(f"Rolled back {name} model {previous} -> {version}")
+            return result
+
+    def _signature(self, name: str) -> Tuple[Optional[str], Optional[float], Optional[float]]:
+        current = self.registry.current(name)
+        path = self._paths(name, current or 'legacy')[0]
+        # An export landing after its version was published triggers a retry
+        onnx_path = onnx_model_path(name, current or 'legacy', self.registry) if onnx_backend_enabled(name) else None
+        return (current, os.path.getmtime(path) if os.path.exists(path) else None,
+                os.path.getmtime(onnx_path) if onnx_path and os.path.exists(onnx_path) else None)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.watch_interval):
+            for name in self.predictors:
+                try:
+                    signature = self._signature(name)
+                    if signature != self._seen.get(name):
+                        self._seen[name] = signature
+                        # A rewritten legacy pickle keeps its version label
+                        self.reload(name, force=signature[0] is None)
+                except Exception:
+                    logger.exception(f"Watcher failed to reload the {name} model")
+
+    def start_watcher(self) -> None:
+        if self._watcher is not None:
+            return
+        self._seen = {name: self._signature(name) for name in self.predictors}
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def status(self) -> Dict:
+        models = {}
+        for name, predictor in self.predictors.items():
+            registry_versions = self.registry.versions(name) if name in REGISTRY_MODELS else []
+            models[name] = {
+                'version': predictor.model_version,
+                'backend': predictor.backend,
+                'registryCurrent': self.registry.current(name),
+                'rollbackVersions': [version for _, _, version, _ in reversed(self.history[name])],
+                'lastReload': self.last_reload.get(name),
+                'available': [
+                    {
+                        'version': m['version'],
+                        'createdAt': m['created_at'],
+                        'estimator': m.get('estimator'),
+                        'rows': m.get('data', {}).get('rows'),
+                        'metrics': m.get('metrics')
+                    }
+                    for m in registry_versions
+                ]
+            }
+        return {'watching': self._watcher is not None, 'models': models}
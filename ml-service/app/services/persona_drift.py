@@ -0,0 +1,272 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.utils.bounded_cache import BoundedLRU
+
+logger = logging.getLogger(__name__)
+
+# Scaled-feature spread below this is treated as this, so a feature that
+# was constant in the baseline does not turn any change into infinite drift
+MIN_BASELINE_STD = 0.1
+
+
+def _js_divergence(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence of two distributions, in [0, 1] (base-2)"""
+    m = (p + q) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kl_p = np.where(p > 0, p * np.log2(p / m), 0.0).sum()
+        kl_q = np.where(q > 0, q * np.log2(q / m), 0.0).sum()
+    return float((kl_p + kl_q) / 2)
+
+
+class WebsiteDrift:
+    """
+    Online statistics of one website's persona assignments against one
+    centroid model, all in the model's scaled feature space.
+
+    The first ``baseline_sessions`` assignments fix the baseline: the
+    per-feature mean and spread, the share of sessions per centroid and the
+    mean distance to the assigned centroid. After that, the same statistics
+    are tracked with exponential decay (half-life in sessions) and compared
+    with the baseline. The most recent raw rows are kept in a ring buffer
+    for refitting.
+    """
+
+    def __init__(self, model: Any, n_features: int, sample_size: int):
+        self.model = model
+        n_clusters = len(model.centroids_)
+        self.sessions = 0
+        # Baseline accumulators (plain sums), frozen once the warm-up is done
+        self.baseline_n = 0
+        self.baseline_sum = np.zeros(n_features)
+        self.baseline_sum_sq = np.zeros(n_features)
+        self.baseline_counts = np.zeros(n_clusters)
+        self.baseline_distance = 0.0
+        # Decayed accumulators over sessions after the baseline
+        self.weight = 0.0
+        self.sum = np.zeros(n_features)
+        self.sum_sq = np.zeros(n_features)
+        self.counts = np.zeros(n_clusters)
+        self.distance = 0.0
+        # Ring buffer of recent raw feature rows
+        self.sample = np.empty((sample_size, n_features))
+        self.sample_rows = 0
+        self.refit_job = None
+        self.last_refit_at = 0.0
+
+    def observe(self, X: np.ndarray, Z: np.ndarray, nearest: np.ndarray, distance: np.ndarray,
+                baseline_sessions: int, decay: float) -> None:
+        self.sessions += len(X)
+        self._remember(X)
+
+        warmup = min(max(baseline_sessions - self.baseline_n, 0), len(Z))
+        if warmup:
+            self.baseline_n += warmup
+            self.baseline_sum += Z[:warmup].sum(axis=0)
+            self.baseline_sum_sq += (Z[:warmup] ** 2).sum(axis=0)
+            self.baseline_counts += np.bincount(nearest[:warmup], minlength=len(self.counts))
+            self.baseline_distance += float(distance[:warmup].sum())
+        Z, nearest, distance = Z[warmup:], nearest[warmup:], distance[warmup:]
+        if not len(Z):
+            return
+
+        # The batch arrives together: age the old sums by its size, then add it
+        factor = decay ** len(Z)
+        self.weight = self.weight * factor + len(Z)
+        self.sum = self.sum * factor + Z.sum(axis=0)
+        self.sum_sq = self.sum_sq * factor + (Z ** 2).sum(axis=0)
+        self.counts = self.counts * factor + np.bincount(nearest, minlength=len(self.counts))
+        self.distance = self.distance * factor + float(distance.sum())
+
+    def _remember(self, X: np.ndarray) -> None:
+        size = len(self.sample)
+        X = X[-size:]
+        start = self.sample_rows % size
+        end = start + len(X)
+        if end <= size:
+            self.sample[start:end] = X
+        else:
+            split = size - start
+            self.sample[start:] = X[:split]
+            self.sample[:end - size] = X[split:]
+        self.sample_rows += len(X)
+
+    def recent_rows(self, limit: int) -> np.ndarray:
+        """Up to ``limit`` of the most recent raw rows, oldest first"""
+        size = len(self.sample)
+        count = min(self.sample_rows, size, limit)
+        end = self.sample_rows % size
+        indices = (np.arange(end - count, end) + size) % size
+        return self.sample[indices]
+
+    def report(self, baseline_sessions: int, min_sessions: int, limits: Dict[str, float]) -> Dict:
+        report = {
+            'sessions': self.sessions,
+            'baselineSessions': self.baseline_n,
+            'effectiveSessions': round(self.weight, 1),
+            'driftScore': None
+        }
+        if self.baseline_n < baseline_sessions:
+            report['status'] = 'warming_up'
+            return report
+        if self.weight < min_sessions:
+            report['status'] = 'collecting'
+            return report
+
+        base_mean = self.baseline_sum / self.baseline_n
+        base_std = np.sqrt(np.maximum(self.baseline_sum_sq / self.baseline_n - base_mean ** 2, 0))
+        mean = self.sum / self.weight
+        std = np.sqrt(np.maximum(self.sum_sq / self.weight - mean ** 2, 0))
+        shift = (mean - base_mean) / np.maximum(base_std, MIN_BASELINE_STD)
+
+        base_shares = self.baseline_counts / self.baseline_n
+        shares = self.counts / self.weight
+        base_distance = self.baseline_distance / self.baseline_n
+        distance = self.distance / self.weight
+
+        components = {
+            # RMS of per-feature mean shifts, in baseline standard deviations
+            'featureShift': float(np.sqrt(np.mean(shift ** 2))),
+            'assignmentShift': _js_divergence(base_shares, shares),
+            # Relative growth of the mean distance to the assigned centroid
+            'distanceShift': max(distance / base_distance - 1, 0.0) if base_distance > 0 else 0.0
+        }
+        report.update({
+            'status': 'ok',
+            'driftScore': round(max(components[name] / limits[name] for name in components), 4),
+            'components': {name: round(value, 4) for name, value in components.items()},
+            'featureMeans': np.round(mean, 4).tolist(),
+            'featureStds': np.round(std, 4).tolist(),
+            # Keyed by centroid id; several centroids can share a persona label
+            'clusterShares': {
+                centroid_id: {'persona': persona, 'baseline': round(float(b), 4), 'current': round(float(c), 4)}
+                for centroid_id, persona, b, c in zip(self.model.centroid_ids, self.model.personas, base_shares, shares)
+            },
+            'meanDistance': {'baseline': round(base_distance, 4), 'current': round(distance, 4)}
+        })
+        return report
+
+
+class PersonaDriftMonitor:
+    """
+    Per-website drift of live persona assignments from the centroid model
+    that produced them, with refits scheduled only when behavior shifts.
+
+    ``observe`` is fed every centroid assignment made for a website. Once
+    the drift score reaches ``threshold`` (each component divided by its
+    limit, so 1.0 means some component hit its limit), ``submit_refit`` is
+    called with the website id, the recent raw rows and the cluster count,
+    at most once per ``refit_cooldown`` seconds and never while a refit is
+    pending. A new model for the website starts a new baseline.
+    """
+
+    def __init__(
+        self,
+        submit_refit: Optional[Callable[[str, np.ndarray, int], Any]] = None,
+        enabled: bool = True,
+        auto_refit: bool = True,
+        threshold: float = 1.0,
+        feature_shift_limit: float = 0.5,
+        assignment_shift_limit: float = 0.1,
+        distance_shift_limit: float = 0.3,
+        half_life_sessions: float = 2000,
+        baseline_sessions: int = 1000,
+        min_sessions: int = 500,
+        sample_size: int = 5000,
+        refit_cooldown: float = 3600,
+        max_websites: int = 10000,
+        ttl: float = 7 * 86400
+    ):
+        self.submit_refit = submit_refit
+        self.enabled = enabled
+        self.auto_refit = auto_refit
+        self.threshold = threshold
+        self.limits = {
+            'featureShift': feature_shift_limit,
+            'assignmentShift': assignment_shift_limit,
+            'distanceShift': distance_shift_limit
+        }
+        self.decay = math.pow(0.5, 1 / half_life_sessions)
+        self.refit_rows = int(2 * half_life_sessions)
+        self.baseline_sessions = baseline_sessions
+        self.min_sessions = min_sessions
+        self.sample_size = sample_size
+        self.refit_cooldown = refit_cooldown
+        self.websites = BoundedLRU(max_entries=max_websites, ttl=ttl, clock=time.time)
+        self._lock = threading.Lock()
+        self.refits = 0
+
+    def observe(self, website_id: str, model: Any, X: np.ndarray,
+                nearest: np.ndarray, distance: np.ndarray) -> None:
+        """Record centroid assignments of raw rows ``X`` made by ``model``"""
+        if not self.enabled or not website_id or not len(X):
+            return
+        X = np.asarray(X, dtype=np.float64)
+        Z = (X - model.mean_) / model.scale_
+        with self._lock:
+            state = self.websites.get(website_id)
+            if state is None or state.model is not model:
+                previous = state
+                state = WebsiteDrift(model, X.shape[1], self.sample_size)
+                if previous is not None:
+                    # Keep the refit bookkeeping across the model change
+                    state.refit_job, state.last_refit_at = previous.refit_job, previous.last_refit_at
+            state.observe(X, Z, np.asarray(nearest), np.asarray(distance), self.baseline_sessions, self.decay)
+            self.websites.put(website_id, state)
+            if self.auto_refit and self.submit_refit is not None:
+                self._maybe_refit(website_id, state)
+
+    def _maybe_refit(self, website_id: str, state: WebsiteDrift) -> None:
+        if state.refit_job is not None and not state.refit_job.done:
+            return
+        if time.time() - state.last_refit_at < self.refit_cooldown:
+            return
+        report = state.report(self.baseline_sessions, self.min_sessions, self.limits)
+        if report['driftScore'] is None or report['driftScore'] < self.threshold:
+            return
+
+        # Rows older than two half-lives barely count in the current statistics
+        rows = state.recent_rows(self.refit_rows)
+        try:
+            state.refit_job = self.submit_refit(website_id, rows, len(state.model.centroids_))
+        except RuntimeError as e:
+            # Job queue full; the next assignment tries again
+            logger.warning("Could not schedule persona refit for %s: %s", website_id, e)
+            return
+        state.last_refit_at = time.time()
+        self.refits += 1
+        logger.info(
+            "Scheduled persona refit for %s", website_id,
+            extra={'drift_score': report['driftScore'], 'components': report['components'], 'rows': len(rows)}
+        )
+
+    def report(self, website_id: str) -> Optional[Dict]:
+        """Drift report for a website, or None if none of its sessions were observed"""
+        with self._lock:
+            state = self.websites.get(website_id)
+            if state is None:
+                return None
+            report = state.report(self.baseline_sessions, self.min_sessions, self.limits)
+            job = state.refit_job
+        report.update({
+            'threshold': self.threshold,
+            'limits': self.limits,
+            'lastRefitAt': state.last_refit_at or None,
+            'refitJob': job.to_dict() if job is not None else None
+        })
+        return report
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'auto_refit': self.auto_refit,
+            'tracked_websites': len(self.websites),
+            'refits_scheduled': self.refits,
+            **{f'websites_{k}': v for k, v in self.websites.stats().items() if k in ('evictions', 'expirations')}
+        }
+
@@ -0,0 +1,121 @@
+import weakref
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.utils.bounded_cache import BoundedLRU
+from app.utils.config import Config
+
+
+def parse_steps(spec: str) -> Dict[str, float]:
+    """``"name=step,name=step"`` (an env override) as a dict"""
+    steps = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        steps[name.strip()] = float(value)
+    return steps
+
+
+class PredictionCache:
+    """
+    LRU of per-row model scores keyed by the feature vector quantized to a
+    per-feature step (0 = exact). Rows in the same bucket share the score
+    computed for the first of them to miss, whether later rows arrive in the
+    same batch or a later one, so steps should stay below what moves a
+    prediction.
+
+    Keys include the identity of the model that produced the entry, so one
+    cache serves the global and every tenant model of a kind within a single
+    entry limit. Entries hold their model weakly and only hit for that same
+    model, so an evicted tenant model is never kept alive by the cache;
+    predictors also clear the cache when a new model is swapped in.
+    """
+
+    def __init__(self, feature_names: Sequence[str], default_steps: Dict[str, float],
+                 overrides: Optional[Dict[str, float]] = None,
+                 max_entries: int = 100000, ttl: Optional[float] = 300):
+        steps = {**default_steps, **(overrides or {})}
+        unknown = set(steps) - set(feature_names)
+        if unknown:
+            raise ValueError(f"Unknown features in cache steps: {sorted(unknown)}")
+        self.steps = np.array([steps.get(name, 0.0) for name in feature_names], dtype=np.float64)
+        self._quantized = self.steps > 0
+        self._divisors = np.where(self._quantized, self.steps, 1.0)
+        self.entries = BoundedLRU(max_entries=max_entries, ttl=ttl)
+
+    def _keys(self, X: np.ndarray, model: Any):
+        Q = np.where(self._quantized, np.round(X / self._divisors), X)
+        # -0.0 and 0.0 must share a bucket
+        Q = np.ascontiguousarray(Q + 0.0)
+        prefix = id(model).to_bytes(8, 'little')
+        return [prefix + row.tobytes() for row in Q]
+
+    def scores(self, X: np.ndarray, model: Any, compute: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        ``compute(X)`` (one row of scores per input row) through the cache;
+        only the first row of each missing bucket is computed, in one call,
+        and its score is fanned out to the rest of the bucket.
+        """
+        if len(X) == 0:
+            return compute(X)
+        keys = self._keys(X, model)
+        cached = [self.entries.get(key) for key in keys]
+        # A dead reference means the id was reused by another model
+        cached = [entry if entry is not None and entry[0]() is model else None for entry in cached]
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+
+        # The first row of each missing bucket stands in for the others
+        representatives = []
+        slot: Dict[bytes, int] = {}
+        for i in missing:
+            if keys[i] not in slot:
+                slot[keys[i]] = len(representatives)
+                representatives.append(i)
+
+        computed = compute(X[representatives]) if missing else None
+        if computed is not None:
+            out = np.empty((len(X),) + computed.shape[1:], dtype=computed.dtype)
+            out[missing] = computed[[slot[keys[i]] for i in missing]]
+            ref = weakref.ref(model)
+            for i, row in zip(representatives, computed):
+                self.entries.put(keys[i], (ref, row))
+        else:
+            out = np.empty((len(X),) + cached[0][1].shape, dtype=cached[0][1].dtype)
+        for i, entry in enumerate(cached):
+            if entry is not None:
+                out[i] = entry[1]
+        return out
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            'steps': self.steps.tolist(),
+            **self.entries.stats()
+        }
+
+
+# Predictor name -> the cache shared by its global and tenant instances
+_shared_caches: Dict[str, PredictionCache] = {}
+
+
+def create_prediction_cache(name: str, feature_names: Sequence[str],
+                            default_steps: Dict[str, float]) -> Optional[PredictionCache]:
+    """
+    The configured cache for predictor ``name``, or None when caching is off.
+    Every instance of a predictor (global and per tenant) gets the same one.
+    """
+    settings = Config.get_config()["prediction_cache"]
+    if not settings["enabled"]:
+        return None
+    cache = _shared_caches.get(name)
+    if cache is None:
+        cache = _shared_caches.setdefault(name, PredictionCache(
+            feature_names,
+            default_steps,
+            overrides=parse_steps(settings["steps"].get(name, "")),
+            max_entries=settings["max_entries"],
+            ttl=settings["ttl"]
+        ))
+    return cache
@@ -0,0 +1,130 @@
+import json
+import os
+from typing import IO, Callable, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+# Column defaults mirroring SessionData
+SESSION_DEFAULTS = {
+    'intentScore': 0.0,
+    'avgScrollDepth': 0.0,
+    'totalClicks': 0,
+    'pageViews': 0,
+    'totalTimeSpent': 0
+}
+
+SUPPORTED_FORMATS = ('ndjson', 'parquet')
+
+Source = Union[str, IO[bytes]]
+
+
+def detect_format(source: Source, fmt: Optional[str] = None) -> str:
+    """Resolve the input format from an explicit value or the file extension"""
+    if fmt:
+        fmt = fmt.lower()
+        fmt = 'ndjson' if fmt in ('jsonl', 'json') else fmt
+    elif isinstance(source, str):
+        ext = os.path.splitext(source)[1].lower()
+        fmt = 'parquet' if ext in ('.parquet', '.pq') else 'ndjson'
+    else:
+        fmt = 'ndjson'
+
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported session format: {fmt}. Use one of {SUPPORTED_FORMATS}.")
+    return fmt
+
+
+def _normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Give a raw chunk the columns and types UserClustering expects"""
+    if 'id' not in df.columns and '_id' in df.columns:
+        df = df.rename(columns={'_id': 'id'})
+    if 'id' not in df.columns:
+        raise ValueError("Session records must have an 'id' or '_id' field.")
+    df['id'] = df['id'].astype(str)
+
+    for column, default in SESSION_DEFAULTS.items():
+        df[column] = df[column].fillna(default) if column in df.columns else default
+
+    if 'pagesVisited' in df.columns:
+        # Parquet list columns arrive as numpy arrays
+        df['pagesVisited'] = df['pagesVisited'].apply(lambda pages: list(pages) if pages is not None and not isinstance(pages, float) else [])
+    else:
+        df['pagesVisited'] = [[] for _ in range(len(df))]
+    if 'device' not in df.columns:
+        df['device'] = None
+
+    return df.set_index('id')
+
+
+def _iter_ndjson_records(stream: IO[bytes], chunk_size: int) -> Iterator[List[Dict]]:
+    """Parse NDJSON lines into lists of at most ``chunk_size`` records"""
+    rows = []
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if len(rows) >= chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def _iter_parquet_batches(source: Source, chunk_size: int):
+    """Record batches of at most ``chunk_size`` rows from a Parquet source"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet input requires pyarrow to be installed.")
+
+    return pq.ParquetFile(source).iter_batches(batch_size=chunk_size)
+
+
+def _iter_ndjson(stream: IO[bytes], chunk_size: int) -> Iterator[pd.DataFrame]:
+    for rows in _iter_ndjson_records(stream, chunk_size):
+        yield _normalize_chunk(pd.DataFrame(rows))
+
+
+def _iter_parquet(source: Source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for batch in _iter_parquet_batches(source, chunk_size):
+        yield _normalize_chunk(batch.to_pandas())
+
+
+def session_chunk_reader(source: Source, fmt: Optional[str] = None,
+                         chunk_size: int = 50000) -> Callable[[], Iterator[pd.DataFrame]]:
+    """
+    Return a factory that streams ``source`` as DataFrames of at most
+    ``chunk_size`` sessions, indexed by session id. Each call starts a fresh
+    pass over the input, so seekable sources can be read more than once.
+    """
+    fmt = detect_format(source, fmt)
+
+    def open_chunks() -> Iterator[pd.DataFrame]:
+        if fmt == 'parquet':
+            if not isinstance(source, str):
+                source.seek(0)
+            yield from _iter_parquet(source, chunk_size)
+        elif isinstance(source, str):
+            with open(source, 'rb') as f:
+                yield from _iter_ndjson(f, chunk_size)
+        else:
+            source.seek(0)
+            yield from _iter_ndjson(source, chunk_size)
+
+    return open_chunks
+
+
+def iter_record_chunks(path: str, fmt: Optional[str] = None,
+                       chunk_size: int = 10000) -> Iterator[List[Dict]]:
+    """Stream raw records from a JSONL or Parquet file as lists of dicts"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'parquet':
+        for batch in _iter_parquet_batches(path, chunk_size):
+            yield batch.to_pylist()
+    else:
+        with open(path, 'rb') as f:
+            yield from _iter_ndjson_records(f, chunk_size)
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.abandonment_model import FEATURE_EXTRACTOR as ABANDONMENT_EXTRACTOR
+from app.models.emotion_model import FEATURE_EXTRACTOR as EMOTION_EXTRACTOR
+from app.models.fraud_model import FEATURE_EXTRACTOR as FRAUD_EXTRACTOR
+from app.models.intent_scoring import IntentScorer
+from app.schemas import SessionFeatures
+
+SCORE_MODELS = ('emotion', 'abandonment', 'fraud', 'intent')
+
+
+class SessionScorer:
+    """
+    Score one behavior payload with several models in a single pass.
+
+    The payload is one validated ``SessionFeatures`` model shared by every
+    model; each model's ``FEATURE_EXTRACTOR`` reads its own columns from it
+    once. Intent is plain arithmetic and is scored inline on the event loop
+    first. Emotion and abandonment then run as one chain (the predicted
+    emotion feeds abandonment unless the payload has one), concurrently in
+    the threadpool with fraud, which does not depend on them.
+    """
+
+    def __init__(self, tenant_models, fraud_state, visitor_state=None, intent_scorer: Optional[IntentScorer] = None):
+        self.tenant_models = tenant_models
+        self.fraud_state = fraud_state
+        self.visitor_state = visitor_state
+        self.intent_scorer = intent_scorer or IntentScorer()
+
+    async def _emotion_chain(self, features: SessionFeatures, models: Iterable[str],
+                             website_id: Optional[str]) -> Dict[str, Any]:
+        results = {}
+        needs_emotion = 'abandonment' in models and features.emotion is None
+        if 'emotion' in models or needs_emotion:
+            predictor = self.tenant_models.get('emotion', website_id)
+            X = EMOTION_EXTRACTOR.vector(features)
+            results['emotion'] = (await run_in_threadpool(predictor.predict_encoded, X))[0]
+        if 'abandonment' in models:
+            if needs_emotion:
+                features = features.model_copy(update={'emotion': results['emotion']['emotion']})
+            predictor = self.tenant_models.get('abandonment', website_id)
+            X = ABANDONMENT_EXTRACTOR.vector(features)
+            results['abandonment'] = (await run_in_threadpool(predictor.predict_encoded, X))[0]
+        if 'emotion' not in models:
+            results.pop('emotion', None)
+        return results
+
+    async def _fraud(self, features: SessionFeatures, website_id: Optional[str],
+                     user_id: Optional[str]) -> Dict[str, Any]:
+        X = FRAUD_EXTRACTOR.vector(self.fraud_state.enrich_features(user_id, features))
+        predictor = self.tenant_models.get('fraud', website_id)
+        return (await run_in_threadpool(predictor.predict_encoded, X))[0]
+
+    def _intent(self, features: SessionFeatures, website_id: Optional[str], visitor_id: Optional[str]) -> Dict:
+        history = self.visitor_state.summary(website_id, visitor_id) if self.visitor_state is not None else None
+        result = self.intent_scorer.predict(
+            time_spent=features.timeSpent,
+            scroll_depth=features.scrollDepth,
+            click_rate=features.clickRate,
+            session_history=features.sessionHistory or [],
+            visitor_state=history
+        )
+        return {
+            'intentScore': result['intent_score'],
+            'intent': result['intent_level'],
+            'confidence': result['confidence'],
+            'factors': result['factors']
+        }
+
+    async def score(self, features: SessionFeatures, models: Iterable[str] = SCORE_MODELS,
+                    website_id: Optional[str] = None, user_id: Optional[str] = None,
+                    visitor_id: Optional[str] = None) -> Dict[str, Any]:
+        models = set(models)
+        unknown = models - set(SCORE_MODELS)
+        if unknown:
+            raise ValueError(f"Unknown models: {sorted(unknown)}. Use any of {SCORE_MODELS}.")
+
+        results = {}
+        if 'intent' in models:
+            # Pure arithmetic; not worth a thread hop
+            results['intent'] = self._intent(features, website_id, visitor_id)
+
+        tasks = []
+        if models & {'emotion', 'abandonment'}:
+            tasks.append(self._emotion_chain(features, models, website_id))
+        if 'fraud' in models:
+            tasks.append(self._fraud(features, website_id, user_id))
+        outputs = await asyncio.gather(*tasks)
+        if models & {'emotion', 'abandonment'}:
+            results.update(outputs[0])
+        if 'fraud' in models:
+            results['fraud'] = outputs[-1]
+        return results
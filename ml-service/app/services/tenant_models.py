@@ -0,0 +1,162 @@
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.models.abandonment_model import AbandonmentPredictor
+from app.models.emotion_model import EmotionPredictor
+from app.models.fraud_model import FraudDetector
+from app.models.persona_clustering import PersonaClustering
+from app.utils.bounded_cache import BoundedLRU
+
+logger = logging.getLogger(__name__)
+
+# kind -> (loader, artifact file name inside the tenant directory)
+TENANT_MODEL_KINDS: Dict[str, tuple] = {
+    'emotion': (lambda path: EmotionPredictor(model_path=path), 'emotion_model.pkl'),
+    'abandonment': (lambda path: AbandonmentPredictor(model_path=path), 'abandonment_model.pkl'),
+    'fraud': (lambda path: FraudDetector(model_path=path), 'fraud_model.pkl'),
+    'persona': (lambda path: PersonaClustering(model_path=path), 'persona_centroids.npz')
+}
+
+# Loads of keys hashing to the same stripe are serialized
+LOAD_LOCK_STRIPES = 64
+
+
+class TenantModelCache:
+    """
+    Per-website models with a memory budget.
+
+    Tenant artifacts live under ``<model_dir>/<websiteId>/`` and are loaded
+    lazily on first use. Resident models are evicted least-recently-used once
+    their estimated size exceeds the budget, and reloaded from disk on the
+    next request. Sites without their own artifact get the global model.
+    """
+
+    def __init__(
+        self,
+        global_models: Dict[str, Any],
+        model_dir: str = 'trained_models/tenants',
+        memory_budget_bytes: int = 512 * 1024 * 1024,
+        size_factor: float = 2.0,
+        missing_ttl: float = 60
+    ):
+        self.global_models = global_models
+        self.model_dir = model_dir
+        # In-memory footprint estimate relative to the artifact's size on disk
+        self.size_factor = size_factor
+        self.resident = BoundedLRU(max_weight=memory_budget_bytes)
+        # Remember tenants without an artifact so hot paths skip the stat call
+        self.missing = BoundedLRU(max_entries=100000, ttl=missing_ttl)
+        # Fixed set of striped locks: memory stays constant however many ids callers send
+        self._load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
+
+        self.loads = 0
+        self.load_failures = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def is_valid_website_id(website_id: Optional[str]) -> bool:
+        """Whether ``website_id`` can name a tenant directory"""
+        return bool(website_id) and os.sep not in website_id and not website_id.startswith('.')
+
+    def artifact_path(self, kind: str, website_id: str) -> str:
+        return os.path.join(self.model_dir, website_id, TENANT_MODEL_KINDS[kind][1])
+
+    def get(self, kind: str, website_id: Optional[str]) -> Any:
+        """Tenant model for ``website_id`` if one exists, else the global model"""
+        if not self.is_valid_website_id(website_id):
+            return self.global_models[kind]
+
+        key = (kind, website_id)
+        model = self.resident.get(key)
+        if model is not None:
+            return model
+        if self.missing.get(key):
+            self.fallbacks += 1
+            return self.global_models[kind]
+
+        return self._load(key) or self.global_models[kind]
+
+    def previous_artifact_path(self, kind: str, website_id: str) -> str:
+        root, ext = os.path.splitext(self.artifact_path(kind, website_id))
+        return f"{root}.previous{ext}"
+
+    def publish(self, kind: str, website_id: str, save: Callable[[str], None]) -> str:
+        """
+        Replace a tenant artifact with the one ``save(path)`` writes. The
+        artifact it replaces is kept so ``rollback`` can restore it; the next
+        request loads the new one.
+        """
+        path = self.artifact_path(kind, website_id)
+        root, ext = os.path.splitext(path)
+        staging = f"{root}.staging{ext}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save(staging)
+        if os.path.exists(path):
+            # Copy rather than move, so readers never see the artifact missing
+            shutil.copy2(path, self.previous_artifact_path(kind, website_id))
+        os.replace(staging, path)
+        self.invalidate(website_id, kind)
+        return path
+
+    def rollback(self, kind: str, website_id: str) -> bool:
+        """Restore the artifact replaced by the last ``publish``; False if there is none"""
+        previous = self.previous_artifact_path(kind, website_id)
+        if not os.path.exists(previous):
+            return False
+        os.replace(previous, self.artifact_path(kind, website_id))
+        self.invalidate(website_id, kind)
+        return True
+
+    def invalidate(self, website_id: str, kind: Optional[str] = None) -> None:
+        """Drop resident models so the next request reloads from disk"""
+        kinds = [kind] if kind else list(TENANT_MODEL_KINDS)
+        for k in kinds:
+            self.resident.pop((k, website_id))
+            self.missing.pop((k, website_id))
+
+    def _lock_for(self, key: tuple) -> threading.Lock:
+        return self._load_locks[hash(key) % len(self._load_locks)]
+
+    def _load(self, key: tuple) -> Optional[Any]:
+        kind, website_id = key
+        # One loader per lock stripe; concurrent requests for a key wait for it instead of loading twice
+        with self._lock_for(key):
+            model = self.resident.get(key)
+            if model is not None:
+                return model
+
+            path = self.artifact_path(kind, website_id)
+            if not os.path.exists(path):
+                self.missing.put(key, True)
+                self.fallbacks += 1
+                return None
+
+            loader: Callable[[str], Any] = TENANT_MODEL_KINDS[kind][0]
+            try:
+                model = loader(path)
+            except Exception as e:
+                logger.warning(f"Failed to load {kind} model for website {website_id}: {e}")
+                self.load_failures += 1
+                self.missing.put(key, True)
+                return None
+
+            self.resident.put(key, model, weight=int(os.path.getsize(path) * self.size_factor))
+            self.loads += 1
+            return model
+
+    def stats(self) -> Dict[str, Any]:
+        resident_stats = self.resident.stats()
+        return {
+            'resident_models': resident_stats['size'],
+            'resident_tenants': len({website_id for _, website_id in self.resident.keys()}),
+            'resident_bytes': resident_stats['weight'],
+            'memory_budget_bytes': self.resident.max_weight,
+            'hits': resident_stats['hits'],
+            'loads': self.loads,
+            'load_failures': self.load_failures,
+            'evictions': resident_stats['evictions'],
+            'global_fallbacks': self.fallbacks
+        }
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import (GradientBoostingClassifier, HistGradientBoostingClassifier,
+                              RandomForestClassifier)
+from sklearn.linear_model import Ridge
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.models.abandonment_model import FEATURE_RANGES, AbandonmentPredictor
+from app.models.emotion_model import EMOTIONS, EmotionPredictor
+from app.models.fraud_model import FraudDetector
+from app.models.onnx_backend import (OnnxClassifier, check_parity, export_to_onnx, onnx_backend_enabled,
+                                     onnx_model_path)
+from app.services.model_registry import ModelRegistry
+from app.services.session_reader import iter_record_chunks
+
+logger = logging.getLogger(__name__)
+
+# Request-shaped records are encoded exactly as serving encodes them
+FEATURE_BUILDERS: Dict[str, Callable[[Dict], List[float]]] = {
+    'emotion': EmotionPredictor.build_features,
+    'abandonment': AbandonmentPredictor.build_features,
+    'fraud': FraudDetector.build_features
+}
+
+FEATURE_NAMES = {
+    'emotion': ['mouse_speed_variance', 'avg_mouse_speed', 'scroll_depth_changes',
+                'click_hesitation_time', 'time_on_page'],
+    'abandonment': ['time_in_cart', 'scroll_percentage', 'price_checks', 'comparisons',
+                    'previous_abandons', 'emotion_score', 'device_score',
+                    'time_of_day_score', 'cart_value_score'],
+    'fraud': ['checkout_speed', 'mouse_movements', 'failed_payments',
+              'email_pattern_score', 'location_anomaly']
+}
+
+# Bootstrap data the predictors used to train on at startup; it only keeps a
+# fresh checkout servable until a labelled dataset is available
+SEED_DATA = {
+    'emotion': (
+        [
+            [1200, 250, 80, 500, 45000],   # frustrated
+            [400, 80, 20, 2000, 60000],    # confused
+            [600, 180, 90, 200, 30000],    # excited
+            [500, 120, 50, 800, 40000],    # neutral
+            [300, 100, 30, 1500, 80000]    # considering
+        ],
+        [0, 1, 2, 3, 4]
+    ),
+    'abandonment': (
+        [
+            [300, 45, 5, 3, 2, 0.7, 0.5, 0.8, 0.6],  # High risk
+            [120, 80, 2, 1, 0, 0.3, 0.8, 0.5, 0.9],  # Low risk
+            [600, 30, 8, 5, 3, 0.9, 0.3, 0.9, 0.4],  # High risk
+            [180, 70, 3, 2, 1, 0.4, 0.7, 0.6, 0.8],  # Medium risk
+            [450, 40, 6, 4, 2, 0.8, 0.4, 0.7, 0.5]   # High risk
+        ],
+        [1, 0, 1, 0, 1]  # 1=abandon, 0=convert
+    ),
+    'fraud': (
+        [
+            [5, 0, 3, 0.9, 0.8],    # High fraud
+            [120, 50, 0, 0.1, 0.2], # Low fraud
+            [8, 2, 2, 0.7, 0.6],    # Medium fraud
+            [180, 80, 0, 0.2, 0.1], # Low fraud
+            [3, 0, 4, 0.95, 0.9]    # High fraud
+        ],
+        [1, 0, 1, 0, 1]
+    )
+}
+
+# Estimators the seed models were built with
+SEED_ESTIMATORS = {
+    'emotion': ('rf', {'n_estimators': 100, 'max_depth': 10}),
+    'abandonment': ('gbm', {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5}),
+    'fraud': ('rf', {'n_estimators': 100, 'max_depth': 8})
+}
+
+DEFAULT_PARAMS = {
+    # Histogram gradient boosting: binned features, OpenMP across all cores
+    'hgb': {'max_iter': 200, 'learning_rate': 0.1, 'early_stopping': 'auto'},
+    # Forest trees are built in parallel on every core
+    'rf': {'n_estimators': 200, 'min_samples_leaf': 5, 'n_jobs': -1},
+    'gbm': {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5}
+}
+
+ESTIMATORS = {
+    'hgb': HistGradientBoostingClassifier,
+    'rf': RandomForestClassifier,
+    'gbm': GradientBoostingClassifier
+}
+
+
+def build_estimator(kind: str, params: Optional[Dict] = None, random_state: int = 42):
+    if kind not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator: {kind}. Use one of {tuple(ESTIMATORS)}.")
+    return ESTIMATORS[kind](random_state=random_state, **(params or {}))
+
+
+def encode_label(name: str, value) -> int:
+    """Class index for a label: emotion names or indices, 0/1 or booleans otherwise"""
+    if name == 'emotion' and isinstance(value, str):
+        if value not in EMOTIONS:
+            raise ValueError(f"Unknown emotion label: {value}")
+        return EMOTIONS.index(value)
+    return int(value)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_dataset(name: str, path: str, label_column: str = 'label',
+                 fmt: Optional[str] = None, chunk_size: int = 50000) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode a labelled JSONL or Parquet file chunk by chunk into compact arrays"""
+    build = FEATURE_BUILDERS[name]
+    X_parts, y_parts = [], []
+    for chunk in iter_record_chunks(path, fmt, chunk_size):
+        rows = [record for record in chunk if record.get(label_column) is not None]
+        if not rows:
+            continue
+        X_parts.append(np.array([build(record) for record in rows], dtype=np.float32))
+        y_parts.append(np.array([encode_label(name, record[label_column]) for record in rows], dtype=np.int64))
+
+    if not X_parts:
+        raise ValueError(f"No records with a '{label_column}' label in {path}")
+    return np.concatenate(X_parts), np.concatenate(y_parts)
+
+
+def distill_stage1(model, n_samples: int = 20000) -> Dict:
+    """Distil the abandonment cascade's linear first stage from the model's log-odds"""
+    rng = np.random.default_rng(42)
+    low, high = np.array(FEATURE_RANGES, dtype=float).T
+    X = rng.uniform(low, high, size=(n_samples, len(FEATURE_RANGES)))
+
+    p = np.clip(model.predict_proba(X)[:, 1], 1e-4, 1 - 1e-4)
+    log_odds = np.log(p / (1 - p))
+
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    scale[scale == 0] = 1.0
+    ridge = Ridge(alpha=1.0).fit((X - mean) / scale, log_odds)
+
+    # Fold the scaling into the weights so scoring is a single dot product
+    return {
+        'coef': ridge.coef_ / scale,
+        'intercept': float(ridge.intercept_ - np.sum(ridge.coef_ * mean / scale))
+    }
+
+
+def _evaluate(model, X: np.ndarray, y: np.ndarray) -> Dict:
+    probabilities = model.predict_proba(X)
+    metrics = {
+        'accuracy': float(accuracy_score(y, model.classes_[probabilities.argmax(axis=1)])),
+        'log_loss': float(log_loss(y, probabilities, labels=model.classes_))
+    }
+    if len(model.classes_) == 2 and len(np.unique(y)) == 2:
+        metrics['roc_auc'] = float(roc_auc_score(y, probabilities[:, 1]))
+    return metrics
+
+
+def export_version_onnx(name: str, model, version: str, registry: ModelRegistry,
+                        X: np.ndarray, atol: float = 1e-4) -> Optional[str]:
+    """
+    Export ``version`` to ONNX next to its pickle, so an ONNX-served model
+    follows retrains. The export is kept only if it matches sklearn on ``X``.
+    """
+    path = onnx_model_path(name, version, registry)
+    try:
+        export_to_onnx(model, path)
+        report = check_parity(model, OnnxClassifier(path), X.astype(np.float32), atol=atol)
+    except Exception as e:
+        # The published pickle stays usable; only the ONNX backend lacks this version
+        logger.warning(f"Could not export {name} version {version} to ONNX: {e}")
+        return None
+    if not report['passed']:
+        os.remove(path)
+        logger.warning(f"ONNX export of {name} version {version} failed the parity check", extra=report)
+        return None
+    return path
+
+
+def train_and_publish(name: str, X: np.ndarray, y: np.ndarray, data_hash: str,
+                      estimator: str = 'hgb', params: Optional[Dict] = None,
+                      holdout: float = 0.1, registry: Optional[ModelRegistry] = None,
+                      force: bool = False, activate: bool = True, source: Optional[str] = None) -> Dict:
+    """
+    Train ``name`` on (X, y) and publish it to the registry. Training is
+    skipped when a version built from the same data and parameters exists.
+    """
+    registry = registry or ModelRegistry()
+    params = dict(DEFAULT_PARAMS.get(estimator, {}) if params is None else params)
+    training_key = hashlib.sha256(json.dumps(
+        {'data': data_hash, 'estimator': estimator, 'params': params, 'holdout': holdout},
+        sort_keys=True
+    ).encode()).hexdigest()
+
+    existing = None if force else registry.find(name, training_key)
+    if existing is not None:
+        if activate:
+            registry.set_current(name, existing)
+        return {'model': name, 'version': existing, 'skipped': True}
+
+    # Tiny datasets (the seed) are evaluated on the training rows
+    can_split = holdout > 0 and len(y) * holdout >= len(np.unique(y)) and np.bincount(y).min() >= 2
+    if can_split:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=holdout, random_state=42, stratify=y
+        )
+    else:
+        X_train, X_test, y_train, y_test = X, X, y, y
+
+    start = time.perf_counter()
+    model = build_estimator(estimator, params).fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+
+    artifacts = {'model.pkl': model}
+    if name == 'abandonment':
+        artifacts['stage1.pkl'] = distill_stage1(model)
+
+    version = registry.publish(name, artifacts, {
+        'features': FEATURE_NAMES[name],
+        'classes': [int(c) for c in model.classes_],
+        'estimator': estimator,
+        'params': params,
+        'training_key': training_key,
+        'data': {'hash': data_hash, 'source': source, 'rows': int(len(y))},
+        'metrics': {
+            **_evaluate(model, X_test, y_test),
+            'evaluated_on': 'holdout' if can_split else 'train',
+            'train_rows': int(len(y_train)),
+            'train_seconds': round(train_seconds, 3)
+        },
+        'sklearn_version': sklearn.__version__
+    }, activate=activate)
+
+    result = {'model': name, 'version': version, 'skipped': False}
+    if onnx_backend_enabled(name):
+        result['onnx'] = export_version_onnx(name, model, version, registry, X_test)
+    return result
+
+
+def train_from_file(name: str, path: str, label_column: str = 'label', fmt: Optional[str] = None,
+                    chunk_size: int = 50000, **kwargs) -> Dict:
+    data_hash = hashlib.sha256(f"{file_hash(path)}:{label_column}".encode()).hexdigest()
+    X, y = load_dataset(name, path, label_column, fmt, chunk_size)
+    return train_and_publish(name, X, y, data_hash, source=path, **kwargs)
+
+
+def train_seed(name: str, **kwargs) -> Dict:
+    """Publish the bootstrap model trained on the built-in seed rows"""
+    rows, labels = SEED_DATA[name]
+    X, y = np.array(rows, dtype=np.float64), np.array(labels)
+    estimator, params = SEED_ESTIMATORS[name]
+    data_hash = hashlib.sha256(X.tobytes() + y.tobytes()).hexdigest()
+    return train_and_publish(name, X, y, data_hash, estimator=estimator, params=params,
+                             holdout=0.0, source='seed', **kwargs)
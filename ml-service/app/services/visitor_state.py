@@ -0,0 +1,111 @@
+import math
+import time
+from typing import Dict, List, Optional
+
+from app.utils.bounded_cache import BoundedLRU
+
+
+class VisitorState:
+    """
+    Constant-size summary of one visitor's past sessions.
+
+    Sessions are points (x, intent) with x the session index counted back
+    from the latest (0, -1, -2, ...). The weighted sums of a least-squares
+    fit are kept with every older session down-weighted by ``decay``, so the
+    decayed intent mean and the intent slope per session both come out of
+    five floats updated in O(1) per session.
+    """
+
+    __slots__ = ('sessions', 'first_seen', 'last_seen', 'w', 'wx', 'wy', 'wxx', 'wxy')
+
+    def __init__(self, timestamp: float):
+        self.sessions = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.w = self.wx = self.wy = self.wxx = self.wxy = 0.0
+
+    def add(self, intent: float, timestamp: float, decay: float) -> None:
+        # Shift existing points one session back (x -> x - 1), then decay them
+        self.wxx = (self.wxx - 2 * self.wx + self.w) * decay
+        self.wxy = (self.wxy - self.wy) * decay
+        self.wx = (self.wx - self.w) * decay
+        self.wy *= decay
+        self.w *= decay
+        # The new session sits at x = 0, so it only adds to w and wy
+        self.w += 1.0
+        self.wy += intent
+        self.sessions += 1
+        self.first_seen = min(self.first_seen, timestamp)
+        self.last_seen = max(self.last_seen, timestamp)
+
+    def intent_mean(self) -> float:
+        return self.wy / self.w if self.w else 0.0
+
+    def intent_slope(self) -> float:
+        """Weighted least-squares slope of intent per session (0 with < 2 sessions)"""
+        denominator = self.w * self.wxx - self.wx * self.wx
+        if self.sessions < 2 or denominator <= 1e-12:
+            return 0.0
+        return (self.w * self.wxy - self.wx * self.wy) / denominator
+
+
+class VisitorStateStore:
+    """
+    In-memory per-visitor session summaries for intent scoring, keyed by
+    ``(websiteId, visitorId)`` so sites sharing visitor ids stay apart.
+
+    Clients record each finished session once instead of resending the whole
+    history with every prediction. Visitors idle for longer than ``ttl`` are
+    evicted and at most ``max_visitors`` summaries are kept.
+    """
+
+    def __init__(self, half_life_sessions: float = 5, ttl: float = 30 * 86400, max_visitors: int = 200000):
+        self.half_life_sessions = half_life_sessions
+        self.decay = math.pow(0.5, 1 / half_life_sessions)
+        self.visitors = BoundedLRU(max_entries=max_visitors, ttl=ttl, clock=time.time)
+        self.recorded = 0
+
+    def record(self, sessions: List[Dict]) -> int:
+        """
+        Fold finished sessions (``websiteId``, ``visitorId``, ``intentScore``,
+        ``timestamp`` in epoch seconds) into their visitors' state
+        """
+        now = time.time()
+        for session in sessions:
+            key = (session['websiteId'], session['visitorId'])
+            timestamp = session.get('timestamp')
+            # Missing means now; a client clock running ahead is clamped to it
+            timestamp = now if timestamp is None else min(timestamp, now)
+            state = self.visitors.get(key)
+            if state is None:
+                state = VisitorState(timestamp)
+            state.add(float(session.get('intentScore') or 0.0), timestamp, self.decay)
+            # Re-inserting refreshes the visitor's TTL
+            self.visitors.put(key, state)
+        self.recorded += len(sessions)
+        return len(sessions)
+
+    def summary(self, website_id: Optional[str], visitor_id: Optional[str]) -> Optional[Dict]:
+        """Session count, decayed intent mean and trend for a site's visitor, or None if untracked"""
+        if not website_id or not visitor_id:
+            return None
+        state = self.visitors.get((website_id, visitor_id))
+        if state is None:
+            return None
+        days_active = max((state.last_seen - state.first_seen) / 86400, 1.0)
+        return {
+            'sessions': state.sessions,
+            'intentMean': round(state.intent_mean(), 4),
+            'intentTrend': round(state.intent_slope(), 4),
+            'daysSinceFirstVisit': round((time.time() - state.first_seen) / 86400, 2),
+            'visitsPerDay': round(state.sessions / days_active, 4)
+        }
+
+    def stats(self) -> Dict:
+        return {
+            'tracked_visitors': len(self.visitors),
+            'max_visitors': self.visitors.max_entries,
+            'half_life_sessions': self.half_life_sessions,
+            'recorded_sessions': self.recorded,
+            **{f'visitors_{k}': v for k, v in self.visitors.stats().items() if k in ('evictions', 'expirations')}
+        }
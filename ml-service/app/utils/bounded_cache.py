@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class BoundedLRU:
+    """
+    Thread-safe LRU mapping with optional TTL and weight budget.
+
+    Entries are evicted least-recently-used first once ``max_entries`` or
+    ``max_weight`` is exceeded, and expire ``ttl`` seconds after their last
+    write. Weights come from ``weigher(value)`` unless passed to ``put``.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_weight: Optional[int] = None,
+        weigher: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.on_evict = on_evict
+        self.clock = clock
+
+        # key -> (value, expires_at, weight)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._weight = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[1] is not None and entry[1] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, weight: Optional[int] = None) -> None:
+        if weight is None:
+            weight = self.weigher(value) if self.weigher else 1
+        expires_at = self.clock() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            if key in self._data:
+                self._weight -= self._data[key][2]
+            self._data[key] = (value, expires_at, weight)
+            self._data.move_to_end(key)
+            self._weight += weight
+            self._enforce_limits()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][0]
+            self._remove(key)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+
+    def evict_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed"""
+        if self.ttl is None:
+            return 0
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, entry in self._data.items() if entry[1] <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def weight(self) -> int:
+        return self._weight
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "weight": self._weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        value, _, weight = self._data.pop(key)
+        self._weight -= weight
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def _enforce_limits(self) -> None:
+        # Never evict the entry that was just written
+        while len(self._data) > 1 and (
+            (self.max_entries is not None and len(self._data) > self.max_entries) or
+            (self.max_weight is not None and self._weight > self.max_weight)
+        ):
+            oldest = next(iter(self._data))
+            if self._data[oldest][1] is not None and self._data[oldest][1] <= self.clock():
+                self.expirations += 1
+            else:
+                self.evictions += 1
+            self._remove(oldest)
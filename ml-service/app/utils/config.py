@@ -16,7 +16,23 @@ class Config:
             "ml": {
                 "min_clusters": int(os.getenv("MIN_CLUSTERS", 3)),
                 "max_clusters": int(os.getenv("MAX_CLUSTERS", 6)),
-                "clustering_algorithm": os.getenv("CLUSTERING_ALGORITHM", "kmeans")
+                "clustering_algorithm": os.getenv("CLUSTERING_ALGORITHM", "kmeans"),
+                # Parallel k-search: workers (0 = all cores), BLAS threads per
+                # worker (0 = cores / workers) and the input size that enables it
+                "clustering_n_jobs": int(os.getenv("CLUSTERING_N_JOBS", 0)),
+                "clustering_blas_threads": int(os.getenv("CLUSTERING_BLAS_THREADS", 0)),
+                "clustering_parallel_min_samples": int(os.getenv("CLUSTERING_PARALLEL_MIN_SAMPLES", 20000)),
+                # "full" (default), "coreset", "sharded", or "auto" (coreset at CORESET_THRESHOLD sessions)
+                "clustering_mode": os.getenv("CLUSTERING_MODE", "full"),
+                "coreset_threshold": int(os.getenv("CORESET_THRESHOLD", 100000)),
+                "coreset_size": int(os.getenv("CORESET_SIZE", 10000)),
+                "coreset_eval_size": int(os.getenv("CORESET_EVAL_SIZE", 5000)),
+                "coreset_reference_fit": os.getenv("CORESET_REFERENCE_FIT", "false").lower() == "true",
+                # Worker processes for CLUSTERING_MODE=sharded (0 = all cores)
+                "sharded_workers": int(os.getenv("CLUSTERING_SHARDED_WORKERS", 0)),
+                # Out-of-core input: readable directory and in-memory spool size for streamed bodies
+                "clustering_data_dir": os.getenv("CLUSTERING_DATA_DIR", "data"),
+                "stream_spool_bytes": int(os.getenv("CLUSTERING_STREAM_SPOOL_MB", 16)) * 1024 * 1024
             },
             "llm": {
                 "provider": "openai",
@@ -26,6 +42,125 @@ class Config:
             "cache": {
                 "enabled": True,
                 "ttl": 300  # 5 minutes
+            },
+            "inference": {
+                # Per-model runtime: "sklearn" (pickle) or "onnx"
+                "backends": {
+                    "emotion": os.getenv("EMOTION_BACKEND", "sklearn"),
+                    "fraud": os.getenv("FRAUD_BACKEND", "sklearn"),
+                    "abandonment": os.getenv("ABANDONMENT_BACKEND", "sklearn")
+                },
+                "onnx_intra_op_threads": int(os.getenv("ONNX_INTRA_OP_THREADS", 1)),
+                # Versioned artifacts written by the offline training pipeline
+                "artifact_dir": os.getenv("MODEL_ARTIFACT_DIR", "trained_models/artifacts")
+            },
+            "prediction_cache": {
+                # LRU of model scores keyed by the quantized feature vector, per predictor
+                "enabled": os.getenv("PREDICTION_CACHE", "false").lower() == "true",
+                "max_entries": int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", 100000)),
+                "ttl": float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 300)),
+                # Per-feature quantization steps overriding the model defaults ("name=step,...")
+                "steps": {
+                    "emotion": os.getenv("PREDICTION_CACHE_STEPS_EMOTION", ""),
+                    "abandonment": os.getenv("PREDICTION_CACHE_STEPS_ABANDONMENT", ""),
+                    "fraud": os.getenv("PREDICTION_CACHE_STEPS_FRAUD", "")
+                }
+            },
+            "http_cache": {
+                "enabled": os.getenv("HTTP_CACHE", "true").lower() == "true",
+                "max_entries": int(os.getenv("HTTP_CACHE_MAX_ENTRIES", 10000)),
+                "max_mb": float(os.getenv("HTTP_CACHE_MAX_MB", 64)),
+                "ttl": float(os.getenv("HTTP_CACHE_TTL_SECONDS", 300)),
+                # Cache-Control max-age for shared caches (CDNs, proxies)
+                "max_age": int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", 60))
+            },
+            "reload": {
+                # Poll the artifact registry and reload models when CURRENT changes
+                "watch": os.getenv("MODEL_WATCH", "false").lower() == "true",
+                "watch_interval": float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", 5)),
+                "warmup_rows": int(os.getenv("MODEL_WARMUP_ROWS", 32)),
+                # Replaced models kept in memory for rollback
+                "history_size": int(os.getenv("MODEL_ROLLBACK_HISTORY", 3))
+            },
+            "logging": {
+                "level": os.getenv("LOG_LEVEL", "INFO"),
+                "json_format": os.getenv("LOG_FORMAT", "json").lower() == "json",
+                # Records waiting for the writer thread; more are dropped, never blocked on
+                "queue_size": int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+                # Fraction of INFO/DEBUG records kept, and per-call-site records/s (burst)
+                "sample_rate": float(os.getenv("LOG_SAMPLE_RATE", 1.0)),
+                "rate_limit": float(os.getenv("LOG_RATE_LIMIT", 10)),
+                "burst": int(os.getenv("LOG_RATE_BURST", 50))
+            },
+            "admission": {
+                "enabled": os.getenv("ADMISSION_CONTROL", "true").lower() == "true",
+                # Latency above the target shrinks a class's concurrency limit
+                "targets_ms": {
+                    "critical": float(os.getenv("ADMISSION_CRITICAL_TARGET_MS", 100)),
+                    "standard": float(os.getenv("ADMISSION_STANDARD_TARGET_MS", 500)),
+                    "batch": float(os.getenv("ADMISSION_BATCH_TARGET_MS", 30000))
+                },
+                "max_limits": {
+                    "critical": int(os.getenv("ADMISSION_CRITICAL_MAX_CONCURRENCY", 256)),
+                    "standard": int(os.getenv("ADMISSION_STANDARD_MAX_CONCURRENCY", 64)),
+                    "batch": int(os.getenv("ADMISSION_BATCH_MAX_CONCURRENCY", 8))
+                },
+                "min_limit": int(os.getenv("ADMISSION_MIN_CONCURRENCY", 1)),
+                "backoff": float(os.getenv("ADMISSION_BACKOFF", 0.9))
+            },
+            "deadline": {
+                # Applied when a request carries no X-Request-Timeout-Ms/X-Request-Deadline (0 = none)
+                "default_timeout_ms": float(os.getenv("REQUEST_DEFAULT_TIMEOUT_MS", 0)),
+                # LLM generation is skipped for a fallback below this much remaining time
+                "llm_min_seconds": float(os.getenv("LLM_MIN_SECONDS", 2.0))
+            },
+            "fraud_state": {
+                "window_seconds": float(os.getenv("FRAUD_STATE_WINDOW_SECONDS", 3600)),
+                "ttl": float(os.getenv("FRAUD_STATE_TTL_SECONDS", 86400)),
+                "max_users": int(os.getenv("FRAUD_STATE_MAX_USERS", 100000)),
+                "buffer_size": int(os.getenv("FRAUD_STATE_BUFFER_SIZE", 64)),
+                # Tolerated client clock lead; later timestamps are rejected
+                "allowed_skew": float(os.getenv("FRAUD_STATE_ALLOWED_SKEW_SECONDS", 300))
+            },
+            "visitor_state": {
+                "half_life_sessions": float(os.getenv("VISITOR_STATE_HALF_LIFE_SESSIONS", 5)),
+                "ttl": float(os.getenv("VISITOR_STATE_TTL_SECONDS", 30 * 86400)),
+                "max_visitors": int(os.getenv("VISITOR_STATE_MAX_VISITORS", 200000))
+            },
+            "drift": {
+                "enabled": os.getenv("PERSONA_DRIFT_MONITOR", "true").lower() == "true",
+                "auto_refit": os.getenv("PERSONA_DRIFT_AUTO_REFIT", "true").lower() == "true",
+                "threshold": float(os.getenv("PERSONA_DRIFT_THRESHOLD", 1.0)),
+                # Each drift component is divided by its limit before taking the max
+                "feature_shift_limit": float(os.getenv("PERSONA_DRIFT_FEATURE_SHIFT", 0.5)),
+                "assignment_shift_limit": float(os.getenv("PERSONA_DRIFT_ASSIGNMENT_SHIFT", 0.1)),
+                "distance_shift_limit": float(os.getenv("PERSONA_DRIFT_DISTANCE_SHIFT", 0.3)),
+                "half_life_sessions": float(os.getenv("PERSONA_DRIFT_HALF_LIFE_SESSIONS", 2000)),
+                "baseline_sessions": int(os.getenv("PERSONA_DRIFT_BASELINE_SESSIONS", 1000)),
+                "min_sessions": int(os.getenv("PERSONA_DRIFT_MIN_SESSIONS", 500)),
+                "sample_size": int(os.getenv("PERSONA_DRIFT_SAMPLE_SIZE", 5000)),
+                "refit_cooldown": float(os.getenv("PERSONA_DRIFT_REFIT_COOLDOWN_SECONDS", 3600)),
+                "max_websites": int(os.getenv("PERSONA_DRIFT_MAX_WEBSITES", 10000))
+            },
+            "cascade": {
+                "enabled": os.getenv("ABANDONMENT_CASCADE", "false").lower() == "true",
+                # First-stage probabilities outside (low, high) skip the GBM
+                "low": float(os.getenv("ABANDONMENT_CASCADE_LOW", 0.15)),
+                "high": float(os.getenv("ABANDONMENT_CASCADE_HIGH", 0.85)),
+                # Fraction of shortcuts also scored by the GBM to measure agreement
+                "shadow_rate": float(os.getenv("ABANDONMENT_CASCADE_SHADOW_RATE", 0.01))
+            },
+            "tenants": {
+                "model_dir": os.getenv("TENANT_MODEL_DIR", "trained_models/tenants"),
+                "memory_budget_bytes": int(os.getenv("TENANT_MODEL_MEMORY_MB", 512)) * 1024 * 1024,
+                # Seconds before a site without its own model is checked on disk again
+                "missing_ttl": float(os.getenv("TENANT_MODEL_MISSING_TTL", 60))
+            },
+            "jobs": {
+                "backend": os.getenv("JOB_BACKEND", "local"),
+                "workers": int(os.getenv("JOB_WORKERS", 2)),
+                "result_ttl": float(os.getenv("JOB_RESULT_TTL_SECONDS", 3600)),
+                "max_jobs": int(os.getenv("JOB_MAX_PENDING", 100))
             }
         }
 
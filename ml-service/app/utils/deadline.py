@@ -0,0 +1,71 @@
+import math
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+# Caller's budget: relative milliseconds, or an absolute Unix epoch in milliseconds
+TIMEOUT_HEADER = 'x-request-timeout-ms'
+DEADLINE_HEADER = 'x-request-deadline'
+# Stages that degraded to meet the deadline, comma separated
+DEGRADED_HEADER = 'x-degraded-stages'
+
+
+class Deadline:
+    """Point in (monotonic) time by which the caller needs the response"""
+
+    def __init__(self, timeout: float):
+        self.expires_at = time.monotonic() + timeout
+        # Appended to from threadpool workers too; they share this object
+        self.degraded: List[str] = []
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @classmethod
+    def from_headers(cls, timeout_ms: Optional[str], deadline_ms: Optional[str]) -> Optional['Deadline']:
+        """
+        The tighter of the two headers; None when neither is usable. Values
+        that are not finite numbers, and negative relative timeouts, are
+        ignored; a deadline already in the past is kept so it can be refused.
+        """
+        timeouts = []
+        timeout = _parse_ms(timeout_ms)
+        if timeout is not None and timeout >= 0:
+            timeouts.append(timeout / 1000)
+        deadline = _parse_ms(deadline_ms)
+        if deadline is not None:
+            timeouts.append(deadline / 1000 - time.time())
+        return cls(min(timeouts)) if timeouts else None
+
+
+def _parse_ms(value: Optional[str]) -> Optional[float]:
+    """A header's finite millisecond value, or None (``float`` also accepts nan/inf)"""
+    if not value:
+        return None
+    try:
+        parsed = float(value)
+    except ValueError:
+        return None
+    return parsed if math.isfinite(parsed) else None
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar('current_deadline', default=None)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left for the current request, or None without a deadline"""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def has_time(seconds: float = 0.0) -> bool:
+    """True unless the current request's deadline leaves less than ``seconds``"""
+    remaining = time_remaining()
+    return remaining is None or remaining > seconds
+
+
+def mark_degraded(stage: str) -> None:
+    """Record that ``stage`` returned a cheaper result to meet the deadline"""
+    deadline = current_deadline.get()
+    if deadline is not None and stage not in deadline.degraded:
+        deadline.degraded.append(stage)
@@ -0,0 +1,52 @@
+import operator
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+class FeatureExtractor:
+    """
+    Compiled mapping from validated feature models (see ``app.schemas``) to a
+    contiguous float64 matrix in model order.
+
+    Numeric fields are read with one ``attrgetter`` call per row. Categorical
+    fields go through a lookup table, and column transforms then run
+    vectorized over the whole batch.
+    """
+
+    def __init__(self, fields: Sequence[str],
+                 categories: Optional[Mapping[str, Mapping[str, float]]] = None,
+                 transforms: Optional[Mapping[str, Callable[[np.ndarray], np.ndarray]]] = None):
+        categories = categories or {}
+        transforms = transforms or {}
+        self.fields = list(fields)
+
+        self._numeric = [i for i, name in enumerate(self.fields) if name not in categories]
+        numeric_names = [self.fields[i] for i in self._numeric]
+        getter = operator.attrgetter(*numeric_names)
+        # attrgetter with one name returns a scalar, not a tuple
+        self._get_numeric = getter if len(numeric_names) > 1 else (lambda item: (getter(item),))
+        self._categorical = [
+            (self.fields.index(name), operator.attrgetter(name), dict(table))
+            for name, table in categories.items()
+        ]
+        self._transforms = [(self.fields.index(name), fn) for name, fn in transforms.items()]
+
+    def matrix(self, items: Sequence[Any]) -> np.ndarray:
+        """One row per validated feature model"""
+        X = np.empty((len(items), len(self.fields)), dtype=np.float64)
+        get_numeric = self._get_numeric
+        numeric = np.array([get_numeric(item) for item in items], dtype=np.float64)
+        if len(self._numeric) == len(self.fields):
+            X[:] = numeric.reshape(X.shape)
+        else:
+            X[:, self._numeric] = numeric.reshape(len(items), len(self._numeric))
+        for i, get_category, table in self._categorical:
+            X[:, i] = [table[get_category(item)] for item in items]
+        for i, transform in self._transforms:
+            X[:, i] = transform(X[:, i])
+        return X
+
+    def vector(self, item: Any) -> np.ndarray:
+        """Single-row matrix for one validated feature model"""
+        return self.matrix([item])
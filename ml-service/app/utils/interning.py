@@ -0,0 +1,129 @@
+from itertools import chain
+from typing import Any, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class _Ids(dict):
+    """Value -> id map that interns unseen values on lookup"""
+
+    __slots__ = ('values',)
+
+    def __init__(self):
+        super().__init__()
+        self.values: List[Hashable] = []
+
+    def __missing__(self, value: Hashable) -> int:
+        # Missing values (None/NaN) are not interned; NaN never equals itself
+        if value is None or value != value:
+            return -1
+        self[value] = len(self.values)
+        self.values.append(value)
+        return self[value]
+
+
+class Vocabulary:
+    """
+    Dense integer ids for hashable values (page URLs, device types),
+    assigned in first-seen order and stable for the vocabulary's lifetime.
+    """
+
+    def __init__(self):
+        self._ids = _Ids()
+
+    def encode(self, values: Iterable[Hashable], count: int = -1) -> np.ndarray:
+        """
+        Ids for ``values`` (int32), interning new ones. Missing values
+        (None/NaN) get -1 and are left out of every count. Values are
+        streamed straight into the id array; pass ``count`` when known so
+        it is allocated once.
+        """
+        # Known values resolve in C (dict.__getitem__); only new ones reach Python
+        return np.fromiter(map(self._ids.__getitem__, values), dtype=np.int32, count=count)
+
+    def values(self, ids: Iterable[int]) -> List[Hashable]:
+        values = self._ids.values
+        return [values[i] for i in ids]
+
+    def __len__(self) -> int:
+        return len(self._ids.values)
+
+
+def device_type(device: Any) -> str:
+    """Device type of a session's free-form ``device`` dict"""
+    return device.get('type', 'unknown') if isinstance(device, dict) else 'unknown'
+
+
+class EncodedSessions:
+    """
+    Pages and device types of a run of sessions as integer ids: pages in CSR
+    form (session ``i`` visited ``page_ids[page_offsets[i]:page_offsets[i + 1]]``)
+    and one device id per session.
+    """
+
+    def __init__(self, page_offsets: np.ndarray, page_ids: np.ndarray, device_ids: np.ndarray,
+                 pages: Vocabulary, devices: Vocabulary):
+        self.page_offsets = page_offsets
+        self.page_ids = page_ids
+        self.device_ids = device_ids
+        self.pages = pages
+        self.devices = devices
+
+    @classmethod
+    def encode(cls, pages_visited: Iterable[Optional[Sequence[str]]], devices: Iterable[Any],
+               pages: Optional[Vocabulary] = None, device_types: Optional[Vocabulary] = None) -> 'EncodedSessions':
+        """
+        Encode per-session page lists and device dicts. Pass the vocabularies
+        of earlier chunks to keep ids comparable across them.
+        """
+        pages = pages if pages is not None else Vocabulary()
+        device_types = device_types if device_types is not None else Vocabulary()
+
+        page_lists = [p if p is not None and not isinstance(p, float) else () for p in pages_visited]
+        lengths = np.fromiter(map(len, page_lists), dtype=np.int64, count=len(page_lists))
+        offsets = np.zeros(len(page_lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Sessions are interned one after another into an int32 buffer of the
+        # exact size; the flat page stream is never built as Python objects
+        page_ids = pages.encode(chain.from_iterable(page_lists), count=int(offsets[-1]))
+        device_ids = device_types.encode(map(device_type, devices))
+        return cls(offsets, page_ids, device_ids, pages, device_types)
+
+    def __len__(self) -> int:
+        return len(self.device_ids)
+
+    def page_counts(self) -> np.ndarray:
+        """Number of pages visited per session"""
+        return np.diff(self.page_offsets)
+
+    def take(self, mask: np.ndarray) -> 'EncodedSessions':
+        """The sessions selected by a boolean ``mask``, sharing the vocabularies"""
+        rows = np.flatnonzero(mask)
+        lengths = self.page_counts()[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Position of every kept page in the original page_ids
+        gather = np.repeat(self.page_offsets[:-1][rows] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return EncodedSessions(offsets, self.page_ids[gather], self.device_ids[rows], self.pages, self.devices)
+
+    def page_histograms(self, labels: np.ndarray, n_groups: int) -> np.ndarray:
+        """Visits per (group, page id) as an ``(n_groups, len(pages))`` count matrix"""
+        page_labels = np.repeat(labels, self.page_counts())
+        return grouped_counts(page_labels, self.page_ids, n_groups, len(self.pages))
+
+    def device_histograms(self, labels: np.ndarray, n_groups: int) -> np.ndarray:
+        """Sessions per (group, device id) as an ``(n_groups, len(devices))`` count matrix"""
+        return grouped_counts(labels, self.device_ids, n_groups, len(self.devices))
+
+
+def grouped_counts(groups: np.ndarray, ids: np.ndarray, n_groups: int, n_values: int) -> np.ndarray:
+    """Occurrences of each id per group in one bincount; ids of -1 are skipped"""
+    valid = ids >= 0
+    flat = groups[valid].astype(np.int64) * n_values + ids[valid]
+    return np.bincount(flat, minlength=n_groups * n_values).reshape(n_groups, n_values)
+
+
+def most_common(counts: np.ndarray, n: int) -> np.ndarray:
+    """Ids of the ``n`` largest counts (ties in id order, i.e. first seen), zero counts left out"""
+    order = np.argsort(-counts, kind='stable')[:n]
+    return order[counts[order] > 0]
@@ -0,0 +1,183 @@
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import random
+import reprlib
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# LogRecord attributes that are not caller-supplied structured fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+# Control attributes read by the pipeline, never emitted as fields
+_CONTROL_ATTRS = {'sample_rate'}
+
+_repr = reprlib.Repr()
+_repr.maxstring = 200
+_repr.maxother = 200
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = 10
+_repr.maxlevel = 3
+
+
+def truncate(value: Any, max_chars: int = 512) -> str:
+    """Bounded repr of any value; cost does not grow with the size of ``value``"""
+    text = value if isinstance(value, str) else _repr.repr(value)
+    if len(text) > max_chars:
+        return f"{text[:max_chars]}...[{len(text) - max_chars} more chars]"
+    return text
+
+
+def payload_digest(payload: bytes, head_chars: int = 256) -> Dict[str, Any]:
+    """Size, hash and a short head of a payload, in place of the payload itself"""
+    return {
+        'bytes': len(payload),
+        'sha256': hashlib.sha256(payload).hexdigest()[:16],
+        'head': truncate(payload[:head_chars].decode('utf-8', errors='replace'), head_chars)
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra=`` fields become top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in _CONTROL_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops high-volume records before they are queued.
+
+    Records below WARNING are kept with probability ``sample_rate`` (a call
+    can override it with ``extra={'sample_rate': ...}``). Every call site
+    (logger, file, line) is also limited to ``rate_limit`` records per second
+    with bursts of ``burst``; the next record that passes carries the number
+    suppressed since the last one as ``suppressed``.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, rate_limit: float = 10.0, burst: int = 50):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.suppressed_total = 0
+        self._lock = threading.Lock()
+        # call site -> [tokens, last refill, suppressed since last emit]
+        self._buckets: Dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            rate = getattr(record, 'sample_rate', self.sample_rate)
+            if rate < 1.0 and random.random() >= rate:
+                with self._lock:
+                    self.suppressed_total += 1
+                return False
+        if self.rate_limit <= 0:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.suppressed_total += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback here; the record must pickle/copy
+        # cleanly, but structured extras stay on it for the writer's formatter
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_pipeline: Optional[Dict[str, Any]] = None
+
+
+def setup_logging(level: str = 'INFO', json_format: bool = True, queue_size: int = 10000,
+                  sample_rate: float = 1.0, rate_limit: float = 10.0, burst: int = 50) -> None:
+    """
+    Route all logging through a bounded queue to a background writer thread,
+    so request handlers never block on I/O. Idempotent.
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if json_format:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    sampling = SamplingFilter(sample_rate, rate_limit, burst)
+    queue_handler.addFilter(sampling)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _pipeline = {'handler': queue_handler, 'filter': sampling, 'listener': listener}
+
+
+def logging_stats() -> Dict[str, int]:
+    """Records dropped on a full queue and suppressed by sampling/rate limits"""
+    if _pipeline is None:
+        return {'queued': 0, 'dropped': 0, 'suppressed': 0}
+    handler = _pipeline['handler']
+    return {
+        'queued': handler.queue.qsize(),
+        'dropped': handler.dropped,
+        'suppressed': _pipeline['filter'].suppressed_total
+    }
@@ -0,0 +1,44 @@
+from typing import Any, Dict
+
+import numpy as np
+
+# dtype kinds accepted from clients: float, signed and unsigned int
+_NUMERIC_KINDS = 'fiu'
+
+
+def pack_array(array: np.ndarray) -> Dict[str, Any]:
+    """
+    Packed form of a numeric array for MessagePack bodies:
+    ``{"dtype": "<f8", "shape": [rows, cols], "data": <raw bytes, C order>}``
+    """
+    array = np.ascontiguousarray(array)
+    return {'dtype': array.dtype.str, 'shape': list(array.shape), 'data': array.tobytes()}
+
+
+def unpack_array(value: Any, ndim: int = 2) -> np.ndarray:
+    """
+    Float64 array from a packed array (see ``pack_array``) or nested lists,
+    so JSON and MessagePack clients can send the same field.
+    """
+    if isinstance(value, np.ndarray):
+        array = value.astype(np.float64, copy=False)
+    elif isinstance(value, dict):
+        try:
+            dtype = np.dtype(value['dtype'])
+            shape = tuple(int(n) for n in value['shape'])
+            data = value['data']
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Packed array needs dtype, shape and data: {e}")
+        if dtype.kind not in _NUMERIC_KINDS:
+            raise ValueError(f"Unsupported packed dtype: {dtype.str}")
+        if not isinstance(data, (bytes, bytearray)) or len(data) != int(np.prod(shape)) * dtype.itemsize:
+            raise ValueError(f"Packed data does not match shape {list(shape)} of {dtype.str}")
+        array = np.frombuffer(data, dtype=dtype).reshape(shape).astype(np.float64)
+    else:
+        array = np.asarray(value, dtype=np.float64)
+
+    if array.ndim != ndim:
+        raise ValueError(f"Expected a {ndim}-d array, got shape {list(array.shape)}")
+    if not np.all(np.isfinite(array)):
+        raise ValueError("Array contains NaN or infinite values")
+    return array
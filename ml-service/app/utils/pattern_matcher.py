@@ -0,0 +1,55 @@
+from collections import deque
+from typing import Dict, Hashable, List, Mapping, Sequence, Set
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of substrings, each tagged with
+    a label. ``labels(text)`` returns the labels of every pattern occurring
+    in ``text`` in one pass over it, however many patterns there are.
+    """
+
+    def __init__(self, patterns: Mapping[Hashable, Sequence[str]]):
+        # Trie: per-state transitions, failure links and the labels ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        outputs: List[Set[Hashable]] = [set()]
+        for label, words in patterns.items():
+            for word in words:
+                if not word:
+                    raise ValueError(f"Empty pattern for {label!r}")
+                state = 0
+                for char in word:
+                    if char not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        outputs.append(set())
+                        self._goto[state][char] = len(self._goto) - 1
+                    state = self._goto[state][char]
+                outputs[state].add(label)
+
+        # Breadth-first so every failure target is finished before it is used;
+        # depth-1 states keep failing to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                outputs[child] |= outputs[self._fail[child]]
+                queue.append(child)
+        self._out: List[frozenset] = [frozenset(labels) for labels in outputs]
+
+    def labels(self, text: str) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
@@ -0,0 +1,112 @@
+"""
+Prediction cache on replayed traffic: per-request latency and CPU time of
+single-row predictions with and without the quantized-feature cache, the hit
+rate, and how far cached answers drift from uncached ones. Run from
+ml-service/ with trained models available.
+
+Traffic is replayed from a JSONL file of request bodies (``{"features": {...}}``)
+or, by default, synthesized: Zipf-popular visitor profiles with small jitter
+plus a share of calls that only carry defaulted fields.
+
+Usage:
+    python -m benchmarks.prediction_cache_bench [--model emotion] [--requests 20000]
+                                                [--replay requests.jsonl]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.abandonment_model import CACHE_STEPS as ABANDONMENT_STEPS, AbandonmentPredictor
+from app.models.emotion_model import CACHE_STEPS as EMOTION_STEPS, EmotionPredictor
+from app.models.fraud_model import CACHE_STEPS as FRAUD_STEPS, FraudDetector
+from app.services.prediction_cache import PredictionCache
+
+MODELS = {
+    'emotion': (EmotionPredictor, EMOTION_STEPS, {
+        'mouse_speed_variance': (0, 2000), 'avg_mouse_speed': (0, 300), 'scroll_depth_changes': (-50, 100),
+        'click_hesitation_time': (0, 3000), 'time_on_page': (0, 90000)
+    }),
+    'abandonment': (AbandonmentPredictor, ABANDONMENT_STEPS, {
+        'time_in_cart': (0, 1200), 'scroll_percentage': (0, 100), 'price_checks': (0, 10),
+        'comparisons': (0, 6), 'previous_abandons': (0, 5), 'time_of_day': (0, 23), 'cart_value': (0, 9000)
+    }),
+    'fraud': (FraudDetector, FRAUD_STEPS, {
+        'checkout_speed': (0, 120), 'mouse_movements': (0, 100), 'failed_payments': (0, 4),
+        'email_pattern_score': (0, 1), 'location_anomaly': (0, 1)
+    })
+}
+
+
+def synthesize(ranges: Dict, requests: int, profiles: int, defaulted_share: float, seed: int = 42) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    names = list(ranges)
+    low = np.array([ranges[n][0] for n in names], dtype=np.float64)
+    high = np.array([ranges[n][1] for n in names], dtype=np.float64)
+    base = rng.uniform(low, high, size=(profiles, len(names)))
+    # Integer-valued features (counts, hours) stay integers
+    integral = np.array([float(lo).is_integer() and float(hi).is_integer() and hi <= 24 for lo, hi in zip(low, high)])
+    base[:, integral] = np.round(base[:, integral])
+
+    picks = np.minimum(rng.zipf(1.3, size=requests), profiles) - 1
+    jitter = rng.normal(0, 0.001, size=(requests, len(names))) * (high - low)
+    rows = base[picks] + np.where(integral, 0, jitter)
+    traffic = []
+    for row, defaulted in zip(rows, rng.random(requests) < defaulted_share):
+        traffic.append({} if defaulted else dict(zip(names, row.tolist())))
+    return traffic
+
+
+def replay(predictor, traffic: List[Dict]):
+    outputs = []
+    wall, cpu = time.perf_counter(), time.process_time()
+    for features in traffic:
+        outputs.append(predictor.predict(features))
+    return (time.perf_counter() - wall) / len(traffic) * 1e3, (time.process_time() - cpu) / len(traffic) * 1e3, outputs
+
+
+def _score(model: str, result: Dict) -> float:
+    return result['confidence'] if model == 'emotion' else result.get('probability', result.get('fraud_probability'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', choices=sorted(MODELS), default='emotion')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--profiles', type=int, default=2000, help="Distinct visitor profiles in synthetic traffic")
+    parser.add_argument('--defaulted-share', type=float, default=0.2, help="Share of calls with only defaulted fields")
+    parser.add_argument('--replay', help="JSONL of request bodies to replay instead of synthetic traffic")
+    args = parser.parse_args()
+
+    predictor_cls, steps, ranges = MODELS[args.model]
+    if args.replay:
+        with open(args.replay) as f:
+            traffic = [json.loads(line).get('features', {}) for line in f if line.strip()]
+    else:
+        traffic = synthesize(ranges, args.requests, args.profiles, args.defaulted_share)
+
+    predictor = predictor_cls()
+    predictor.cache = None
+    base_wall, base_cpu, base_out = replay(predictor, traffic)
+
+    predictor.cache = PredictionCache(predictor.feature_names, steps, max_entries=100000, ttl=None)
+    wall, cpu, out = replay(predictor, traffic)
+    stats = predictor.cache.stats()
+
+    drift = np.abs(np.array([_score(args.model, r) for r in out]) - np.array([_score(args.model, r) for r in base_out]))
+    labels = 'emotion' if args.model == 'emotion' else 'risk_level'
+    agreement = np.mean([a[labels] == b[labels] for a, b in zip(out, base_out)])
+
+    print(f"model={args.model} requests={len(traffic)} hit_rate={stats['hit_rate']:.3f} cached_rows={stats['size']}")
+    print(f"{'':<10} {'wall ms/req':>12} {'cpu ms/req':>11}")
+    print(f"{'no cache':<10} {base_wall:>12.4f} {base_cpu:>11.4f}")
+    print(f"{'cache':<10} {wall:>12.4f} {cpu:>11.4f}")
+    print(f"speedup {base_wall / wall:.2f}x wall, {base_cpu / cpu:.2f}x cpu; "
+          f"label agreement {agreement:.4f}")
+    print(f"score drift vs uncached: mean {drift.mean():.5f}, p99 {np.quantile(drift, 0.99):.4f}, max {drift.max():.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-cluster page and device statistics over interned ids versus Python
+objects: the ``pagesVisited`` lists and ``device`` dicts kept in pandas
+object columns and re-flattened per cluster. Reports wall time and peak
+traced memory of each stage.
+
+Usage:
+    python -m benchmarks.session_encoding_bench [--sessions 500000] [--pages 20000]
+                                                [--clusters 6]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.models.clustering import ClusterStatsAccumulator, SESSION_COLUMNS
+from app.utils.interning import EncodedSessions
+
+DEVICES = [{'type': 'desktop'}, {'type': 'mobile'}, {'type': 'tablet'}, None]
+
+
+def make_sessions(sessions: int, pages: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    urls = [f"https://shop.example.com/catalog/item-{i}" for i in range(pages)]
+    lengths = rng.poisson(4, sessions)
+    # Zipf-popular pages, as on real sites
+    page_ids = np.minimum(rng.zipf(1.2, lengths.sum()), pages) - 1
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    data = [
+        {
+            'id': f"s{i}",
+            'intentScore': 0.5, 'avgScrollDepth': 0.5, 'totalClicks': 3, 'pageViews': 4, 'totalTimeSpent': 120,
+            'pagesVisited': [urls[p] for p in page_ids[offsets[i]:offsets[i + 1]]],
+            'device': DEVICES[i % len(DEVICES)]
+        }
+        for i in range(sessions)
+    ]
+    return data, rng.integers(0, 6, sessions)
+
+
+def object_columns(data, labels, clusters):
+    """The former approach: object columns, flattened and counted per cluster"""
+    df = pd.DataFrame(data).set_index('id')
+    df['cluster'] = labels
+    results = []
+    for cluster_id in range(clusters):
+        cluster_data = df[df['cluster'] == cluster_id]
+        pages = [page for visited in cluster_data['pagesVisited'] if visited for page in visited]
+        devices = cluster_data['device'].apply(lambda d: d.get('type', 'unknown') if isinstance(d, dict) else 'unknown')
+        results.append((pd.Series(pages).value_counts().head(5).index.tolist(),
+                        devices.value_counts().head(3).index.tolist()))
+    return results
+
+
+def interned(data, labels, clusters):
+    encoded = EncodedSessions.encode((s['pagesVisited'] for s in data), (s['device'] for s in data))
+    df = pd.DataFrame.from_records(data, columns=SESSION_COLUMNS).set_index('id')
+    accumulator = ClusterStatsAccumulator(clusters, encoded.pages, encoded.devices)
+    accumulator.add(df, labels, encoded)
+    return [(m['common_pages'], m['common_devices']) for m in map(accumulator.metrics, range(clusters))]
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=500_000)
+    parser.add_argument('--pages', type=int, default=20_000)
+    parser.add_argument('--clusters', type=int, default=6)
+    args = parser.parse_args()
+
+    data, labels = make_sessions(args.sessions, args.pages)
+    labels = labels % args.clusters
+
+    print(f"sessions={args.sessions} distinct_pages<={args.pages} clusters={args.clusters}")
+    print(f"{'':<10} {'seconds':>8} {'peak_mb':>9}")
+    expected, base_time, base_peak = measure(object_columns, data, labels, args.clusters)
+    print(f"{'objects':<10} {base_time:>8.2f} {base_peak:>9.1f}")
+    result, elapsed, peak = measure(interned, data, labels, args.clusters)
+    print(f"{'interned':<10} {elapsed:>8.2f} {peak:>9.1f}")
+    print(f"speedup {base_time / elapsed:.2f}x, peak memory {peak / base_peak:.2f}x; "
+          f"top-page sets match: {all(set(a[0]) == set(b[0]) for a, b in zip(expected, result))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Scaling benchmark for ShardedKMeans: wall-clock from 1 to N workers.
+
+Usage:
+    python -m benchmarks.sharded_kmeans_bench [--rows 2000000] [--clusters 5]
+                                              [--max-workers 16]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.models.sharded_kmeans import ShardedKMeans, ShardedKMeansPool
+
+
+def make_sessions(rows: int, clusters: int, features: int = 6, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 3, size=(clusters, features))
+    return centers[rng.integers(0, clusters, rows)] + rng.normal(0, 1, size=(rows, features))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--clusters', type=int, default=5)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    X = make_sessions(args.rows, args.clusters)
+    workers = sorted({1, *[w for w in (2, 4, 8, 16, 32) if w < args.max_workers], args.max_workers})
+
+    baseline = None
+    print(f"rows={args.rows} clusters={args.clusters}")
+    print(f"{'workers':>8} {'setup_s':>8} {'fit_s':>8} {'speedup':>8} {'iters':>6} {'inertia':>14}")
+    for n_workers in workers:
+        start = time.perf_counter()
+        with ShardedKMeansPool(X, n_workers) as pool:
+            setup = time.perf_counter() - start
+            start = time.perf_counter()
+            model = ShardedKMeans(n_clusters=args.clusters).fit(X, pool)
+            fit = time.perf_counter() - start
+        baseline = baseline or fit
+        print(f"{n_workers:>8} {setup:>8.2f} {fit:>8.2f} {baseline / fit:>7.2f}x {model.n_iter_:>6} {model.inertia_:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+JSON vs MessagePack on the predict endpoints: payload sizes and in-process
+round-trip latency (client encode + server decode/validate/predict/render +
+client decode) through the ASGI app. Run from ml-service/ with trained
+models available.
+
+Usage:
+    python -m benchmarks.transport_bench [--rows 1000] [--repeats 200]
+"""
+import argparse
+import os
+import time
+
+import msgpack
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.utils.packed_arrays import pack_array  # noqa: E402
+
+MSGPACK_HEADERS = {'content-type': 'application/msgpack', 'accept': 'application/msgpack'}
+
+
+def _time(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help="Rows per batch request")
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    rng = np.random.default_rng(42)
+    features = {
+        'mouse_speed_variance': 820.5, 'avg_mouse_speed': 140.2, 'scroll_depth_changes': 61.0,
+        'click_hesitation_time': 950.0, 'time_on_page': 52000.0
+    }
+    matrix = rng.uniform(0, 1500, size=(args.rows, 5))
+
+    cases = {
+        'single /predict/emotion': (
+            '/ml/v1/predict/emotion',
+            {'features': features},
+            {'features': features},
+            args.repeats
+        ),
+        f'batch /predict/emotion/batch ({args.rows} rows)': (
+            '/ml/v1/predict/emotion/batch',
+            {'matrix': matrix.tolist()},
+            {'matrix': pack_array(matrix)},
+            max(args.repeats // 10, 5)
+        )
+    }
+
+    print(f"{'case':<42} {'format':<8} {'req_bytes':>10} {'resp_bytes':>11} {'ms/call':>9}")
+    for name, (path, json_body, msgpack_body, repeats) in cases.items():
+        def call_json():
+            return client.post(path, json=json_body).json()
+
+        def call_msgpack():
+            response = client.post(path, content=msgpack.packb(msgpack_body), headers=MSGPACK_HEADERS)
+            return msgpack.unpackb(response.content)
+
+        json_response = client.post(path, json=json_body)
+        msgpack_response = client.post(path, content=msgpack.packb(msgpack_body), headers=MSGPACK_HEADERS)
+        rows = [
+            ('json', len(json_response.request.content), len(json_response.content), _time(call_json, repeats)),
+            ('msgpack', len(msgpack.packb(msgpack_body)), len(msgpack_response.content), _time(call_msgpack, repeats))
+        ]
+        for fmt, req_bytes, resp_bytes, ms in rows:
+            print(f"{name:<42} {fmt:<8} {req_bytes:>10} {resp_bytes:>11} {ms:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import time
+
+from app.services.fraud_state import FraudStateStore
+
+
+def _event(timestamp, type_='payment_failed', user_id='u1', location=None):
+    return {'userId': user_id, 'type': type_, 'timestamp': timestamp, 'location': location}
+
+
+def test_out_of_order_events_expire_with_the_window():
+    store = FraudStateStore(window_seconds=60, buffer_size=8)
+    now = time.time()
+    # A late event arrives behind a newer head
+    assert store.ingest([_event(now - 5), _event(now - 50, location='berlin'), _event(now - 10)]) == 3
+
+    buffer = store.users.get('u1')
+    assert [event[0] for event in buffer.events] == sorted(event[0] for event in buffer.events)
+
+    # Once the late event leaves the window, so do its counts
+    buffer.expire(now - 30)
+    assert buffer.counts[2] == 2
+    assert buffer.locations == {}
+
+
+def test_late_event_older_than_a_full_buffer_is_dropped():
+    store = FraudStateStore(window_seconds=60, buffer_size=2)
+    now = time.time()
+    assert store.ingest([_event(now - 10), _event(now - 5), _event(now - 20)]) == 2
+    assert store.rejected == 1
+    assert store.aggregates('u1')['failed_payments'] == 2
+
+
+def test_future_and_millisecond_timestamps_are_rejected():
+    store = FraudStateStore(window_seconds=60, allowed_skew=30)
+    now = time.time()
+    accepted = store.ingest([
+        _event(now + 3600, location='paris'),
+        _event(now * 1000, location='rome'),
+        _event(now + 10)
+    ])
+    assert accepted == 1
+    assert store.rejected == 2
+    assert store.derived_features('u1') == {'failed_payments': 1, 'location_anomaly': 0.0}